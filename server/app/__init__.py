@@ -10,6 +10,9 @@ from flask_cors import CORS
 from app.api import api_bp
 from app.api.error_handlers import register_error_handlers
 from app.config import Config
+from app.utils import metrics
+from app.utils.profiling import ProfilingMiddleware
+from app.warmup import warm_up
 
 
 def create_app(config_class=Config):
@@ -25,6 +28,10 @@ def create_app(config_class=Config):
     app = Flask(__name__)
     app.config.from_object(config_class)
     
+    # Flask 3 ignores JSON_SORT_KEYS; apply it to the JSON provider so
+    # jsonify and the json_response fallback order keys like the fast path
+    app.json.sort_keys = app.config["JSON_SORT_KEYS"]
+    
     # Initialize extensions
     CORS(app)
     
@@ -34,9 +41,25 @@ def create_app(config_class=Config):
     # Register error handlers
     register_error_handlers(app)
     
-    # Load ML model on startup
-    with app.app_context():
-        from app.models.ml_model import DiabetesModel
-        DiabetesModel.get_instance()
+    # Record metrics in memory, or per worker in METRICS_DIR
+    metrics.configure(app.config["METRICS_ENABLED"], app.config["METRICS_DIR"])
+    
+    # Profile requests that present the profiling token (not installed,
+    # and so free, when no token is configured)
+    if app.config["PROFILING_TOKEN"]:
+        app.wsgi_app = ProfilingMiddleware(
+            app.wsgi_app,
+            token=app.config["PROFILING_TOKEN"],
+            directory=app.config["PROFILE_DIR"],
+            top_n=app.config["PROFILE_TOP_N"],
+            keep=app.config["PROFILE_KEEP"]
+        )
+    
+    # Import the prediction stack and load the ML model on startup (or in
+    # the background, so the app can bind immediately and report progress
+    # on /ready); with MODEL_LAZY_LOAD the first request that needs them
+    # does this instead
+    if not app.config["MODEL_LAZY_LOAD"]:
+        warm_up(app)
     
     return app
@@ -5,7 +5,24 @@ This module registers all API routes and exports the blueprint.
 """
 from flask import Blueprint
 
+from app.api.lazy_view import LazyView
+
 api_bp = Blueprint("api", __name__)
 
 # Import routes to register them with the blueprint
 from app.api import routes  # noqa: F401, E402
+
+# Prediction endpoints (rule, view name in prediction_routes, methods);
+# their module is imported by the first request or by app.warmup
+PREDICTION_ROUTES = (
+    ("/predict", "predict", ["POST"]),
+    ("/predict/batch", "predict_batch", ["POST"]),
+    ("/predict/stream", "predict_stream", ["POST"]),
+    ("/predict/scenarios", "predict_scenarios", ["POST"]),
+    ("/predict/risk-curve", "predict_risk_curve", ["POST"]),
+)
+
+for rule, name, methods in PREDICTION_ROUTES:
+    api_bp.add_url_rule(
+        rule, name, LazyView(f"app.api.prediction_routes.{name}"), methods=methods
+    )
@@ -0,0 +1,185 @@
+"""
+Compiled Validator - Single-pass Request Validation
+
+Compiles a marshmallow schema of flat scalar fields into one pass of
+plain type, range and choice checks. Values that need coercion or fail a
+check are handed to the marshmallow field itself, so results and error
+messages are identical to Schema.load.
+"""
+from collections.abc import Callable, Mapping
+from typing import Any
+
+from marshmallow import EXCLUDE, INCLUDE, Schema, ValidationError, fields, validate
+
+# Sentinel returned by fast checks when marshmallow must decide
+_SLOW_PATH = object()
+
+
+def _range_check(validator: validate.Range) -> Callable[[Any], bool]:
+    """Build a plain comparison equivalent to a Range validator."""
+    low, high = validator.min, validator.max
+    if low is not None and high is not None and (
+        validator.min_inclusive and validator.max_inclusive
+    ):
+        return lambda v: low <= v <= high
+    
+    def in_range(v) -> bool:
+        # Written as positive comparisons so NaN never passes
+        if low is not None and not (v >= low if validator.min_inclusive else v > low):
+            return False
+        if high is not None and not (v <= high if validator.max_inclusive else v < high):
+            return False
+        return True
+    return in_range
+
+
+def _compile_field(field: fields.Field) -> Callable[[Any], Any]:
+    """
+    Build the fast-path check for one field.
+    
+    Args:
+        field: Marshmallow field from the schema
+    
+    Returns:
+        Function returning the deserialized value, or _SLOW_PATH when the
+        value needs marshmallow's coercion or error reporting
+    """
+    checks = []
+    for validator in field.validators:
+        if isinstance(validator, validate.Range):
+            checks.append(_range_check(validator))
+        elif isinstance(validator, validate.OneOf):
+            choices = frozenset(validator.choices)
+            checks.append(choices.__contains__)
+        else:
+            # Unknown validator: always let marshmallow run it
+            return lambda value: _SLOW_PATH
+    
+    if not checks:
+        passes = lambda value: True  # noqa: E731
+    elif len(checks) == 1:
+        passes = checks[0]
+    else:
+        passes = lambda value: all(check(value) for check in checks)  # noqa: E731
+    
+    # Exact types only: bools are ints in Python but not valid numbers here,
+    # and strings like "45" need marshmallow's coercion
+    if isinstance(field, fields.Boolean):
+        return lambda value: value if value is True or value is False else _SLOW_PATH
+    if isinstance(field, fields.Integer):
+        return lambda value: (
+            value if type(value) is int and passes(value) else _SLOW_PATH
+        )
+    if isinstance(field, fields.Float):
+        # NaN fails every range comparison and falls through to marshmallow
+        return lambda value: (
+            float(value)
+            if type(value) in (float, int) and passes(value)
+            else _SLOW_PATH
+        )
+    if isinstance(field, fields.String):
+        return lambda value: (
+            value if type(value) is str and passes(value) else _SLOW_PATH
+        )
+    return lambda value: _SLOW_PATH
+
+
+class CompiledValidator:
+    """
+    Drop-in replacement for Schema.load on flat request schemas.
+    
+    Each field is checked once with plain Python comparisons. Only when a
+    value is not already of the exact expected type (e.g. "45" for an
+    Integer) or fails a check does the field's own deserialize() run, which
+    supplies marshmallow's coercion and error messages. Schema-level hooks
+    (pre_load/post_load/validates_schema) are not run; the hooks of the
+    schemas compiled here return the data unchanged.
+    """
+    
+    def __init__(self, schema: Schema):
+        """
+        Compile a schema instance.
+        
+        Args:
+            schema: Marshmallow schema whose fields are all scalars
+        """
+        self.schema = schema
+        self._fields = [
+            (
+                field.data_key or name,
+                name,
+                field,
+                _compile_field(field),
+                field.required,
+            )
+            for name, field in schema.load_fields.items()
+        ]
+        self._known_keys = frozenset(key for key, *_ in self._fields)
+        self._unknown = schema.unknown
+        self._type_error = schema.error_messages["type"]
+        self._unknown_error = schema.error_messages["unknown"]
+    
+    def load(self, data: Any) -> dict[str, Any]:
+        """
+        Validate and deserialize input data.
+        
+        Args:
+            data: Raw input (normally the parsed JSON body)
+        
+        Returns:
+            Deserialized data, as Schema.load would return
+        
+        Raises:
+            ValidationError: With the same messages as Schema.load
+        """
+        result, errors = self._run(data)
+        if errors:
+            raise ValidationError(errors, data=data, valid_data=result)
+        return result
+    
+    def validate(self, data: Any) -> dict[str, list[str]]:
+        """
+        Validate input data without raising.
+        
+        Args:
+            data: Raw input (normally the parsed JSON body)
+        
+        Returns:
+            Error messages keyed by field, as Schema.validate returns
+        """
+        return self._run(data)[1]
+    
+    def _run(self, data: Any) -> tuple[dict[str, Any], dict[str, list[str]]]:
+        """Single pass over the fields, collecting results and errors."""
+        if not isinstance(data, Mapping):
+            return {}, {"_schema": [self._type_error]}
+        
+        result = {}
+        errors = {}
+        present = 0
+        for key, name, field, fast_check, required in self._fields:
+            if key not in data:
+                if required:
+                    errors[key] = [field.error_messages["required"]]
+                continue
+            
+            present += 1
+            value = data[key]
+            checked = fast_check(value)
+            if checked is _SLOW_PATH:
+                try:
+                    checked = field.deserialize(value, key, data)
+                except ValidationError as error:
+                    errors[key] = error.messages
+                    continue
+            result[name] = checked
+        
+        if len(data) > present:
+            for key in data:
+                if key not in self._known_keys:
+                    if self._unknown == INCLUDE:
+                        result[key] = data[key]
+                    elif self._unknown != EXCLUDE:
+                        errors[key] = [self._unknown_error]
+        
+        return result, errors
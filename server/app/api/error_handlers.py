@@ -3,8 +3,35 @@ Error Handlers - Global Exception Handling
 
 Provides consistent error responses across the API.
 """
-from flask import jsonify
-from marshmallow import ValidationError
+import sys
+
+from app.api.serialization import dumps, json_response, static_response
+from app.utils.metrics import ERRORS
+
+# Bodies of responses that never change, encoded once
+NOT_FOUND_BODY = dumps({
+    "error": "Not Found",
+    "message": "The requested resource was not found"
+})
+INTERNAL_ERROR_BODY = dumps({
+    "error": "Internal Server Error",
+    "message": "An unexpected error occurred. Please try again later."
+})
+UNHANDLED_ERROR_BODY = dumps({
+    "error": "Internal Server Error",
+    "message": "An unexpected error occurred"
+})
+
+
+def _is_validation_error(error: Exception) -> bool:
+    """
+    Check for a marshmallow ValidationError without importing marshmallow.
+    
+    marshmallow is imported with the prediction routes on first use, and
+    none of its errors can be raised before then.
+    """
+    marshmallow = sys.modules.get("marshmallow")
+    return marshmallow is not None and isinstance(error, marshmallow.ValidationError)
 
 
 def register_error_handlers(app):
@@ -13,49 +40,48 @@ def register_error_handlers(app):
     @app.errorhandler(400)
     def bad_request(error):
         """Handle bad request errors."""
-        return jsonify({
+        ERRORS.labels(handler="bad_request").inc()
+        return json_response({
             "error": "Bad Request",
             "message": str(error.description) if hasattr(error, 'description') else "Invalid request"
-        }), 400
+        }, 400)
     
     @app.errorhandler(404)
     def not_found(error):
         """Handle not found errors."""
-        return jsonify({
-            "error": "Not Found",
-            "message": "The requested resource was not found"
-        }), 404
+        ERRORS.labels(handler="not_found").inc()
+        return static_response(NOT_FOUND_BODY, 404)
     
     @app.errorhandler(422)
     def unprocessable_entity(error):
         """Handle validation errors."""
-        return jsonify({
+        ERRORS.labels(handler="unprocessable_entity").inc()
+        return json_response({
             "error": "Validation Error",
             "message": str(error.description) if hasattr(error, 'description') else "Invalid input data"
-        }), 422
+        }, 422)
     
     @app.errorhandler(500)
     def internal_server_error(error):
         """Handle internal server errors."""
-        return jsonify({
-            "error": "Internal Server Error",
-            "message": "An unexpected error occurred. Please try again later."
-        }), 500
+        ERRORS.labels(handler="internal_server_error").inc()
+        return static_response(INTERNAL_ERROR_BODY, 500)
     
-    @app.errorhandler(ValidationError)
     def handle_validation_error(error):
         """Handle Marshmallow validation errors."""
-        return jsonify({
+        ERRORS.labels(handler="handle_validation_error").inc()
+        return json_response({
             "error": "Validation Error",
             "details": error.messages
-        }), 422
+        }, 422)
     
     @app.errorhandler(Exception)
     def handle_generic_exception(error):
         """Handle uncaught exceptions."""
+        if _is_validation_error(error):
+            return handle_validation_error(error)
+        
+        ERRORS.labels(handler="handle_generic_exception").inc()
         # Log the error in production
         app.logger.error(f"Unhandled exception: {str(error)}")
-        return jsonify({
-            "error": "Internal Server Error",
-            "message": "An unexpected error occurred"
-        }), 500
+        return static_response(UNHANDLED_ERROR_BODY, 500)
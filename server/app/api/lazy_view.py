@@ -0,0 +1,32 @@
+"""
+Lazy View - Views Imported on First Request
+
+Flask's lazy-loading views pattern: a view is registered by import name
+and its module is imported when the view is first called, so the
+dependencies of the view stay out of application startup.
+"""
+from typing import Any
+
+from werkzeug.utils import import_string
+
+
+class LazyView:
+    """View function that imports the real view on its first call."""
+    
+    def __init__(self, import_name: str):
+        """
+        Initialize with the dotted path of the view function.
+        
+        Args:
+            import_name: e.g. "app.api.prediction_routes.predict"
+        """
+        self.__module__, self.__name__ = import_name.rsplit(".", 1)
+        self.import_name = import_name
+        self._view = None
+    
+    def __call__(self, *args: Any, **kwargs: Any) -> Any:
+        """Import the view if needed and call it."""
+        view = self._view
+        if view is None:
+            view = self._view = import_string(self.import_name)
+        return view(*args, **kwargs)
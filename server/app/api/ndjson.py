@@ -0,0 +1,97 @@
+"""
+NDJSON - Bounded-memory Line Reading
+
+Reads newline-delimited JSON from a request body in fixed-size chunks,
+so uploads of any size are processed with constant memory.
+"""
+from collections.abc import Iterator
+from typing import IO, Any
+
+from app.api.serialization import loads
+
+# Error codes reported for lines that can't be decoded
+INVALID_JSON = "Invalid JSON"
+LINE_TOO_LONG = "Line too long"
+
+
+class ParsedLine:
+    """One non-empty input line: its decoded value or a decoding error."""
+    
+    __slots__ = ("number", "value", "error")
+    
+    def __init__(self, number: int, value: Any = None, error: str | None = None):
+        """
+        Initialize a parsed line.
+        
+        Args:
+            number: 1-based line number in the upload
+            value: Decoded JSON value (when error is None)
+            error: INVALID_JSON or LINE_TOO_LONG if the line couldn't be decoded
+        """
+        self.number = number
+        self.value = value
+        self.error = error
+
+
+def iter_lines(stream: IO[bytes], max_line_bytes: int) -> Iterator[ParsedLine]:
+    """
+    Decode each non-empty line of an NDJSON stream.
+    
+    Lines longer than max_line_bytes are skipped without being buffered
+    and reported as LINE_TOO_LONG.
+    
+    Args:
+        stream: Binary file-like request body
+        max_line_bytes: Longest accepted line, excluding the newline
+    
+    Yields:
+        ParsedLine per non-empty line, in input order
+    """
+    number = 0
+    while True:
+        line = stream.readline(max_line_bytes + 1)
+        if not line:
+            return
+        number += 1
+        
+        if len(line) > max_line_bytes and not line.endswith(b"\n"):
+            # Discard the rest of the oversized line in bounded reads
+            while line and not line.endswith(b"\n"):
+                line = stream.readline(max_line_bytes + 1)
+            yield ParsedLine(number, error=LINE_TOO_LONG)
+            continue
+        
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            parsed = ParsedLine(number, value=loads(line))
+        except ValueError:
+            parsed = ParsedLine(number, error=INVALID_JSON)
+        yield parsed
+
+
+def iter_chunks(
+    stream: IO[bytes],
+    chunk_size: int,
+    max_line_bytes: int
+) -> Iterator[list[ParsedLine]]:
+    """
+    Group decoded lines into chunks of at most chunk_size lines.
+    
+    Args:
+        stream: Binary file-like request body
+        chunk_size: Lines per chunk
+        max_line_bytes: Longest accepted line, excluding the newline
+    
+    Yields:
+        Lists of ParsedLine, in input order
+    """
+    chunk = []
+    for parsed in iter_lines(stream, max_line_bytes):
+        chunk.append(parsed)
+        if len(chunk) >= chunk_size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
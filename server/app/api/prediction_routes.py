@@ -0,0 +1,459 @@
+"""
+Prediction Routes - Presentation Layer
+
+Prediction endpoints. They pull in marshmallow, NumPy and the model layer,
+so this module is imported on first use (see app.warmup) and its views
+are registered through LazyView in app.api.
+"""
+import math
+from itertools import product
+
+from flask import Response, current_app, jsonify, request, stream_with_context
+from marshmallow import ValidationError
+
+from app.api.compiled_validator import CompiledValidator
+from app.api.ndjson import iter_chunks
+from app.api.schemas import PredictionRequestSchema, RiskCurveRequestSchema
+from app.api.serialization import dumps, json_response
+from app.models.ml_model import DiabetesModel
+from app.services.prediction_service import PredictionService
+from app.utils.constants import DISCLAIMER_TEXT
+from app.utils.metrics import PREDICT_STAGE_SECONDS
+from app.warmup import warm_up
+
+# Initialize schemas
+prediction_request_schema = PredictionRequestSchema()
+prediction_request_validator = CompiledValidator(prediction_request_schema)
+risk_curve_request_schema = RiskCurveRequestSchema()
+
+# /predict stage timers (the service times the model-side stages)
+PARSE_SECONDS = PREDICT_STAGE_SECONDS.labels(stage="parse")
+VALIDATE_SECONDS = PREDICT_STAGE_SECONDS.labels(stage="validate")
+SERIALIZE_SECONDS = PREDICT_STAGE_SECONDS.labels(stage="serialize")
+
+
+def _wait_for_model():
+    """
+    Wait (up to MODEL_READY_TIMEOUT) for a model that is still loading.
+    
+    Returns:
+        None when the model can serve, otherwise a 503 response
+    """
+    warm_up(current_app._get_current_object())
+    model = DiabetesModel.get_instance()
+    if model.wait_until_ready(current_app.config["MODEL_READY_TIMEOUT"]):
+        return None
+    
+    response = jsonify({
+        "error": "Service Unavailable",
+        "message": "The model is still loading. Please retry shortly."
+    })
+    response.headers["Retry-After"] = "5"
+    return response, 503
+
+
+def _explain_requested():
+    """
+    Read the ?explain=true opt-in for SHAP feature contributions.
+    
+    Returns:
+        Tuple of (whether explanations were requested; a 503 response if
+        the current model cannot provide them, else None)
+    """
+    if request.args.get("explain", "false").lower() != "true":
+        return False, None
+    if DiabetesModel.get_instance().current().explainer is not None:
+        return True, None
+    
+    return True, json_response({
+        "error": "Service Unavailable",
+        "message": "Feature contributions are not available for the loaded model."
+    }, 503)
+
+
+def predict():
+    """
+    Diabetes risk prediction endpoint.
+    
+    Accepts health indicators and returns risk assessment.
+    
+    Request Body:
+        - age: int (years)
+        - weight: float (kg)
+        - height: float (cm)
+        - high_bp: bool
+        - high_chol: bool
+        - smoker: bool
+        - stroke: bool
+        - heart_disease: bool
+        - phys_activity: bool
+        - fruits: bool
+        - veggies: bool
+        - heavy_alcohol: bool
+        - general_health: int (1-5)
+        - mental_health: int (0-30)
+        - physical_health: int (0-30)
+        - difficulty_walking: bool
+        - sex: str ("male" or "female")
+    
+    Query Parameters:
+        - explain: "true" adds feature_contributions and base_probability
+    
+    Returns:
+        JSON with risk level and probability
+    """
+    with PARSE_SECONDS.time():
+        payload = request.json or {}
+    
+    # Validate and load request data in a single pass
+    try:
+        with VALIDATE_SECONDS.time():
+            data = prediction_request_validator.load(payload)
+    except ValidationError as error:
+        return json_response({
+            "error": "Validation failed",
+            "details": error.messages
+        }, 422)
+    
+    not_ready = _wait_for_model()
+    if not_ready is not None:
+        return not_ready
+    explain, unavailable = _explain_requested()
+    if unavailable is not None:
+        return unavailable
+    
+    # Get prediction from service
+    prediction_service = PredictionService()
+    result = prediction_service.predict(data, explain=explain)
+    
+    # Return response (fields already match PredictionResponseSchema)
+    with SERIALIZE_SECONDS.time():
+        return json_response(result)
+
+
+def predict_batch():
+    """
+    Batch diabetes risk prediction endpoint.
+    
+    Scores a whole list of assessments with a single model call.
+    Invalid rows are reported individually and do not fail the batch.
+    
+    Request Body:
+        - assessments: list of objects with the same fields as /predict
+    
+    Query Parameters:
+        - explain: "true" adds feature_contributions and base_probability,
+          computed for all valid rows at once (at most MAX_EXPLAIN_ROWS
+          assessments)
+    
+    Returns:
+        JSON with one entry per assessment, in input order. Each entry has
+        an "index" plus either the prediction fields or "error"/"details".
+    """
+    payload = request.json or {}
+    assessments = payload.get("assessments") if isinstance(payload, dict) else None
+    
+    if not isinstance(assessments, list):
+        return json_response({
+            "error": "Validation failed",
+            "details": {"assessments": ["Must be a list of assessments."]}
+        }, 422)
+    
+    max_batch_size = current_app.config["MAX_BATCH_SIZE"]
+    if len(assessments) > max_batch_size:
+        return json_response({
+            "error": "Validation failed",
+            "details": {
+                "assessments": [f"Must contain at most {max_batch_size} assessments."]
+            }
+        }, 422)
+    
+    # Explanations cost far more per row than predictions, so cap them separately
+    max_explain_rows = current_app.config["MAX_EXPLAIN_ROWS"]
+    if request.args.get("explain", "false").lower() == "true" and len(assessments) > max_explain_rows:
+        return json_response({
+            "error": "Validation failed",
+            "details": {
+                "assessments": [
+                    f"Must contain at most {max_explain_rows} assessments when explain=true."
+                ]
+            }
+        }, 422)
+    
+    # Validate each row independently so one bad row doesn't reject the batch
+    results = [None] * len(assessments)
+    valid_indices = []
+    valid_rows = []
+    for index, assessment in enumerate(assessments):
+        try:
+            valid_rows.append(prediction_request_validator.load(assessment))
+            valid_indices.append(index)
+        except ValidationError as error:
+            results[index] = {
+                "index": index,
+                "error": "Validation failed",
+                "details": error.messages
+            }
+    
+    not_ready = _wait_for_model()
+    if not_ready is not None:
+        return not_ready
+    explain, unavailable = _explain_requested()
+    if unavailable is not None:
+        return unavailable
+    
+    # Score all valid rows at once
+    prediction_service = PredictionService()
+    predictions, model_version = prediction_service.predict_batch(
+        valid_rows, explain=explain
+    )
+    for index, prediction in zip(valid_indices, predictions, strict=True):
+        results[index] = {"index": index, **prediction}
+    
+    return json_response({
+        "results": results,
+        "total": len(assessments),
+        "succeeded": len(valid_rows),
+        "failed": len(assessments) - len(valid_rows),
+        "model_version": model_version,
+        "disclaimer": DISCLAIMER_TEXT
+    })
+
+
+def predict_scenarios():
+    """
+    What-if scenario endpoint.
+    
+    Scores a baseline assessment and variations of it ("lose 10 kg", "quit
+    smoking") with a single model call and reports each variation's
+    change in probability. Variations are listed explicitly, expanded
+    from a grid of override axes, or both; invalid variations are
+    reported individually and do not fail the request.
+    
+    Request Body:
+        - assessment: object with the same fields as /predict
+        - scenarios: list of partial objects overriding assessment fields
+        - axes: object mapping fields to lists of values; every
+          combination becomes one more scenario (listed after scenarios,
+          last axis varying fastest)
+    
+    Returns:
+        JSON with the "baseline" result and one "scenarios" entry per
+        scenario, in order. Each entry has an "index", its "overrides" and
+        either the prediction fields plus "delta" (probability minus the
+        baseline's) or "error"/"details".
+    """
+    payload = request.json or {}
+    if not isinstance(payload, dict):
+        payload = {}
+    assessment = payload.get("assessment")
+    scenarios = payload.get("scenarios", [])
+    axes = payload.get("axes", {})
+    
+    errors = {}
+    if not isinstance(assessment, dict):
+        errors["assessment"] = ["Must be an assessment object."]
+    if not isinstance(scenarios, list) or not all(
+        isinstance(scenario, dict) for scenario in scenarios
+    ):
+        errors["scenarios"] = ["Must be a list of override objects."]
+    if not isinstance(axes, dict) or not all(
+        isinstance(values, list) and values for values in axes.values()
+    ):
+        errors["axes"] = ["Must map fields to non-empty lists of values."]
+    if errors:
+        return json_response({"error": "Validation failed", "details": errors}, 422)
+    
+    # Count the grid before expanding it
+    n_scenarios = len(scenarios) + (
+        math.prod(len(values) for values in axes.values()) if axes else 0
+    )
+    max_scenarios = current_app.config["MAX_SCENARIOS"]
+    if not 0 < n_scenarios <= max_scenarios:
+        return json_response({
+            "error": "Validation failed",
+            "details": {
+                "scenarios": [f"Must define between 1 and {max_scenarios} scenarios."]
+            }
+        }, 422)
+    
+    try:
+        baseline = prediction_request_validator.load(assessment)
+    except ValidationError as error:
+        return json_response({
+            "error": "Validation failed",
+            "details": {"assessment": error.messages}
+        }, 422)
+    
+    overrides = list(scenarios)
+    if axes:
+        overrides += [
+            dict(zip(axes, values, strict=True)) for values in product(*axes.values())
+        ]
+    
+    # Validate each scenario as a full assessment
+    results = [None] * n_scenarios
+    valid_indices = []
+    valid_rows = []
+    for index, override in enumerate(overrides):
+        try:
+            valid_rows.append(prediction_request_validator.load({**assessment, **override}))
+            valid_indices.append(index)
+        except ValidationError as error:
+            results[index] = {
+                "index": index,
+                "overrides": override,
+                "error": "Validation failed",
+                "details": error.messages
+            }
+    
+    not_ready = _wait_for_model()
+    if not_ready is not None:
+        return not_ready
+    
+    # Score the baseline and every valid scenario at once
+    prediction_service = PredictionService()
+    baseline_result, predictions, model_version = prediction_service.predict_scenarios(
+        baseline, valid_rows
+    )
+    for index, prediction in zip(valid_indices, predictions, strict=True):
+        results[index] = {"index": index, "overrides": overrides[index], **prediction}
+    
+    return json_response({
+        "baseline": baseline_result,
+        "scenarios": results,
+        "total": n_scenarios,
+        "succeeded": len(valid_rows),
+        "failed": n_scenarios - len(valid_rows),
+        "model_version": model_version,
+        "disclaimer": DISCLAIMER_TEXT
+    })
+
+
+def predict_risk_curve():
+    """
+    Risk curve endpoint.
+    
+    Returns the probability of diabetes as a function of BMI or weight for
+    one profile, as the exact points where the probability changes. Curves
+    come from a per-profile cache, so rendering the same chart again costs
+    no model call.
+    
+    Request Body:
+        - assessment: object with the same fields as /predict
+        - axis: "bmi" (default) or "weight"
+        - min, max: range of the axis (default: BMI 15 to 45)
+        - points: grid points to sample for mock predictions
+          (default RISK_CURVE_POINTS)
+    
+    Returns:
+        JSON with the "current" point, the "curve" points (each with bmi,
+        weight and probability) and points_evaluated
+    """
+    try:
+        options = risk_curve_request_schema.load(request.json or {})
+        data = prediction_request_validator.load(options["assessment"])
+    except ValidationError as error:
+        return json_response({
+            "error": "Validation failed",
+            "details": error.messages
+        }, 422)
+    
+    config = current_app.config
+    n_points = options.get("points", config["RISK_CURVE_POINTS"])
+    if n_points > config["RISK_CURVE_MAX_POINTS"]:
+        return json_response({
+            "error": "Validation failed",
+            "details": {
+                "points": [f"Must be at most {config['RISK_CURVE_MAX_POINTS']}."]
+            }
+        }, 422)
+    
+    # Check the range with defaults filled in, so a lone min or max is covered
+    prediction_service = PredictionService()
+    low, high = prediction_service.risk_curve_range(
+        options["axis"], data["height"], options.get("min"), options.get("max")
+    )
+    if low >= high:
+        field = "max" if "max" in options else "min"
+        return json_response({
+            "error": "Validation failed",
+            "details": {field: [f"Range must increase, got {low:g} to {high:g}."]}
+        }, 422)
+    
+    not_ready = _wait_for_model()
+    if not_ready is not None:
+        return not_ready
+    
+    return json_response(prediction_service.risk_curve(
+        data, options["axis"], low, high, n_points
+    ))
+
+
+def predict_stream():
+    """
+    Streaming bulk prediction endpoint.
+    
+    Reads newline-delimited JSON assessments from the (optionally chunked)
+    request body and streams newline-delimited results back as each chunk
+    of STREAM_CHUNK_SIZE lines is scored with a single model call. Memory
+    use does not grow with the size of the upload.
+    
+    Request Body:
+        - One JSON object per line with the same fields as /predict
+    
+    Returns:
+        NDJSON with one object per non-empty input line, in input order.
+        Each has a 1-based "line" plus either the prediction fields or
+        "error" (and "details" for validation errors). A final line holds
+        a "summary" with counts, model_version and the disclaimer.
+    """
+    not_ready = _wait_for_model()
+    if not_ready is not None:
+        return not_ready
+    
+    config = current_app.config
+    chunks = iter_chunks(
+        request.stream, config["STREAM_CHUNK_SIZE"], config["STREAM_MAX_LINE_BYTES"]
+    )
+    prediction_service = PredictionService()
+    # One pinned version scores the whole stream, even across a hot reload
+    model = prediction_service.model.current()
+    
+    def generate():
+        succeeded = failed = 0
+        for chunk in chunks:
+            output = [None] * len(chunk)
+            valid_positions = []
+            valid_rows = []
+            for position, parsed in enumerate(chunk):
+                if parsed.error is not None:
+                    output[position] = {"line": parsed.number, "error": parsed.error}
+                    continue
+                try:
+                    valid_rows.append(prediction_request_validator.load(parsed.value))
+                    valid_positions.append(position)
+                except ValidationError as error:
+                    output[position] = {
+                        "line": parsed.number,
+                        "error": "Validation failed",
+                        "details": error.messages
+                    }
+            
+            predictions, _ = prediction_service.predict_batch(valid_rows, model)
+            for position, prediction in zip(valid_positions, predictions, strict=True):
+                output[position] = {"line": chunk[position].number, **prediction}
+            
+            succeeded += len(valid_rows)
+            failed += len(chunk) - len(valid_rows)
+            yield b"".join(dumps(row) + b"\n" for row in output)
+        
+        yield dumps({"summary": {
+            "total": succeeded + failed,
+            "succeeded": succeeded,
+            "failed": failed,
+            "model_version": model.version,
+            "disclaimer": DISCLAIMER_TEXT
+        }}) + b"\n"
+    
+    return Response(stream_with_context(generate()), mimetype="application/x-ndjson")
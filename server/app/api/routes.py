@@ -1,17 +1,17 @@
 """
 API Routes - Presentation Layer
 
-Defines HTTP endpoints for the diabetes risk prediction API.
+Defines HTTP endpoints for the diabetes risk prediction API. The
+prediction endpoints live in prediction_routes, which is imported on
+first use; this module only imports what every process needs.
 """
-from flask import jsonify, request
+import hmac
 
-from app.api import api_bp
-from app.api.schemas import PredictionRequestSchema, PredictionResponseSchema
-from app.services.prediction_service import PredictionService
+from flask import Response, abort, current_app, jsonify, request, send_file
 
-# Initialize schemas
-prediction_request_schema = PredictionRequestSchema()
-prediction_response_schema = PredictionResponseSchema()
+from app.api import api_bp
+from app.utils import metrics, profiling
+from app.warmup import warm_up
 
 
 @api_bp.route("/health", methods=["GET"])
@@ -23,49 +23,105 @@ def health_check():
     })
 
 
-@api_bp.route("/predict", methods=["POST"])
-def predict():
+@api_bp.route("/ready", methods=["GET"])
+def readiness_check():
+    """
+    Readiness endpoint.
+    
+    Reports whether the model is loading, warming, ready or failed, and
+    the seconds spent in each startup phase. Returns 503 until ready.
+    """
+    warm_up(current_app._get_current_object())
+    from app.models.ml_model import DiabetesModel
+    
+    readiness = DiabetesModel.get_instance().readiness()
+    status_code = 200 if readiness["status"] == "ready" else 503
+    return jsonify(readiness), status_code
+
+
+@api_bp.route("/metrics", methods=["GET"])
+def export_metrics():
+    """
+    Prometheus metrics endpoint.
+    
+    Per-stage /predict latency histograms and counters for predictions by
+    model version, cache hits and errors by handler, summed over every
+    worker sharing METRICS_DIR. Returns 404 when METRICS_ENABLED is false.
     """
-    Diabetes risk prediction endpoint.
-    
-    Accepts health indicators and returns risk assessment.
-    
-    Request Body:
-        - age: int (years)
-        - weight: float (kg)
-        - height: float (cm)
-        - high_bp: bool
-        - high_chol: bool
-        - smoker: bool
-        - stroke: bool
-        - heart_disease: bool
-        - phys_activity: bool
-        - fruits: bool
-        - veggies: bool
-        - heavy_alcohol: bool
-        - general_health: int (1-5)
-        - mental_health: int (0-30)
-        - physical_health: int (0-30)
-        - difficulty_walking: bool
-        - sex: str ("male" or "female")
+    if not current_app.config["METRICS_ENABLED"]:
+        abort(404)
+    return Response(metrics.render(), content_type=metrics.CONTENT_TYPE)
+
+
+@api_bp.route("/admin/reload", methods=["POST"])
+def admin_reload():
+    """
+    Reload the model artifact and swap it in if it changed.
+    
+    Requires the ADMIN_TOKEN in the X-Admin-Token header; the endpoint
+    does not exist when no token is configured. Only the worker handling
+    the request reloads; set MODEL_RELOAD_INTERVAL so every worker picks
+    up new artifacts on its own.
+    
+    Query Parameters:
+        - force: "true" to swap even if the artifact content is unchanged
     
     Returns:
-        JSON with risk level and probability
+        JSON with whether a new version was swapped in and the served version
     """
-    # Validate request data
-    errors = prediction_request_schema.validate(request.json or {})
-    if errors:
+    admin_token = current_app.config.get("ADMIN_TOKEN", "")
+    if not admin_token:
+        abort(404)
+    
+    provided = request.headers.get("X-Admin-Token", "")
+    if not hmac.compare_digest(provided.encode(), admin_token.encode()):
         return jsonify({
-            "error": "Validation failed",
-            "details": errors
-        }), 422
+            "error": "Unauthorized",
+            "message": "A valid X-Admin-Token header is required"
+        }), 401
+    
+    force = request.args.get("force", "false").lower() == "true"
+    warm_up(current_app._get_current_object())
+    from app.models.ml_model import DiabetesModel
+    
+    model = DiabetesModel.get_instance()
+    reloaded = model.reload(force=force)
+    
+    return jsonify({"reloaded": reloaded, **model.describe()})
+
+
+@api_bp.route(profiling.PROFILES_PATH_PREFIX + "<profile_id>", methods=["GET"])
+def get_profile(profile_id):
+    """
+    Fetch a saved request profile.
+    
+    Requires the PROFILING_TOKEN in the X-Profile-Token header; the
+    endpoint does not exist when no token is configured. Profiles are
+    saved to PROFILE_DIR, so any worker can serve them.
     
-    # Load validated data
-    data = prediction_request_schema.load(request.json)
+    Query Parameters:
+        - format: "text" (default) for the report of top functions by
+          cumulative time, or "pstats" to download the raw profile
+    
+    Returns:
+        The profile, or 404 if the ID is unknown
+    """
+    profiling_token = current_app.config.get("PROFILING_TOKEN", "")
+    if not profiling_token:
+        abort(404)
+    
+    provided = request.headers.get(profiling.PROFILE_HEADER, "")
+    if not hmac.compare_digest(provided.encode(), profiling_token.encode()):
+        return jsonify({
+            "error": "Unauthorized",
+            "message": "A valid X-Profile-Token header is required"
+        }), 401
     
-    # Get prediction from service
-    prediction_service = PredictionService()
-    result = prediction_service.predict(data)
+    raw = request.args.get("format", "text") == "pstats"
+    path = profiling.profile_path(current_app.config["PROFILE_DIR"], profile_id, raw)
+    if path is None:
+        abort(404)
     
-    # Return response
-    return jsonify(prediction_response_schema.dump(result))
+    if raw:
+        return send_file(path, mimetype="application/octet-stream", as_attachment=True)
+    return Response(path.read_text(), mimetype="text/plain")
@@ -100,6 +100,32 @@ class PredictionRequestSchema(Schema):
         return data
 
 
+class RiskCurveRequestSchema(Schema):
+    """Schema for risk curve options (the assessment is validated separately)."""
+    
+    assessment = fields.Dict(
+        required=True,
+        metadata={"description": "Assessment with the same fields as /predict"}
+    )
+    axis = fields.String(
+        load_default="bmi",
+        validate=validate.OneOf(["bmi", "weight"]),
+        metadata={"description": "Quantity the curve varies: bmi or weight (kg)"}
+    )
+    min = fields.Float(
+        validate=validate.Range(min=1, max=500),
+        metadata={"description": "Start of the range (default from RISK_CURVE_BMI_RANGE)"}
+    )
+    max = fields.Float(
+        validate=validate.Range(min=1, max=500),
+        metadata={"description": "End of the range (default from RISK_CURVE_BMI_RANGE)"}
+    )
+    points = fields.Integer(
+        validate=validate.Range(min=2),
+        metadata={"description": "Grid points sampled over the range (mock predictions)"}
+    )
+
+
 class PredictionResponseSchema(Schema):
     """Schema for diabetes prediction response."""
     
@@ -119,6 +145,17 @@ class PredictionResponseSchema(Schema):
         fields.String(),
         metadata={"description": "Key factors contributing to risk assessment"}
     )
+    feature_contributions = fields.Dict(
+        keys=fields.String(),
+        values=fields.Float(),
+        metadata={"description": "SHAP contribution of each model feature (explain=true only)"}
+    )
+    base_probability = fields.Float(
+        metadata={"description": "Probability that the contributions add up from (explain=true only)"}
+    )
+    model_version = fields.String(
+        metadata={"description": "Version of the model that scored the request"}
+    )
     disclaimer = fields.String(
         metadata={"description": "Medical disclaimer"}
     )
@@ -0,0 +1,131 @@
+"""
+Serialization - Fast JSON Responses
+
+Encodes API responses with orjson when it is installed (stdlib json
+otherwise) and splices in pre-encoded fragments for constant values such
+as the medical disclaimer, instead of going through marshmallow dumping
+and jsonify on every request.
+"""
+import json
+from typing import Any
+
+from flask import Response, current_app
+
+from app.utils.constants import DISCLAIMER_TEXT
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - exercised when orjson is absent
+    orjson = None
+
+
+def dumps(obj: Any) -> bytes:
+    """
+    Encode an object as compact JSON.
+    
+    Args:
+        obj: JSON-serializable object
+    
+    Returns:
+        UTF-8 encoded JSON
+    
+    Raises:
+        TypeError: If the object contains a type the encoder can't handle
+    """
+    if orjson is not None:
+        return orjson.dumps(
+            obj, option=orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY
+        )
+    return json.dumps(obj, separators=(",", ":")).encode()
+
+
+def loads(data: bytes | str) -> Any:
+    """
+    Decode JSON with the same encoder preference as dumps.
+    
+    Args:
+        data: JSON text
+    
+    Returns:
+        Decoded object
+    
+    Raises:
+        ValueError: If the text is not valid JSON (or not valid UTF-8)
+    """
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+# Constant values encoded once at import, keyed by the response field
+# they appear in; a response spliced with a fragment only pays for a
+# bytes concatenation instead of re-escaping the text
+CONSTANT_FRAGMENTS: dict[str, tuple[Any, bytes]] = {
+    "disclaimer": (DISCLAIMER_TEXT, dumps("disclaimer") + b":" + dumps(DISCLAIMER_TEXT)),
+}
+
+
+def encode_payload(payload: dict[str, Any]) -> bytes:
+    """
+    Encode a response object, splicing in pre-encoded constant fields.
+    
+    Fields whose value is exactly a registered constant are moved to the
+    end of the object; key order is not significant in JSON.
+    
+    Args:
+        payload: Response object
+    
+    Returns:
+        UTF-8 encoded JSON object
+    """
+    fragments = [
+        fragment
+        for key, (value, fragment) in CONSTANT_FRAGMENTS.items()
+        if payload.get(key) is value
+    ]
+    if not fragments:
+        return dumps(payload)
+    
+    remaining = {
+        key: value
+        for key, value in payload.items()
+        if key not in CONSTANT_FRAGMENTS or CONSTANT_FRAGMENTS[key][0] is not value
+    }
+    body = dumps(remaining)
+    separator = b"," if remaining else b""
+    return body[:-1] + separator + b",".join(fragments) + b"}"
+
+
+def json_response(payload: dict[str, Any], status: int = 200) -> Response:
+    """
+    Build a JSON response on the fast path.
+    
+    Falls back to the app's JSON provider (as jsonify uses) for values the
+    fast encoder does not support.
+    
+    Args:
+        payload: Response object
+        status: HTTP status code
+    
+    Returns:
+        Flask response with an application/json body
+    """
+    try:
+        body = encode_payload(payload) + b"\n"
+    except TypeError:
+        body = current_app.json.dumps(payload) + "\n"
+    return current_app.response_class(body, status=status, mimetype="application/json")
+
+
+def static_response(body: bytes, status: int) -> Response:
+    """
+    Build a response from a body encoded once at import time.
+    
+    Args:
+        body: Pre-encoded JSON (from dumps)
+        status: HTTP status code
+    
+    Returns:
+        Flask response with an application/json body
+    """
+    return current_app.response_class(body + b"\n", status=status, mimetype="application/json")
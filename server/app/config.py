@@ -4,6 +4,7 @@ Configuration module for the Flask application.
 Supports environment-based configuration via .env file.
 """
 import os
+import tempfile
 from pathlib import Path
 
 
@@ -24,8 +25,101 @@ class Config:
         str(ARTIFACTS_DIR / "model.pkl")
     )
     
-    # API settings
+    # Compiled forest exported by scripts/export_forest.py
+    FOREST_PATH = os.environ.get(
+        "FOREST_PATH",
+        str(ARTIFACTS_DIR / "model_forest")
+    )
+    
+    # Single-file forest with narrow dtypes, from scripts/export_compact_model.py
+    COMPACT_MODEL_PATH = os.environ.get(
+        "COMPACT_MODEL_PATH",
+        str(ARTIFACTS_DIR / "model.compact")
+    )
+    
+    # How the model is loaded: "pickle" (joblib.load of MODEL_PATH),
+    # "mmap" (memory-map FOREST_PATH so all workers share one copy) or
+    # "compact" (memory-map COMPACT_MODEL_PATH; never imports scikit-learn)
+    MODEL_LOAD_MODE = os.environ.get("MODEL_LOAD_MODE", "pickle")
+    
+    # Inference engine: "sklearn" (estimator's own predict_proba) or
+    # "compiled" (array-backed forest evaluator, faster for small batches)
+    MODEL_ENGINE = os.environ.get("MODEL_ENGINE", "sklearn")
+    
+    # Load and warm the model on a background thread so the app can bind
+    # immediately; /ready reports progress
+    MODEL_BACKGROUND_LOAD = os.environ.get("MODEL_BACKGROUND_LOAD", "False").lower() == "true"
+    
+    # Skip warm-up in create_app: NumPy, marshmallow, the prediction routes
+    # and the model are imported and loaded by the first request needing
+    # them (cold starts that mostly serve /health bind fastest)
+    MODEL_LAZY_LOAD = os.environ.get("MODEL_LAZY_LOAD", "False").lower() == "true"
+    
+    # Seconds a prediction request waits for a loading model before 503
+    MODEL_READY_TIMEOUT = float(os.environ.get("MODEL_READY_TIMEOUT", "30"))
+    
+    # Seconds between checks of the model artifact for a new version
+    # (0 disables the watcher; POST /admin/reload still works)
+    MODEL_RELOAD_INTERVAL = float(os.environ.get("MODEL_RELOAD_INTERVAL", "0"))
+    
+    # Token required by admin endpoints (empty disables them)
+    ADMIN_TOKEN = os.environ.get("ADMIN_TOKEN", "")
+    
+    # Exact-input LRU cache of predictions (entries; 0 disables)
+    PREDICTION_CACHE_SIZE = int(os.environ.get("PREDICTION_CACHE_SIZE", "4096"))
+    
+    # Per-profile BMI step-function cache (profiles; 0 disables)
+    BMI_CURVE_CACHE_SIZE = int(os.environ.get("BMI_CURVE_CACHE_SIZE", "1024"))
+    
+    # Precompute TreeSHAP paths at model load so predictions can include
+    # feature_contributions (?explain=true); about 1.25 s and 57 MB per load
+    # for the full forest, so off by default. Needs node covers, so older
+    # exported forests must be re-exported
+    EXPLANATIONS_ENABLED = os.environ.get("EXPLANATIONS_ENABLED", "False").lower() == "true"
+    
+    # Micro-batching of concurrent single-row predictions; with the BMI curve
+    # cache on, the step-function builds of cache misses are batched instead
+    MICRO_BATCH_ENABLED = os.environ.get("MICRO_BATCH_ENABLED", "False").lower() == "true"
+    MICRO_BATCH_WINDOW_MS = float(os.environ.get("MICRO_BATCH_WINDOW_MS", "2"))
+    MICRO_BATCH_MAX_ROWS = int(os.environ.get("MICRO_BATCH_MAX_ROWS", "64"))
+    
+    # API settings; keys keep insertion order (create_app applies this to
+    # app.json.sort_keys, since Flask 3 no longer reads JSON_SORT_KEYS)
     JSON_SORT_KEYS = False
+    
+    # Maximum number of assessments accepted by /predict/batch
+    MAX_BATCH_SIZE = int(os.environ.get("MAX_BATCH_SIZE", "10000"))
+    
+    # Maximum assessments per /predict/batch request with ?explain=true
+    # (TreeSHAP takes about 88 ms per row on the full forest, linear in rows)
+    MAX_EXPLAIN_ROWS = int(os.environ.get("MAX_EXPLAIN_ROWS", "50"))
+    
+    # Maximum scenarios (explicit plus Cartesian grid) per /predict/scenarios
+    MAX_SCENARIOS = int(os.environ.get("MAX_SCENARIOS", "1000"))
+    
+    # /predict/risk-curve with mock predictions: grid points sampled by
+    # default, and at most (trained models use exact step-function points)
+    RISK_CURVE_POINTS = int(os.environ.get("RISK_CURVE_POINTS", "301"))
+    RISK_CURVE_MAX_POINTS = int(os.environ.get("RISK_CURVE_MAX_POINTS", "5000"))
+    
+    # /predict/stream: lines scored per model call, and longest accepted line
+    STREAM_CHUNK_SIZE = int(os.environ.get("STREAM_CHUNK_SIZE", "1000"))
+    STREAM_MAX_LINE_BYTES = int(os.environ.get("STREAM_MAX_LINE_BYTES", "65536"))
+    
+    # Prometheus metrics on /metrics; METRICS_DIR shares them across
+    # gunicorn workers (empty keeps them per process)
+    METRICS_ENABLED = os.environ.get("METRICS_ENABLED", "True").lower() == "true"
+    METRICS_DIR = os.environ.get("METRICS_DIR", "")
+    
+    # Per-request profiling: requests with this X-Profile-Token run under
+    # cProfile (empty disables); profiles are kept in PROFILE_DIR
+    PROFILING_TOKEN = os.environ.get("PROFILING_TOKEN", "")
+    PROFILE_DIR = os.environ.get(
+        "PROFILE_DIR",
+        str(Path(tempfile.gettempdir()) / "glucosense-profiles")
+    )
+    PROFILE_TOP_N = int(os.environ.get("PROFILE_TOP_N", "40"))
+    PROFILE_KEEP = int(os.environ.get("PROFILE_KEEP", "50"))
 
 
 class DevelopmentConfig(Config):
@@ -42,6 +136,9 @@ class TestingConfig(Config):
     """Testing configuration."""
     TESTING = True
     DEBUG = True
+    
+    # Tests reload the model often; explanation tests enable this themselves
+    EXPLANATIONS_ENABLED = False
 
 
 # Configuration mapping
@@ -3,6 +3,7 @@ Models Layer - Data Access
 
 Exports model classes for ML inference.
 """
+from app.models.compiled_forest import CompiledForest
 from app.models.ml_model import DiabetesModel
 
-__all__ = ["DiabetesModel"]
+__all__ = ["CompiledForest", "DiabetesModel"]
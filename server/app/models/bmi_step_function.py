@@ -0,0 +1,169 @@
+"""
+BMI Step Function - Piecewise-constant Forest Output
+
+For a fixed set of discrete inputs, the forest's probability only changes
+where BMI crosses a split threshold. This module builds that step function
+once per profile so any BMI can be answered by binary search.
+"""
+from collections.abc import Callable
+
+import numpy as np
+
+from app.models.compiled_forest import CompiledForest, float32_floor
+from app.utils.constants import BMI_FEATURE_INDEX
+
+
+def forest_split_thresholds(model, feature_index: int) -> np.ndarray:
+    """
+    Collect every threshold the forest uses to split on one feature.
+    
+    Args:
+        model: Fitted RandomForestClassifier or CompiledForest
+        feature_index: Column index of the feature
+    
+    Returns:
+        Sorted array of unique thresholds
+    """
+    if isinstance(model, CompiledForest):
+        is_split = model.left != np.arange(model.n_nodes)
+        mask = is_split & (model.feature == feature_index)
+        return np.unique(model.threshold[mask])
+    
+    thresholds = [
+        estimator.tree_.threshold[estimator.tree_.feature == feature_index]
+        for estimator in model.estimators_
+    ]
+    return np.unique(np.concatenate(thresholds)) if thresholds else np.empty(0)
+
+
+def float32_breakpoints(thresholds: np.ndarray) -> np.ndarray:
+    """
+    Convert split thresholds into float32 interval bounds.
+    
+    Trees compare float32 inputs against float64 thresholds. For a float32
+    x, `x <= t` holds exactly when x is at most the largest float32 not
+    above t, so bounds computed that way reproduce every split decision.
+    
+    Args:
+        thresholds: Split thresholds (float64)
+    
+    Returns:
+        Sorted unique float32 upper bounds, one per distinct interval
+    """
+    return np.unique(float32_floor(thresholds))
+
+
+class BMIStepFunction:
+    """
+    Probability as a step function of BMI for one discrete profile.
+    
+    Interval i covers (breakpoints[i - 1], breakpoints[i]] and has
+    probability values[i]; the last value applies above the last
+    breakpoint. Adjacent intervals with equal values are merged.
+    """
+    
+    def __init__(self, breakpoints: np.ndarray, values: np.ndarray):
+        """
+        Initialize from interval bounds and values.
+        
+        Args:
+            breakpoints: Sorted float32 upper bounds of each interval but the last
+            values: Probability per interval (len(breakpoints) + 1 values)
+        """
+        self.breakpoints = breakpoints
+        self.values = values
+    
+    @classmethod
+    def build(
+        cls,
+        profile: np.ndarray,
+        breakpoints: np.ndarray,
+        predict_matrix: Callable[[np.ndarray], np.ndarray]
+    ) -> "BMIStepFunction":
+        """
+        Evaluate the forest once per BMI interval for a profile.
+        
+        Args:
+            profile: Feature vector of shape (1, n_features); BMI is ignored
+            breakpoints: Interval bounds from float32_breakpoints
+            predict_matrix: Function scoring a feature matrix to probabilities
+        
+        Returns:
+            BMIStepFunction for the profile
+        """
+        if len(breakpoints) == 0:
+            representatives = np.zeros(1, dtype=np.float32)
+        else:
+            above_last = np.nextafter(breakpoints[-1], np.float32(np.inf))
+            representatives = np.append(breakpoints, above_last)
+        
+        grid = np.repeat(np.asarray(profile, dtype=np.float64), len(representatives), axis=0)
+        grid[:, BMI_FEATURE_INDEX] = representatives
+        values = np.asarray(predict_matrix(grid), dtype=np.float64)
+        
+        # Keep only bounds where the probability actually changes
+        changes = np.flatnonzero(values[1:] != values[:-1])
+        return cls(breakpoints[changes], np.append(values[changes], values[-1]))
+    
+    def __call__(self, bmi: float) -> float:
+        """
+        Look up the probability for a BMI.
+        
+        Args:
+            bmi: Body Mass Index
+        
+        Returns:
+            Probability of diabetes (0.0 to 1.0)
+        """
+        index = np.searchsorted(self.breakpoints, np.float32(bmi), side="left")
+        return float(self.values[index])
+    
+    def evaluate(self, bmis: np.ndarray) -> np.ndarray:
+        """
+        Look up the probabilities for many BMIs at once.
+        
+        Args:
+            bmis: Array of Body Mass Index values
+        
+        Returns:
+            Probabilities, same shape as bmis
+        """
+        indices = np.searchsorted(
+            self.breakpoints, np.asarray(bmis, dtype=np.float32), side="left"
+        )
+        return self.values[indices]
+    
+    def changes(self, low: float, high: float) -> tuple[np.ndarray, np.ndarray]:
+        """
+        List the exact points where the probability changes within a range.
+        
+        Each breakpoint's interval ends at the breakpoint, so the next value
+        starts at the first float32 above it. Steps of any width are kept.
+        
+        Args:
+            low: Start of the BMI range
+            high: End of the BMI range
+        
+        Returns:
+            Tuple of (BMIs, probabilities): low, every change strictly
+            inside the range and high, with the probability from each BMI on
+        """
+        starts = np.nextafter(self.breakpoints, np.float32(np.inf)).astype(np.float64)
+        inside = starts[(starts > low) & (starts < high)]
+        bmis = np.concatenate([[low], inside, [high]])
+        return bmis, self.evaluate(bmis)
+    
+    @staticmethod
+    def profile_key(features: np.ndarray) -> bytes:
+        """
+        Build a cache key from every feature except BMI.
+        
+        Args:
+            features: Feature vector of shape (1, n_features)
+        
+        Returns:
+            Bytes key identifying the discrete profile
+        """
+        profile = np.array(features, dtype=np.float64)
+        profile[..., BMI_FEATURE_INDEX] = 0.0
+        return profile.tobytes()
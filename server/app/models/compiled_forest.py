@@ -0,0 +1,455 @@
+"""
+Compiled Forest - Array-backed Inference Engine
+
+Flattens a trained RandomForestClassifier into contiguous NumPy arrays
+and evaluates it without calling into scikit-learn. The arrays can be
+saved as .npy files and memory-mapped read-only, so every worker process
+shares one physical copy through the page cache, or packed into a single
+compact file with narrow dtypes that loads without scikit-learn.
+"""
+import json
+import os
+import shutil
+import struct
+from pathlib import Path
+from typing import Any
+
+import numpy as np
+
+# Marker used by scikit-learn for leaf nodes in tree_.children_left
+_TREE_LEAF = -1
+
+# On-disk layout: one .npy file per node array plus a JSON manifest
+MANIFEST_NAME = "forest.json"
+ARRAY_NAMES = ("feature", "threshold", "left", "right", "value", "roots")
+# Written when present; forests exported before they existed load without them
+OPTIONAL_ARRAY_NAMES = ("cover",)
+FORMAT_NAME = "compiled-forest"
+FORMAT_VERSION = 1
+
+# Compact single-file layout: magic, "<II" (format version, header length),
+# a JSON header, then each array at an aligned offset from the data start
+COMPACT_MAGIC = b"CFOREST\0"
+COMPACT_FORMAT_NAME = "compiled-forest-compact"
+COMPACT_FORMAT_VERSION = 1
+COMPACT_DTYPES = {
+    "feature": np.dtype("<i2"),
+    "threshold": np.dtype("<f4"),
+    "left": np.dtype("<i4"),
+    "right": np.dtype("<i4"),
+    "value": np.dtype("<f4"),
+    "roots": np.dtype("<i4"),
+    "cover": np.dtype("<f4"),
+}
+_COMPACT_PREFIX = struct.Struct("<II")
+_COMPACT_ALIGNMENT = 16
+
+
+def float32_floor(values: np.ndarray) -> np.ndarray:
+    """
+    Round float64 values down to the nearest float32.
+    
+    For a float32 x, `x <= t` holds exactly when x is at most the largest
+    float32 not above t, so thresholds stored this way keep every split
+    decision of the float64 original.
+    
+    Args:
+        values: Float64 values
+    
+    Returns:
+        Float32 array of the same shape
+    """
+    values = np.asarray(values, dtype=np.float64)
+    floors = values.astype(np.float32)
+    rounded_up = floors.astype(np.float64) > values
+    floors[rounded_up] = np.nextafter(floors[rounded_up], np.float32(-np.inf))
+    return floors
+
+
+def _align(offset: int) -> int:
+    """Round an offset up to the compact layout's array alignment."""
+    return -(-offset // _COMPACT_ALIGNMENT) * _COMPACT_ALIGNMENT
+
+
+class CompiledForest:
+    """
+    Random forest flattened into contiguous node arrays.
+    
+    All trees share one set of node arrays; each tree starts at the offset
+    stored in `roots`. Leaves point to themselves as both children, so every
+    row can be walked for exactly `max_depth` steps without branching on
+    whether it has already reached a leaf.
+    
+    Produces the same probabilities as RandomForestClassifier.predict_proba,
+    including its float32 comparison semantics (`x <= threshold` goes left).
+    """
+    
+    def __init__(
+        self,
+        feature: np.ndarray,
+        threshold: np.ndarray,
+        left: np.ndarray,
+        right: np.ndarray,
+        value: np.ndarray,
+        roots: np.ndarray,
+        max_depth: int,
+        n_features: int,
+        metadata: dict[str, Any] | None = None,
+        cover: np.ndarray | None = None
+    ):
+        """
+        Initialize from flattened node arrays.
+        
+        Args:
+            feature: Split feature index per node (0 for leaves)
+            threshold: Split threshold per node
+            left: Global index of the left child per node
+            right: Global index of the right child per node
+            value: Positive-class probability per node (used at leaves)
+            roots: Global index of each tree's root node
+            max_depth: Depth of the deepest tree
+            n_features: Number of input features
+            metadata: Optional training metadata (feature order, metrics, ...)
+            cover: Weighted training samples reaching each node (optional;
+                needed for SHAP explanations)
+        """
+        self.feature = feature
+        self.threshold = threshold
+        self.left = left
+        self.right = right
+        self.value = value
+        self.roots = roots
+        self.max_depth = max_depth
+        self.n_features = n_features
+        self.metadata = metadata or {}
+        self.cover = cover
+    
+    @classmethod
+    def from_estimator(
+        cls,
+        model,
+        metadata: dict[str, Any] | None = None
+    ) -> "CompiledForest":
+        """
+        Flatten a fitted RandomForestClassifier.
+        
+        Args:
+            model: Fitted scikit-learn RandomForestClassifier
+            metadata: Optional training metadata to keep with the arrays
+        
+        Returns:
+            CompiledForest with the same predictions as the estimator
+        """
+        features, thresholds, lefts, rights, values, roots = [], [], [], [], [], []
+        covers = []
+        offset = 0
+        max_depth = 0
+        
+        for estimator in model.estimators_:
+            tree = estimator.tree_
+            n_nodes = tree.node_count
+            node_ids = np.arange(offset, offset + n_nodes)
+            is_leaf = tree.children_left == _TREE_LEAF
+            
+            features.append(np.where(is_leaf, 0, tree.feature))
+            thresholds.append(np.where(is_leaf, 0.0, tree.threshold))
+            lefts.append(np.where(is_leaf, node_ids, tree.children_left + offset))
+            rights.append(np.where(is_leaf, node_ids, tree.children_right + offset))
+            
+            # Normalize per-node class weights into probabilities, as
+            # DecisionTreeClassifier.predict_proba does
+            class_values = tree.value[:, 0, :]
+            normalizer = class_values.sum(axis=1)
+            normalizer[normalizer == 0.0] = 1.0
+            values.append(class_values[:, 1] / normalizer)
+            covers.append(tree.weighted_n_node_samples)
+            
+            roots.append(offset)
+            offset += n_nodes
+            max_depth = max(max_depth, tree.max_depth)
+        
+        return cls(
+            feature=np.ascontiguousarray(np.concatenate(features), dtype=np.intp),
+            threshold=np.ascontiguousarray(np.concatenate(thresholds), dtype=np.float64),
+            left=np.ascontiguousarray(np.concatenate(lefts), dtype=np.intp),
+            right=np.ascontiguousarray(np.concatenate(rights), dtype=np.intp),
+            value=np.ascontiguousarray(np.concatenate(values), dtype=np.float64),
+            roots=np.asarray(roots, dtype=np.intp),
+            max_depth=int(max_depth),
+            n_features=int(model.n_features_in_),
+            metadata=metadata,
+            cover=np.ascontiguousarray(np.concatenate(covers), dtype=np.float64)
+        )
+    
+    def save(self, directory: str | Path) -> None:
+        """
+        Write the forest as .npy arrays plus a JSON manifest.
+        
+        Files are written to a temporary directory first and then moved
+        into place, so readers never see a half-written forest. An existing
+        forest is renamed aside rather than deleted before the move, so it
+        is missing only between two renames, not while it is removed.
+        
+        Args:
+            directory: Target directory (replaced if it exists)
+        """
+        directory = Path(directory)
+        staging = directory.with_name(directory.name + ".tmp")
+        previous = directory.with_name(directory.name + ".old")
+        shutil.rmtree(staging, ignore_errors=True)
+        shutil.rmtree(previous, ignore_errors=True)
+        staging.mkdir(parents=True)
+        
+        for name in self._array_names():
+            np.save(staging / f"{name}.npy", np.ascontiguousarray(getattr(self, name)))
+        
+        manifest = {
+            "format": FORMAT_NAME,
+            "format_version": FORMAT_VERSION,
+            "n_trees": self.n_trees,
+            "n_nodes": self.n_nodes,
+            "max_depth": self.max_depth,
+            "n_features": self.n_features,
+            "metadata": self.metadata,
+        }
+        # Manifest last: its presence marks a complete forest
+        with open(staging / MANIFEST_NAME, "w") as f:
+            json.dump(manifest, f, indent=2)
+        
+        # Readers that already mapped the old arrays keep them after the delete
+        if directory.exists():
+            os.replace(directory, previous)
+        os.replace(staging, directory)
+        shutil.rmtree(previous, ignore_errors=True)
+    
+    @classmethod
+    def load(cls, directory: str | Path, mmap: bool = True) -> "CompiledForest":
+        """
+        Load a forest written by save().
+        
+        Args:
+            directory: Directory containing the manifest and .npy arrays
+            mmap: Memory-map the arrays read-only instead of reading them
+        
+        Returns:
+            CompiledForest backed by the files on disk
+        
+        Raises:
+            FileNotFoundError: If the manifest or an array is missing
+            ValueError: If the manifest has an unsupported format
+        """
+        directory = Path(directory)
+        with open(directory / MANIFEST_NAME) as f:
+            manifest = json.load(f)
+        
+        if manifest.get("format") != FORMAT_NAME or (
+            manifest.get("format_version") != FORMAT_VERSION
+        ):
+            raise ValueError(
+                f"Unsupported forest format: {manifest.get('format')} "
+                f"v{manifest.get('format_version')}"
+            )
+        
+        mmap_mode = "r" if mmap else None
+        # np.asarray drops the np.memmap subclass (and its per-operation
+        # overhead) while still pointing at the mapped pages
+        arrays = {
+            name: np.asarray(np.load(directory / f"{name}.npy", mmap_mode=mmap_mode))
+            for name in ARRAY_NAMES + OPTIONAL_ARRAY_NAMES
+            if name in ARRAY_NAMES or (directory / f"{name}.npy").exists()
+        }
+        return cls(
+            **arrays,
+            max_depth=manifest["max_depth"],
+            n_features=manifest["n_features"],
+            metadata=manifest.get("metadata")
+        )
+    
+    def save_compact(self, path: str | Path) -> None:
+        """
+        Write the forest as one compact file with narrow dtypes.
+        
+        Thresholds are rounded down to float32 (see float32_floor), so
+        predictions keep the same split decisions; leaf probabilities are
+        stored as float32. The file is written next to the target and then
+        moved into place, so readers never see a half-written artifact.
+        
+        Args:
+            path: Target file (replaced if it exists)
+        
+        Raises:
+            ValueError: If the forest is too large for the compact dtypes
+        """
+        if self.n_features > np.iinfo(np.int16).max or (
+            self.n_nodes > np.iinfo(np.int32).max
+        ):
+            raise ValueError(
+                f"Forest with {self.n_features} features and {self.n_nodes} "
+                "nodes does not fit the compact format"
+            )
+        
+        arrays = {
+            name: np.ascontiguousarray(
+                float32_floor(self.threshold) if name == "threshold" else getattr(self, name),
+                dtype=dtype,
+            )
+            for name, dtype in COMPACT_DTYPES.items()
+            if name in self._array_names()
+        }
+        layout, offset = {}, 0
+        for name, array in arrays.items():
+            layout[name] = {"dtype": array.dtype.str, "offset": offset, "count": array.size}
+            offset = _align(offset + array.nbytes)
+        
+        header = json.dumps({
+            "format": COMPACT_FORMAT_NAME,
+            "n_trees": self.n_trees,
+            "n_nodes": self.n_nodes,
+            "max_depth": self.max_depth,
+            "n_features": self.n_features,
+            "feature_order": list(self.metadata.get("feature_order", [])),
+            "metadata": self.metadata,
+            "arrays": layout,
+        }, separators=(",", ":")).encode()
+        # Pad with spaces so the arrays start on an aligned offset
+        data_start = _align(len(COMPACT_MAGIC) + _COMPACT_PREFIX.size + len(header))
+        header = header.ljust(data_start - len(COMPACT_MAGIC) - _COMPACT_PREFIX.size)
+        
+        path = Path(path)
+        staging = path.with_name(path.name + ".tmp")
+        with open(staging, "wb") as f:
+            f.write(COMPACT_MAGIC)
+            f.write(_COMPACT_PREFIX.pack(COMPACT_FORMAT_VERSION, len(header)))
+            f.write(header)
+            for name, array in arrays.items():
+                f.seek(data_start + layout[name]["offset"])
+                f.write(array.tobytes())
+        os.replace(staging, path)
+    
+    @classmethod
+    def load_compact(cls, path: str | Path, mmap: bool = True) -> "CompiledForest":
+        """
+        Load a forest written by save_compact().
+        
+        Only NumPy is needed, so a server loading this file never imports
+        scikit-learn or joblib.
+        
+        Args:
+            path: Compact forest file
+            mmap: Memory-map the file read-only instead of reading it
+        
+        Returns:
+            CompiledForest backed by the file's arrays
+        
+        Raises:
+            FileNotFoundError: If the file does not exist
+            ValueError: If the file is not a supported compact forest
+        """
+        raw = (
+            np.memmap(path, dtype=np.uint8, mode="r") if mmap
+            else np.fromfile(path, dtype=np.uint8)
+        )
+        prefix_end = len(COMPACT_MAGIC) + _COMPACT_PREFIX.size
+        if raw[:len(COMPACT_MAGIC)].tobytes() != COMPACT_MAGIC:
+            raise ValueError(f"{path} is not a compact forest file")
+        
+        version, header_length = _COMPACT_PREFIX.unpack(
+            raw[len(COMPACT_MAGIC):prefix_end].tobytes()
+        )
+        if version != COMPACT_FORMAT_VERSION:
+            raise ValueError(f"Unsupported compact forest format v{version}")
+        header = json.loads(raw[prefix_end:prefix_end + header_length].tobytes())
+        data_start = prefix_end + header_length
+        
+        arrays = {}
+        for name in ARRAY_NAMES + OPTIONAL_ARRAY_NAMES:
+            entry = header["arrays"].get(name)
+            if entry is None:
+                if name in OPTIONAL_ARRAY_NAMES:
+                    continue
+                raise ValueError(f"{path} has no {name} array")
+            dtype = np.dtype(entry["dtype"])
+            start = data_start + entry["offset"]
+            end = start + entry["count"] * dtype.itemsize
+            if end > len(raw):
+                raise ValueError(f"{path} is truncated")
+            # np.asarray drops the np.memmap subclass, as in load()
+            arrays[name] = np.asarray(raw[start:end]).view(dtype)
+        
+        metadata = dict(header.get("metadata") or {})
+        metadata.setdefault("feature_order", header.get("feature_order", []))
+        return cls(
+            **arrays,
+            max_depth=header["max_depth"],
+            n_features=header["n_features"],
+            metadata=metadata
+        )
+    
+    def _array_names(self) -> tuple[str, ...]:
+        """Names of the node arrays this forest has, required ones first."""
+        return ARRAY_NAMES + tuple(
+            name for name in OPTIONAL_ARRAY_NAMES if getattr(self, name) is not None
+        )
+    
+    @property
+    def n_trees(self) -> int:
+        """Number of trees in the forest."""
+        return len(self.roots)
+    
+    @property
+    def n_nodes(self) -> int:
+        """Total number of nodes across all trees."""
+        return len(self.feature)
+    
+    def apply(self, features: np.ndarray) -> np.ndarray:
+        """
+        Find the leaf reached by every row in every tree.
+        
+        Args:
+            features: NumPy array of shape (n_rows, n_features)
+        
+        Returns:
+            Global leaf indices of shape (n_rows, n_trees)
+        """
+        # scikit-learn compares float32 inputs against the stored thresholds
+        X = np.asarray(features, dtype=np.float32)
+        rows = np.arange(len(X))[:, np.newaxis]
+        nodes = np.repeat(self.roots[np.newaxis, :], len(X), axis=0).astype(np.intp, copy=False)
+        
+        for _ in range(self.max_depth):
+            go_left = X[rows, self.feature[nodes]] <= self.threshold[nodes]
+            # Compact int32 children are widened once per level; indexing
+            # with anything narrower than intp converts on every gather
+            nodes = np.where(go_left, self.left[nodes], self.right[nodes]).astype(
+                np.intp, copy=False
+            )
+        
+        return nodes
+    
+    def predict_proba(self, features: np.ndarray) -> np.ndarray:
+        """
+        Predict class probabilities.
+        
+        Args:
+            features: NumPy array of shape (n_rows, n_features)
+        
+        Returns:
+            NumPy array of shape (n_rows, 2) matching scikit-learn's layout
+        """
+        # Averaged in float64 even when leaf values are stored as float32
+        positive = self.value[self.apply(features)].mean(axis=1, dtype=np.float64)
+        return np.column_stack((1.0 - positive, positive))
+    
+    def predict(self, features: np.ndarray) -> np.ndarray:
+        """
+        Predict classes (0 = No Diabetes, 1 = Diabetes).
+        
+        Args:
+            features: NumPy array of shape (n_rows, n_features)
+        
+        Returns:
+            NumPy array of shape (n_rows,) with predicted classes
+        """
+        probabilities = self.predict_proba(features)
+        # Same tie-breaking as argmax in RandomForestClassifier.predict
+        return (probabilities[:, 1] > probabilities[:, 0]).astype(int)
@@ -0,0 +1,200 @@
+"""
+Micro Batcher - Request Coalescing
+
+Gathers predictions from concurrent request threads (single rows, or the
+small matrices of BMI step-function builds) and scores them with one
+model call on the stacked matrix.
+"""
+import os
+import queue
+import threading
+import time
+from collections.abc import Callable
+from concurrent.futures import Future
+
+import numpy as np
+
+# A caller waits this many windows for its batch (it may queue behind
+# batches already being scored) before scoring its own rows inline
+RESULT_TIMEOUT_WINDOWS = 100
+MIN_RESULT_TIMEOUT = 0.5
+
+
+class MicroBatcher:
+    """
+    Coalesces concurrent single-row predictions into small batches.
+    
+    The first row to arrive opens a batch window; rows arriving within
+    `window_ms` (or until `max_rows` are queued) are stacked and scored
+    together by a background thread. Each caller blocks only until its
+    own batch is scored.
+    
+    submit_rows() queues a small matrix the same way (a step-function
+    build on a BMI curve cache miss), so both kinds share windows.
+    
+    Each row carries the function that scores it, so rows pinned to
+    different model versions (around a hot reload) can share a window
+    and are still scored by their own version.
+    
+    close() stops the worker after the rows already queued; rows
+    submitted afterwards are scored on the caller's thread. So are rows
+    still waiting for the worker after `timeout` seconds.
+    """
+    
+    def __init__(self, window_ms: float, max_rows: int):
+        """
+        Initialize the batcher (the worker thread starts on first use).
+        
+        Args:
+            window_ms: Maximum time to wait for more rows after the first
+            max_rows: Rows after which a batch is scored without waiting
+                (one submission is never split)
+        """
+        if max_rows <= 0:
+            raise ValueError(f"max_rows must be positive, got {max_rows}")
+        
+        self.window = window_ms / 1000
+        self.max_rows = max_rows
+        self.timeout = max(self.window * RESULT_TIMEOUT_WINDOWS, MIN_RESULT_TIMEOUT)
+        self._queue: queue.Queue = queue.Queue()
+        self._lock = threading.Lock()
+        self._worker: threading.Thread | None = None
+        self._worker_pid: int | None = None
+        self._closed = False
+    
+    def submit(
+        self,
+        features: np.ndarray,
+        predict_matrix: Callable[[np.ndarray], np.ndarray]
+    ) -> float:
+        """
+        Score one row as part of the next batch.
+        
+        Args:
+            features: NumPy array of shape (1, n_features)
+            predict_matrix: Function scoring a feature matrix to probabilities
+        
+        Returns:
+            Probability of diabetes (0.0 to 1.0)
+        """
+        return float(self.submit_rows(features, predict_matrix)[0])
+    
+    def submit_rows(
+        self,
+        features: np.ndarray,
+        predict_matrix: Callable[[np.ndarray], np.ndarray]
+    ) -> np.ndarray:
+        """
+        Score a few rows together as part of the next batch.
+        
+        Args:
+            features: NumPy array of shape (n_rows, n_features)
+            predict_matrix: Function scoring a feature matrix to probabilities
+        
+        Returns:
+            NumPy array of shape (n_rows,) with probabilities (0.0 to 1.0)
+        """
+        self._ensure_worker()
+        future: Future = Future()
+        # Checked under the lock so no row can be queued behind the stop marker
+        with self._lock:
+            closed = self._closed
+            if not closed:
+                self._queue.put((features, predict_matrix, future))
+        if closed:
+            return np.asarray(predict_matrix(features))
+        
+        try:
+            return future.result(timeout=self.timeout)
+        except TimeoutError:
+            # A stuck or backlogged worker; once cancelled it skips these rows
+            if not future.cancel():
+                return future.result()
+            return np.asarray(predict_matrix(features))
+    
+    def close(self) -> None:
+        """Stop the worker thread once the rows already queued are scored."""
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+            if self._worker is not None and self._worker_pid == os.getpid():
+                self._queue.put(None)
+    
+    def _ensure_worker(self) -> None:
+        """Start the worker thread, restarting it after a fork."""
+        pid = os.getpid()
+        if self._worker is not None and self._worker_pid == pid:
+            return
+        
+        with self._lock:
+            if self._closed or (self._worker is not None and self._worker_pid == pid):
+                return
+            # Threads do not survive fork (e.g. gunicorn preload), so each
+            # process gets its own queue and worker
+            self._queue = queue.Queue()
+            self._worker = threading.Thread(
+                target=self._run, name="micro-batcher", daemon=True
+            )
+            self._worker_pid = pid
+            self._worker.start()
+    
+    def _run(self) -> None:
+        """Worker loop: collect a batch, score it, hand out results."""
+        pending = self._queue
+        stopping = False
+        while not stopping:
+            row = pending.get()
+            if row is None:
+                return
+            batch = [row]
+            n_rows = len(row[0])
+            deadline = time.perf_counter() + self.window
+            
+            while n_rows < self.max_rows:
+                remaining = deadline - time.perf_counter()
+                if remaining <= 0:
+                    break
+                try:
+                    row = pending.get(timeout=remaining)
+                except queue.Empty:
+                    break
+                # None is the stop marker queued by close()
+                if row is None:
+                    stopping = True
+                    break
+                batch.append(row)
+                n_rows += len(row[0])
+            
+            self._score(batch)
+    
+    def _score(self, batch: list[tuple[np.ndarray, Callable, Future]]) -> None:
+        """
+        Score a batch and resolve each caller's future.
+        
+        Submissions are grouped by scoring function, so each group is one
+        model call; each caller gets the slice for its own rows.
+        
+        Args:
+            batch: Queued (features, predict_matrix, future) triples
+        """
+        groups: dict[Callable, list[tuple[np.ndarray, Future]]] = {}
+        for features, predict_matrix, future in batch:
+            # False when the caller timed out and scored the rows itself
+            if not future.set_running_or_notify_cancel():
+                continue
+            groups.setdefault(predict_matrix, []).append((features, future))
+        
+        for predict_matrix, submissions in groups.items():
+            try:
+                matrix = np.vstack([features for features, _ in submissions])
+                probabilities = np.asarray(predict_matrix(matrix))
+            except Exception as error:
+                for _, future in submissions:
+                    future.set_exception(error)
+                continue
+            
+            start = 0
+            for features, future in submissions:
+                future.set_result(probabilities[start:start + len(features)])
+                start += len(features)
@@ -2,86 +2,151 @@
 ML Model - Data Access Layer
 
 Handles loading, caching, and inference of the trained ML model.
-Uses singleton pattern to ensure model is loaded only once.
+Uses singleton pattern to ensure model is loaded only once, and swaps
+in new model versions atomically when the artifact changes.
 """
+import hashlib
 import os
-from typing import Optional
+import threading
+import time
+from functools import partial
+from pathlib import Path
+from typing import Any, Optional
 
-import joblib
 import numpy as np
 from flask import current_app
 
+from app.models.bmi_step_function import (
+    BMIStepFunction,
+    float32_breakpoints,
+    forest_split_thresholds,
+)
+from app.models.compiled_forest import (
+    ARRAY_NAMES,
+    MANIFEST_NAME,
+    OPTIONAL_ARRAY_NAMES,
+    CompiledForest,
+)
+from app.models.micro_batcher import MicroBatcher
+from app.models.model_watcher import ModelWatcher
+from app.models.prediction_cache import PredictionCache
+from app.models.tree_explainer import TreeExplainer
+from app.utils import profiling
+from app.utils.constants import BMI_FEATURE_INDEX, FEATURE_ORDER
 
-class DiabetesModel:
+# Version reported while no trained model is available
+MOCK_VERSION = "mock"
+
+# Startup states reported by DiabetesModel.readiness()
+STATUS_IDLE = "idle"
+STATUS_LOADING = "loading"
+STATUS_WARMING = "warming"
+STATUS_READY = "ready"
+STATUS_FAILED = "failed"
+
+# Rows scored by a candidate model before it may replace the current one
+PROBE_ROWS = 64
+
+# Value ranges for probe rows; features not listed are binary
+_PROBE_RANGES = {
+    "BMI": (12, 60),
+    "GenHlth": (1, 5),
+    "MentHlth": (0, 30),
+    "PhysHlth": (0, 30),
+    "Age": (1, 13),
+    "Education": (1, 6),
+    "Income": (1, 8),
+}
+
+
+def probe_features(n_rows: int = PROBE_ROWS, seed: int = 0) -> np.ndarray:
     """
-    Singleton class for diabetes prediction model.
+    Generate a fixed set of plausible feature rows for model verification.
     
-    Ensures the model is loaded once and reused across requests.
-    """
+    Args:
+        n_rows: Number of rows
+        seed: Random seed (the same seed always gives the same rows)
     
-    _instance: Optional["DiabetesModel"] = None
-    _model = None
+    Returns:
+        NumPy array of shape (n_rows, n_features)
+    """
+    rng = np.random.default_rng(seed)
+    columns = []
+    for name in FEATURE_ORDER:
+        low, high = _PROBE_RANGES.get(name, (0, 1))
+        if name == "BMI":
+            columns.append(np.round(rng.uniform(low, high, n_rows), 1))
+        else:
+            columns.append(rng.integers(low, high + 1, n_rows).astype(np.float64))
+    return np.column_stack(columns)
+
+
+class LoadedModel:
+    """
+    One loaded model version with its inference engine and caches.
     
-    def __new__(cls):
-        """Ensure only one instance exists."""
-        if cls._instance is None:
-            cls._instance = super().__new__(cls)
-        return cls._instance
+    Instances are never modified after construction. A request pins the
+    current LoadedModel once and uses it throughout, so a hot reload
+    never mixes two versions within one request and in-flight requests
+    finish on the version they started with.
+    """
     
-    @classmethod
-    def get_instance(cls) -> "DiabetesModel":
+    def __init__(
+        self,
+        model=None,
+        predictor=None,
+        version: str = MOCK_VERSION,
+        signature: tuple | None = None,
+        trained_at: str | None = None,
+        bmi_breakpoints: np.ndarray | None = None,
+        cache: PredictionCache | None = None,
+        bmi_cache: PredictionCache | None = None,
+        batcher: MicroBatcher | None = None,
+        explainer: TreeExplainer | None = None
+    ):
         """
-        Get the singleton instance, loading the model if necessary.
+        Initialize a model version.
         
-        Returns:
-            DiabetesModel instance
+        Args:
+            model: Loaded estimator (None for mock predictions)
+            predictor: Object exposing predict_proba(features) -> (n_rows, 2)
+            version: Content hash of the artifact, or MOCK_VERSION
+            signature: Artifact file stats at load time (for change detection)
+            trained_at: Training timestamp from the artifact metadata
+            bmi_breakpoints: Float32 BMI split bounds (None for mock predictions)
+            cache: Exact-input prediction cache for this version
+            bmi_cache: Per-profile BMI step-function cache for this version
+            batcher: Shared micro-batcher for single-row predictions
+            explainer: TreeSHAP paths of the forest (None when unavailable)
         """
-        if cls._instance is None:
-            cls._instance = cls()
-        if cls._model is None:
-            cls._instance._load_model()
-        return cls._instance
+        self.model = model
+        self.predictor = predictor
+        self.version = version
+        self.signature = signature
+        self.trained_at = trained_at
+        self.bmi_breakpoints = bmi_breakpoints
+        self.cache = cache
+        self.bmi_cache = bmi_cache
+        self.batcher = batcher
+        self.explainer = explainer
     
-    def _load_model(self) -> None:
+    @property
+    def is_mock(self) -> bool:
+        """Whether predictions come from the heuristic mock."""
+        return self.model is None
+    
+    def cache_stats(self) -> dict[str, dict | None]:
         """
-        Load the trained model from disk.
+        Get prediction cache counters.
         
-        Supports both raw model files and the new format with metadata.
-        New format: dict with 'model', 'feature_order', 'metrics' keys.
-        
-        Raises:
-            FileNotFoundError: If model file doesn't exist
-            Exception: If model fails to load
+        Returns:
+            Statistics for the exact-input ("exact") and BMI curve
+            ("bmi_curve") caches; None for a disabled cache
         """
-        try:
-            model_path = current_app.config.get("MODEL_PATH")
-            
-            if not os.path.exists(model_path):
-                current_app.logger.warning(
-                    f"Model file not found at {model_path}. "
-                    "Using mock predictions until model is trained."
-                )
-                self._model = None
-                return
-            
-            model_data = joblib.load(model_path)
-            
-            # Handle new format with metadata
-            if isinstance(model_data, dict) and "model" in model_data:
-                self._model = model_data["model"]
-                current_app.logger.info(
-                    f"Model loaded from {model_path} "
-                    f"(trained at: {model_data.get('trained_at', 'unknown')})"
-                )
-            else:
-                # Backwards compatibility: raw model file
-                self._model = model_data
-                current_app.logger.info(f"Model loaded successfully from {model_path}")
-            
-        except Exception as e:
-            current_app.logger.error(f"Error loading model: {str(e)}")
-            self._model = None
-            self._model = None
+        return {
+            "exact": self.cache.stats() if self.cache is not None else None,
+            "bmi_curve": self.bmi_cache.stats() if self.bmi_cache is not None else None,
+        }
     
     def predict(self, features: np.ndarray) -> int:
         """
@@ -93,11 +158,11 @@ class DiabetesModel:
         Returns:
             Predicted class (0 = No Diabetes, 1 = Diabetes)
         """
-        if self._model is None:
+        if self.model is None:
             # Mock prediction for development/testing
             return self._mock_predict(features)
         
-        return int(self._model.predict(features)[0])
+        return int(self.model.predict(features)[0])
     
     def predict_proba(self, features: np.ndarray) -> float:
         """
@@ -109,14 +174,147 @@ class DiabetesModel:
         Returns:
             Probability of diabetes (0.0 to 1.0)
         """
-        if self._model is None:
+        if profiling.active():
+            # Same result as the cached paths, but the profile shows the model
+            return self._predict_proba_uncached(features)
+        
+        key = None
+        if self.cache is not None:
+            key = PredictionCache.make_key(features)
+            probability = self.cache.get(key)
+            if probability is not None:
+                return probability
+        
+        if self.bmi_cache is not None:
+            step_function = self.bmi_step_function(features)
+            probability = step_function(features[0][BMI_FEATURE_INDEX])
+        elif self.batcher is not None and self.model is not None:
+            # Coalesce with concurrent requests into one model call
+            probability = self.batcher.submit(features, self.predict_proba_batch)
+        else:
+            probability = self._predict_proba_uncached(features)
+        
+        if key is not None:
+            self.cache.put(key, probability)
+        return probability
+    
+    def predict_bmi_grid(self, grid: np.ndarray) -> np.ndarray:
+        """
+        Predict probabilities for one profile at many BMI values.
+        
+        With a trained model, the grid is answered from the profile's
+        (cached) BMI step function, so a repeated profile needs no model
+        call at all. Mock predictions score the grid directly.
+        
+        Args:
+            grid: NumPy array of shape (n_rows, n_features) whose rows
+                differ only in BMI
+        
+        Returns:
+            NumPy array of shape (n_rows,) with probabilities (0.0 to 1.0)
+        """
+        if self.bmi_breakpoints is None or len(grid) == 0:
+            return self.predict_proba_batch(grid)
+        
+        step_function = self.bmi_step_function(grid[:1])
+        return step_function.evaluate(grid[:, BMI_FEATURE_INDEX])
+    
+    def explain(self, features: np.ndarray) -> np.ndarray:
+        """
+        Compute each feature's SHAP contribution to the probability.
+        
+        Args:
+            features: NumPy array of shape (n_rows, n_features)
+        
+        Returns:
+            Contributions of shape (n_rows, n_features); each row plus
+            explainer.base_value equals the row's probability
+        
+        Raises:
+            RuntimeError: If no explainer was built for this version
+        """
+        if self.explainer is None:
+            raise RuntimeError("Explanations require a trained forest with node covers")
+        
+        return self.explainer.explain(features)
+    
+    def bmi_step_function(self, features: np.ndarray) -> BMIStepFunction:
+        """
+        Get the probability as a function of BMI for a discrete profile.
+        
+        The forest output only changes where BMI crosses one of its split
+        thresholds, so one evaluation per interval describes every BMI.
+        Results are cached per profile (all features except BMI).
+        
+        Args:
+            features: NumPy array of shape (1, n_features); BMI is ignored
+        
+        Returns:
+            BMIStepFunction for the profile
+        
+        Raises:
+            RuntimeError: If no trained model is loaded
+        """
+        if self.bmi_breakpoints is None:
+            raise RuntimeError("BMI step functions require a trained model")
+        
+        key = None
+        if self.bmi_cache is not None:
+            key = BMIStepFunction.profile_key(features)
+            step_function = self.bmi_cache.get(key)
+            if step_function is not None:
+                return step_function
+        
+        predict_matrix = self.predict_proba_batch
+        if self.batcher is not None and self.model is not None:
+            # Cache misses share model calls with concurrent requests too
+            predict_matrix = partial(
+                self.batcher.submit_rows, predict_matrix=self.predict_proba_batch
+            )
+        
+        step_function = BMIStepFunction.build(
+            features, self.bmi_breakpoints, predict_matrix
+        )
+        if key is not None:
+            self.bmi_cache.put(key, step_function)
+        return step_function
+    
+    def _predict_proba_uncached(self, features: np.ndarray) -> float:
+        """
+        Predict probability of diabetes without consulting the cache.
+        
+        Args:
+            features: NumPy array of shape (1, n_features)
+        
+        Returns:
+            Probability of diabetes (0.0 to 1.0)
+        """
+        if self.model is None:
             # Mock probability for development/testing
             return self._mock_predict_proba(features)
         
         # Get probability of positive class (diabetes)
-        probabilities = self._model.predict_proba(features)
+        probabilities = self.predictor.predict_proba(features)
         return float(probabilities[0][1])
     
+    def predict_proba_batch(self, features: np.ndarray) -> np.ndarray:
+        """
+        Predict probability of diabetes for many rows in one call.
+        
+        Args:
+            features: NumPy array of shape (n_rows, n_features)
+        
+        Returns:
+            NumPy array of shape (n_rows,) with probabilities (0.0 to 1.0)
+        """
+        if len(features) == 0:
+            return np.empty(0, dtype=np.float64)
+        
+        if self.model is None:
+            return self._mock_predict_proba_batch(features)
+        
+        return self.predictor.predict_proba(features)[:, 1]
+    
     def _mock_predict(self, features: np.ndarray) -> int:
         """
         Generate mock prediction when model is not loaded.
@@ -162,3 +360,735 @@ class DiabetesModel:
         
         # Clamp to valid range
         return min(max(risk_score, 0.0), 1.0)
+    
+    def _mock_predict_proba_batch(self, features: np.ndarray) -> np.ndarray:
+        """
+        Vectorized version of _mock_predict_proba for a feature matrix.
+        """
+        bmi = features[:, 3]
+        high_bp = features[:, 0]
+        age_cat = features[:, 18]
+        
+        risk_score = np.full(len(features), 0.1)
+        risk_score += np.select([bmi >= 30, bmi >= 25], [0.3, 0.15], 0.0)
+        risk_score += np.select([age_cat >= 9, age_cat >= 6], [0.25, 0.15], 0.0)
+        risk_score += np.where(high_bp != 0, 0.2, 0.0)
+        
+        return np.clip(risk_score, 0.0, 1.0)
+
+
+class DiabetesModel:
+    """
+    Singleton class for diabetes prediction model.
+    
+    Ensures the model is loaded once and reused across requests. The
+    loaded version lives in a single LoadedModel reference, so replacing
+    it with a newly loaded and verified version is one atomic assignment.
+    """
+    
+    _instance: Optional["DiabetesModel"] = None
+    _instance_lock = threading.Lock()
+    _current: LoadedModel | None = None
+    _reload_lock = threading.Lock()
+    _batcher: MicroBatcher | None = None
+    _watcher: ModelWatcher | None = None
+    _status = STATUS_IDLE
+    _error: str | None = None
+    _phase_seconds: dict[str, float] = {}
+    _settled = threading.Event()
+    _fork_hook_registered = False
+    
+    def __new__(cls):
+        """Ensure only one instance exists."""
+        if cls._instance is None:
+            cls._instance = super().__new__(cls)
+        return cls._instance
+    
+    @classmethod
+    def get_instance(cls) -> "DiabetesModel":
+        """
+        Get the singleton instance, loading the model if necessary.
+        
+        Safe to call from concurrent threads; the model is loaded once.
+        While a background load is in progress the instance is returned
+        without a model; use wait_until_ready() before predicting.
+        
+        Returns:
+            DiabetesModel instance
+        """
+        instance = cls._instance
+        if instance is None or instance._status == STATUS_IDLE:
+            with cls._instance_lock:
+                if cls._instance is None:
+                    cls._instance = cls()
+                if cls._instance._status == STATUS_IDLE:
+                    cls._instance._load_model()
+        return cls._instance
+    
+    def start_background_load(self, app) -> threading.Thread:
+        """
+        Load and warm the model on a background thread.
+        
+        Returns immediately so the app can serve /health and /ready while
+        the (slow) import of scikit-learn and unpickling happen.
+        
+        Args:
+            app: Flask application whose config locates the artifact
+        
+        Returns:
+            The loader thread
+        """
+        with self._instance_lock:
+            self._begin_load()
+        
+        # A fork during loading (gunicorn preload) leaves the child without
+        # the loader thread, so the child starts its own load
+        if not self._fork_hook_registered:
+            DiabetesModel._fork_hook_registered = True
+            os.register_at_fork(after_in_child=lambda: self._resume_after_fork(app))
+        
+        thread = threading.Thread(
+            target=self._load_in_background, args=(app,),
+            name="model-loader", daemon=True
+        )
+        thread.start()
+        return thread
+    
+    def _load_in_background(self, app) -> None:
+        """Loader thread body."""
+        with app.app_context():
+            self._load_model()
+    
+    def _resume_after_fork(self, app) -> None:
+        """Restart an unfinished background load in a forked child."""
+        if self._settled.is_set():
+            return
+        # The parent's loader thread may have held these at fork time
+        DiabetesModel._reload_lock = threading.Lock()
+        DiabetesModel._instance_lock = threading.Lock()
+        DiabetesModel._settled = threading.Event()
+        self.start_background_load(app)
+    
+    def _begin_load(self) -> None:
+        """Reset readiness state for a new startup load."""
+        self._status = STATUS_LOADING
+        self._error = None
+        self._phase_seconds = {}
+        self._settled.clear()
+    
+    def wait_until_ready(self, timeout: float | None = None) -> bool:
+        """
+        Block until the startup load has finished.
+        
+        Args:
+            timeout: Maximum seconds to wait (None waits forever)
+        
+        Returns:
+            True if a model (or the mock fallback) is available to serve
+        """
+        if self._current is not None:
+            return True
+        self._settled.wait(timeout)
+        return self._current is not None
+    
+    def readiness(self) -> dict[str, Any]:
+        """
+        Report the startup state and the time spent in each phase.
+        
+        Returns:
+            Dictionary with status (loading, warming, ready or failed),
+            seconds per phase, model_version and error
+        """
+        current = self._current
+        return {
+            "status": self._status,
+            "phases": {
+                name: round(seconds, 4) for name, seconds in self._phase_seconds.items()
+            },
+            "model_version": current.version if current is not None else None,
+            "error": self._error,
+        }
+    
+    def current(self) -> LoadedModel:
+        """
+        Pin the currently served model version.
+        
+        Callers should pin once per request and use the returned object
+        for every prediction in that request.
+        
+        Returns:
+            LoadedModel being served
+        """
+        return self._current
+    
+    @property
+    def version(self) -> str:
+        """Version of the model currently served."""
+        return self._current.version
+    
+    def _load_model(self) -> None:
+        """
+        Load the trained model from disk, falling back to mock predictions.
+        
+        Supports both raw model files and the new format with metadata.
+        New format: dict with 'model', 'feature_order', 'metrics' keys.
+        
+        The MODEL_ENGINE setting picks what serves predict_proba: the
+        scikit-learn estimator itself ("sklearn") or a CompiledForest
+        flattened from it at load time ("compiled").
+        
+        With MODEL_LOAD_MODE="mmap", the compiled forest exported to
+        FOREST_PATH is memory-mapped instead, so worker processes share
+        its pages; the pickle is used only if that export is missing.
+        MODEL_LOAD_MODE="compact" does the same with the single-file
+        COMPACT_MODEL_PATH, which loads with only NumPy imported.
+        
+        Progress is reported through readiness(): "loading" while the
+        artifact is read, "warming" while probe predictions page in the
+        trees, then "ready", or "failed" if the artifact could not be used
+        (mock predictions are served in that case, as when it is missing).
+        """
+        with self._reload_lock:
+            self._begin_load()
+            previous_batcher = self._batcher
+            self._batcher = self._build_batcher()
+            error = None
+            
+            started = time.perf_counter()
+            try:
+                loaded = self._read_artifact()
+            except FileNotFoundError as e:
+                current_app.logger.warning(
+                    f"{e}. Using mock predictions until model is trained."
+                )
+                loaded = self._build_loaded_model(None, signature=self.artifact_signature())
+            except Exception as e:
+                current_app.logger.error(f"Error loading model: {str(e)}")
+                error = str(e)
+                loaded = self._build_loaded_model(None, signature=self.artifact_signature())
+            self._phase_seconds["loading"] = time.perf_counter() - started
+            
+            self._status = STATUS_WARMING
+            started = time.perf_counter()
+            try:
+                self._verify(loaded)
+            except Exception as e:
+                current_app.logger.error(f"Model failed warm-up checks: {str(e)}")
+                error = str(e)
+                loaded = self._build_loaded_model(None, signature=loaded.signature)
+            self._phase_seconds["warming"] = time.perf_counter() - started
+            
+            self._current = loaded
+            if previous_batcher is not None and previous_batcher is not self._batcher:
+                previous_batcher.close()
+            self._error = error
+            self._status = STATUS_FAILED if error else STATUS_READY
+            self._settled.set()
+            current_app.logger.info(
+                f"Model {self._status} in "
+                f"{sum(self._phase_seconds.values()):.2f}s ({self._phase_seconds})"
+            )
+    
+    def reload(self, force: bool = False) -> bool:
+        """
+        Load the artifact again and swap it in if it is a new version.
+        
+        The candidate is loaded, warmed and verified on the calling thread
+        while the current version keeps serving requests. It replaces the
+        current version only if it scores the probe set correctly; on any
+        failure the current version stays in place.
+        
+        Args:
+            force: Swap even if the artifact content has not changed
+        
+        Returns:
+            True if a new version was swapped in
+        """
+        with self._reload_lock:
+            current = self._current
+            try:
+                candidate = self._read_artifact()
+                if not force and current is not None and (
+                    candidate.version == current.version
+                ):
+                    return False
+                self._verify(candidate)
+            except Exception as e:
+                current_app.logger.error(
+                    f"Model reload failed, keeping version "
+                    f"{current.version if current else None}: {str(e)}"
+                )
+                return False
+            
+            self._current = candidate
+            self._status = STATUS_READY
+            self._error = None
+            current_app.logger.info(
+                f"Model version {candidate.version} is now serving "
+                f"(replaced {current.version if current else None})"
+            )
+            return True
+    
+    def start_watcher(self, app, interval: float) -> ModelWatcher:
+        """
+        Poll the artifact in the background and reload it when it changes.
+        
+        Any watcher started earlier is stopped first.
+        
+        Args:
+            app: Flask application whose config locates the artifact
+            interval: Seconds between polls
+        
+        Returns:
+            The running ModelWatcher
+        """
+        if self._watcher is not None:
+            self._watcher.stop()
+        self._watcher = ModelWatcher(app, interval)
+        self._watcher.start()
+        return self._watcher
+    
+    def _read_artifact(self) -> LoadedModel:
+        """
+        Load the configured artifact into a new LoadedModel.
+        
+        Returns:
+            LoadedModel for the artifact on disk
+        
+        Raises:
+            FileNotFoundError: If model file doesn't exist
+            Exception: If model fails to load
+        """
+        load_mode = current_app.config.get("MODEL_LOAD_MODE", "pickle")
+        if load_mode == "mmap":
+            loaded = self._read_memory_mapped_forest()
+            if loaded is not None:
+                return loaded
+        elif load_mode == "compact":
+            loaded = self._read_compact_forest()
+            if loaded is not None:
+                return loaded
+        
+        model_path = current_app.config.get("MODEL_PATH")
+        if not os.path.exists(model_path):
+            raise FileNotFoundError(f"Model file not found at {model_path}")
+        
+        # Imported here so the forest load modes never pull in joblib
+        # (and, through the pickle, scikit-learn)
+        import joblib
+        
+        signature = self.artifact_signature()
+        model_data = joblib.load(model_path)
+        trained_at = None
+        
+        # Handle new format with metadata
+        if isinstance(model_data, dict) and "model" in model_data:
+            model = model_data["model"]
+            trained_at = model_data.get("trained_at")
+            current_app.logger.info(
+                f"Model loaded from {model_path} "
+                f"(trained at: {trained_at or 'unknown'})"
+            )
+        else:
+            # Backwards compatibility: raw model file
+            model = model_data
+            current_app.logger.info(f"Model loaded successfully from {model_path}")
+        
+        # Training leaves verbose=1 on the estimator, which logs joblib
+        # progress on every predict call
+        if hasattr(model, "verbose"):
+            model.verbose = 0
+        
+        return self._build_loaded_model(
+            model,
+            predictor=self._build_predictor(model),
+            version=self._artifact_version(model_path),
+            signature=signature,
+            trained_at=trained_at
+        )
+    
+    def _read_memory_mapped_forest(self) -> LoadedModel | None:
+        """
+        Memory-map the exported compiled forest from FOREST_PATH.
+        
+        Returns:
+            LoadedModel for the forest, or None if no export exists
+        """
+        forest_path = current_app.config.get("FOREST_PATH")
+        manifest_path = os.path.join(forest_path, MANIFEST_NAME)
+        
+        if not os.path.exists(manifest_path):
+            current_app.logger.warning(
+                f"Compiled forest not found at {forest_path}; falling back to "
+                "the pickle. Run scripts/export_forest.py to create it."
+            )
+            return None
+        
+        signature = self.artifact_signature()
+        forest = CompiledForest.load(forest_path, mmap=True)
+        trained_at = forest.metadata.get("trained_at")
+        current_app.logger.info(
+            f"Memory-mapped compiled forest from {forest_path} "
+            f"(trained at: {trained_at or 'unknown'})"
+        )
+        
+        return self._build_loaded_model(
+            forest,
+            predictor=forest,
+            version=self._artifact_version(forest_path),
+            signature=signature,
+            trained_at=trained_at
+        )
+    
+    def _read_compact_forest(self) -> LoadedModel | None:
+        """
+        Memory-map the compact forest file from COMPACT_MODEL_PATH.
+        
+        Returns:
+            LoadedModel for the forest, or None if no export exists
+        """
+        compact_path = current_app.config.get("COMPACT_MODEL_PATH")
+        
+        if not os.path.exists(compact_path):
+            current_app.logger.warning(
+                f"Compact forest not found at {compact_path}; falling back to "
+                "the pickle. Run scripts/export_compact_model.py to create it."
+            )
+            return None
+        
+        signature = self.artifact_signature()
+        forest = CompiledForest.load_compact(compact_path, mmap=True)
+        trained_at = forest.metadata.get("trained_at")
+        current_app.logger.info(
+            f"Memory-mapped compact forest from {compact_path} "
+            f"(trained at: {trained_at or 'unknown'})"
+        )
+        
+        return self._build_loaded_model(
+            forest,
+            predictor=forest,
+            version=self._artifact_version(compact_path),
+            signature=signature,
+            trained_at=trained_at
+        )
+    
+    def _build_loaded_model(
+        self,
+        model,
+        predictor=None,
+        version: str = MOCK_VERSION,
+        signature: tuple | None = None,
+        trained_at: str | None = None
+    ) -> LoadedModel:
+        """
+        Wrap a model in a LoadedModel with fresh caches.
+        
+        PREDICTION_CACHE_SIZE and BMI_CURVE_CACHE_SIZE set the cache
+        capacities; 0 disables a cache. The BMI curve cache is only used
+        with a real model, since mock predictions are not split-based.
+        
+        Args:
+            model: Loaded estimator or CompiledForest (None for mock predictions)
+            predictor: Inference engine for the model
+            version: Content hash of the artifact
+            signature: Artifact file stats at load time
+            trained_at: Training timestamp from the artifact metadata
+        
+        Returns:
+            LoadedModel ready to serve
+        """
+        bmi_breakpoints = None
+        if model is not None:
+            bmi_breakpoints = float32_breakpoints(
+                forest_split_thresholds(model, BMI_FEATURE_INDEX)
+            )
+        
+        return LoadedModel(
+            model=model,
+            predictor=predictor,
+            version=version,
+            signature=signature,
+            trained_at=trained_at,
+            bmi_breakpoints=bmi_breakpoints,
+            cache=self._build_cache("PREDICTION_CACHE_SIZE", version, "prediction"),
+            bmi_cache=(
+                self._build_cache("BMI_CURVE_CACHE_SIZE", version, "bmi_curve")
+                if bmi_breakpoints is not None
+                else None
+            ),
+            batcher=self._batcher,
+            explainer=self._build_explainer(model, predictor)
+        )
+    
+    @staticmethod
+    def _build_explainer(model, predictor) -> TreeExplainer | None:
+        """
+        Flatten the forest's paths for TreeSHAP when EXPLANATIONS_ENABLED.
+        
+        Args:
+            model: Loaded estimator or CompiledForest (None for mock predictions)
+            predictor: Inference engine for the model
+        
+        Returns:
+            TreeExplainer, or None when disabled, mocked or without covers
+        """
+        if model is None or not current_app.config.get("EXPLANATIONS_ENABLED", False):
+            return None
+        
+        started = time.perf_counter()
+        if isinstance(predictor, CompiledForest):
+            forest = predictor
+        elif isinstance(model, CompiledForest):
+            forest = model
+        else:
+            forest = CompiledForest.from_estimator(model)
+        
+        try:
+            explainer = TreeExplainer.from_forest(forest)
+        except ValueError as e:
+            current_app.logger.warning(f"Explanations disabled: {str(e)}")
+            return None
+        
+        current_app.logger.info(
+            f"TreeSHAP paths for {explainer.n_leaves} leaves ready in "
+            f"{time.perf_counter() - started:.2f}s"
+        )
+        return explainer
+    
+    @staticmethod
+    def _build_cache(
+        size_setting: str,
+        version: str,
+        name: str
+    ) -> PredictionCache | None:
+        """
+        Create a cache sized by a config setting for a model version.
+        
+        Args:
+            size_setting: Config key holding the cache capacity
+            version: Version of the loaded artifact
+            name: Cache label for hit/miss metrics
+        
+        Returns:
+            Empty cache bound to the version, or None when disabled
+        """
+        cache_size = current_app.config.get(size_setting, 0)
+        if cache_size <= 0:
+            return None
+        
+        cache = PredictionCache(cache_size, name)
+        cache.bind_version(version)
+        return cache
+    
+    def _verify(self, candidate: LoadedModel) -> None:
+        """
+        Warm a candidate model and check that it scores the probe set.
+        
+        Args:
+            candidate: Newly loaded model version
+        
+        Raises:
+            ValueError: If the candidate returns invalid probabilities
+        """
+        probe = probe_features()
+        probabilities = np.asarray(candidate.predict_proba_batch(probe))
+        
+        if probabilities.shape != (len(probe),):
+            raise ValueError(
+                f"Probe set returned shape {probabilities.shape}, "
+                f"expected ({len(probe)},)"
+            )
+        if not np.all(np.isfinite(probabilities)) or (
+            probabilities.min() < 0.0 or probabilities.max() > 1.0
+        ):
+            raise ValueError("Probe set returned probabilities outside [0, 1]")
+        
+        # Warm the single-row model path before taking traffic; the probes
+        # bypass the caches so they hold (and count) only real requests
+        for row in probe[:8]:
+            candidate._predict_proba_uncached(row.reshape(1, -1))
+    
+    def watched_paths(self) -> list[str]:
+        """
+        List the artifact files that define the served model.
+        
+        Returns:
+            Paths whose changes should trigger a reload
+        """
+        config = current_app.config
+        paths = [config.get("MODEL_PATH")]
+        load_mode = config.get("MODEL_LOAD_MODE", "pickle")
+        if load_mode == "mmap":
+            paths.insert(0, os.path.join(config.get("FOREST_PATH"), MANIFEST_NAME))
+        elif load_mode == "compact":
+            paths.insert(0, config.get("COMPACT_MODEL_PATH"))
+        return paths
+    
+    def artifact_signature(self) -> tuple:
+        """
+        Cheaply identify the artifacts on disk by modification time and size.
+        
+        Returns:
+            Tuple with (mtime_ns, size) per watched path, None if missing
+        """
+        signature = []
+        for path in self.watched_paths():
+            try:
+                stat = os.stat(path)
+                signature.append((stat.st_mtime_ns, stat.st_size))
+            except FileNotFoundError:
+                signature.append(None)
+        return tuple(signature)
+    
+    @staticmethod
+    def _artifact_version(path: str) -> str:
+        """
+        Identify a model artifact by the hash of its content.
+        
+        Args:
+            path: Model file, or compiled forest directory
+        
+        Returns:
+            First 12 hex digits of the SHA-256 of the artifact
+        """
+        path = Path(path)
+        if path.is_dir():
+            files = [path / MANIFEST_NAME] + [path / f"{name}.npy" for name in ARRAY_NAMES]
+            files += [
+                path / f"{name}.npy" for name in OPTIONAL_ARRAY_NAMES
+                if (path / f"{name}.npy").exists()
+            ]
+        else:
+            files = [path]
+        
+        digest = hashlib.sha256()
+        for file in files:
+            with open(file, "rb") as f:
+                for chunk in iter(lambda: f.read(1 << 20), b""):
+                    digest.update(chunk)
+        return digest.hexdigest()[:12]
+    
+    def cache_stats(self) -> dict[str, dict | None]:
+        """
+        Get prediction cache counters for the current version.
+        
+        Returns:
+            Statistics for the exact-input ("exact") and BMI curve
+            ("bmi_curve") caches; None for a disabled cache
+        """
+        return self._current.cache_stats()
+    
+    def _build_batcher(self) -> MicroBatcher | None:
+        """
+        Create the micro-batcher when MICRO_BATCH_ENABLED is set.
+        
+        An existing batcher with the same settings is kept. Otherwise the
+        caller closes the previous one once the new version is swapped in,
+        so reloading the model does not leave idle worker threads behind.
+        
+        Returns:
+            MicroBatcher, or None when batching is disabled
+        """
+        config = current_app.config
+        if not config.get("MICRO_BATCH_ENABLED", False):
+            return None
+        
+        window_ms = config.get("MICRO_BATCH_WINDOW_MS", 2.0)
+        max_rows = config.get("MICRO_BATCH_MAX_ROWS", 64)
+        batcher = self._batcher
+        if batcher is not None and batcher.window == window_ms / 1000 and (
+            batcher.max_rows == max_rows
+        ):
+            return batcher
+        return MicroBatcher(window_ms, max_rows)
+    
+    def _build_predictor(self, model):
+        """
+        Build the inference engine selected by MODEL_ENGINE.
+        
+        Args:
+            model: Loaded scikit-learn estimator
+        
+        Returns:
+            Object exposing predict_proba(features) -> (n_rows, 2) array
+        """
+        engine = current_app.config.get("MODEL_ENGINE", "sklearn")
+        
+        if isinstance(model, CompiledForest):
+            return model
+        
+        if engine == "compiled":
+            predictor = CompiledForest.from_estimator(model)
+            current_app.logger.info(
+                f"Compiled forest engine ready ({predictor.n_trees} trees, "
+                f"{predictor.n_nodes} nodes, max depth {predictor.max_depth})"
+            )
+            return predictor
+        
+        if engine != "sklearn":
+            current_app.logger.warning(
+                f"Unknown MODEL_ENGINE '{engine}', falling back to sklearn"
+            )
+        return model
+    
+    def predict(self, features: np.ndarray) -> int:
+        """
+        Predict diabetes class (0 or 1) with the current version.
+        
+        Args:
+            features: NumPy array of shape (1, n_features)
+        
+        Returns:
+            Predicted class (0 = No Diabetes, 1 = Diabetes)
+        """
+        return self._current.predict(features)
+    
+    def predict_proba(self, features: np.ndarray) -> float:
+        """
+        Predict probability of diabetes with the current version.
+        
+        Args:
+            features: NumPy array of shape (1, n_features)
+        
+        Returns:
+            Probability of diabetes (0.0 to 1.0)
+        """
+        return self._current.predict_proba(features)
+    
+    def bmi_step_function(self, features: np.ndarray) -> BMIStepFunction:
+        """
+        Get the BMI step function for a profile from the current version.
+        
+        Args:
+            features: NumPy array of shape (1, n_features); BMI is ignored
+        
+        Returns:
+            BMIStepFunction for the profile
+        """
+        return self._current.bmi_step_function(features)
+    
+    def predict_proba_batch(self, features: np.ndarray) -> np.ndarray:
+        """
+        Predict probability of diabetes for many rows with the current version.
+        
+        Args:
+            features: NumPy array of shape (n_rows, n_features)
+        
+        Returns:
+            NumPy array of shape (n_rows,) with probabilities (0.0 to 1.0)
+        """
+        return self._current.predict_proba_batch(features)
+    
+    def describe(self) -> dict[str, Any]:
+        """
+        Describe the version currently served.
+        
+        Returns:
+            Dictionary with model_version, trained_at and mock flag
+        """
+        current = self._current
+        return {
+            "model_version": current.version,
+            "trained_at": current.trained_at,
+            "mock": current.is_mock,
+        }
@@ -0,0 +1,104 @@
+"""
+Model Watcher - Artifact Change Detection
+
+Polls the model artifact in the background and hot-reloads the model
+when a new version is written.
+"""
+import os
+import threading
+
+from flask import Flask
+
+
+class ModelWatcher:
+    """
+    Background thread that reloads the model when its artifact changes.
+    
+    Every `interval` seconds the watched files are stat()ed; only when
+    their modification time or size differs from the served version is
+    the artifact loaded, verified and swapped in by DiabetesModel.reload.
+    A signature that did not produce a new version (a failed load, or
+    unchanged content) is not retried until it changes again, for example
+    when a partially written file is completed.
+    """
+    
+    def __init__(self, app: Flask, interval: float):
+        """
+        Initialize the watcher (call start() to begin polling).
+        
+        Args:
+            app: Flask application whose config locates the artifact
+            interval: Seconds between polls (must be positive)
+        """
+        if interval <= 0:
+            raise ValueError(f"interval must be positive, got {interval}")
+        
+        self.app = app
+        self.interval = interval
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+        self._ignored_signature: tuple | None = None
+        self._fork_hook_registered = False
+    
+    def start(self) -> None:
+        """Start polling, and again in every forked child process."""
+        self._stop.clear()
+        self._thread = threading.Thread(
+            target=self._run, name="model-watcher", daemon=True
+        )
+        self._thread.start()
+        
+        # Threads do not survive fork (e.g. gunicorn preload), so each
+        # worker restarts its own watcher
+        if not self._fork_hook_registered:
+            os.register_at_fork(after_in_child=self._restart_after_fork)
+            self._fork_hook_registered = True
+    
+    def _restart_after_fork(self) -> None:
+        """Restart polling in a forked child unless the watcher was stopped."""
+        if not self._stop.is_set():
+            self.start()
+    
+    def stop(self) -> None:
+        """Stop polling after the current check."""
+        self._stop.set()
+    
+    @property
+    def running(self) -> bool:
+        """Whether the polling thread is alive."""
+        return self._thread is not None and self._thread.is_alive()
+    
+    def _run(self) -> None:
+        """Poll loop."""
+        while not self._stop.wait(self.interval):
+            try:
+                self.check()
+            except Exception as e:
+                self.app.logger.error(f"Model watcher check failed: {str(e)}")
+    
+    def check(self) -> bool:
+        """
+        Reload the model if the artifact changed since it was loaded.
+        
+        Returns:
+            True if a new version was swapped in
+        """
+        from app.models.ml_model import DiabetesModel
+        
+        with self.app.app_context():
+            model = DiabetesModel.get_instance()
+            current = model.current()
+            if current is None:
+                # Startup load still in progress
+                return False
+            
+            signature = model.artifact_signature()
+            if signature == current.signature:
+                return False
+            if signature == self._ignored_signature:
+                return False
+            
+            reloaded = model.reload()
+            if not reloaded and model.current().signature != signature:
+                self._ignored_signature = signature
+            return reloaded
@@ -0,0 +1,133 @@
+"""
+Prediction Cache - Exact-input Memoization
+
+Bounded LRU caches of model outputs keyed on the canonical feature
+vector, shared by all request threads.
+"""
+import threading
+from collections import OrderedDict
+from typing import Any
+
+import numpy as np
+
+from app.utils.metrics import CACHE_LOOKUPS
+
+
+class PredictionCache:
+    """
+    Thread-safe LRU cache mapping feature vectors to model outputs.
+    
+    Values are usually probabilities, but any per-key result derived
+    from the model (such as a BMI step function) can be stored.
+    Entries belong to one model version; binding a different version
+    drops every cached value so a new artifact is never answered
+    with results from the old one.
+    """
+    
+    def __init__(self, maxsize: int, name: str | None = None):
+        """
+        Initialize an empty cache.
+        
+        Args:
+            maxsize: Maximum number of cached entries (must be positive)
+            name: Label for hit/miss metrics (None records no metrics)
+        """
+        if maxsize <= 0:
+            raise ValueError(f"maxsize must be positive, got {maxsize}")
+        
+        self.maxsize = maxsize
+        self._entries: OrderedDict[bytes, Any] = OrderedDict()
+        self._lock = threading.Lock()
+        self._version: str | None = None
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._hit_counter = self._miss_counter = None
+        if name is not None:
+            self._hit_counter = CACHE_LOOKUPS.labels(cache=name, result="hit")
+            self._miss_counter = CACHE_LOOKUPS.labels(cache=name, result="miss")
+    
+    @staticmethod
+    def make_key(features: np.ndarray) -> bytes:
+        """
+        Build a cache key from a single-row feature vector.
+        
+        Args:
+            features: Feature array as produced by prepare_features
+        
+        Returns:
+            Bytes key identifying the exact feature values
+        """
+        return np.ascontiguousarray(features, dtype=np.float64).tobytes()
+    
+    def get(self, key: bytes) -> Any | None:
+        """
+        Look up a cached value, marking it most recently used.
+        
+        Args:
+            key: Key from make_key
+        
+        Returns:
+            Cached value, or None on a miss
+        """
+        with self._lock:
+            value = self._entries.get(key)
+            if value is None:
+                self.misses += 1
+            else:
+                self._entries.move_to_end(key)
+                self.hits += 1
+        
+        counter = self._hit_counter if value is not None else self._miss_counter
+        if counter is not None:
+            counter.inc()
+        return value
+    
+    def put(self, key: bytes, value: Any) -> None:
+        """
+        Store a value, evicting the least recently used entry if full.
+        
+        Args:
+            key: Key from make_key
+            value: Value computed from the model
+        """
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            if len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+    
+    def bind_version(self, version: str | None) -> None:
+        """
+        Associate the cache with a model version, clearing it on change.
+        
+        Args:
+            version: Identifier of the loaded model artifact
+        """
+        with self._lock:
+            if version != self._version:
+                self._entries.clear()
+                self._version = version
+    
+    def clear(self) -> None:
+        """Remove all entries (counters are kept)."""
+        with self._lock:
+            self._entries.clear()
+    
+    def stats(self) -> dict[str, Any]:
+        """
+        Get cache counters.
+        
+        Returns:
+            Dictionary with size, maxsize, hits, misses, evictions and version
+        """
+        with self._lock:
+            return {
+                "size": len(self._entries),
+                "maxsize": self.maxsize,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "version": self._version,
+            }
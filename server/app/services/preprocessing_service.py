@@ -7,7 +7,22 @@ from typing import Any
 
 import numpy as np
 
-from app.utils.constants import AGE_CATEGORIES, FEATURE_ORDER
+from app.utils.constants import (
+    AGE_CATEGORIES,
+    BMI_FEATURE_INDEX,
+    BOOLEAN_FEATURE_FIELDS,
+    DEFAULT_FEATURE_VALUES,
+    FEATURE_ORDER,
+    INTEGER_FEATURE_FIELDS,
+)
+
+# Lower bound of each BRFSS age category, for vectorized bucketing
+_AGE_CATEGORY_LOWER_BOUNDS = np.array(
+    [min_age for min_age, _ in AGE_CATEGORIES.values()]
+)
+_AGE_CATEGORY_MIN = min(min_age for min_age, _ in AGE_CATEGORIES.values())
+_AGE_CATEGORY_MAX = max(max_age for _, max_age in AGE_CATEGORIES.values())
+_FEATURE_INDEX = {name: index for index, name in enumerate(FEATURE_ORDER)}
 
 
 class PreprocessingService:
@@ -29,6 +44,20 @@ class PreprocessingService:
         height_m = height_cm / 100
         return weight_kg / (height_m ** 2)
     
+    def weight_for_bmi(self, bmi: float, height_cm: float) -> float:
+        """
+        Calculate the weight giving a BMI at a height (inverse of calculate_bmi).
+        
+        Args:
+            bmi: Body Mass Index
+            height_cm: Height in centimeters
+        
+        Returns:
+            Weight in kilograms
+        """
+        height_m = height_cm / 100
+        return bmi * (height_m ** 2)
+    
     def get_bmi_category(self, bmi: float) -> str:
         """
         Get BMI category based on WHO classifications.
@@ -87,7 +116,6 @@ class PreprocessingService:
         features = {
             "HighBP": int(input_data["high_bp"]),
             "HighChol": int(input_data["high_chol"]),
-            "CholCheck": 1,  # Assume cholesterol check done
             "BMI": bmi,
             "Smoker": int(input_data["smoker"]),
             "Stroke": int(input_data["stroke"]),
@@ -96,19 +124,96 @@ class PreprocessingService:
             "Fruits": int(input_data["fruits"]),
             "Veggies": int(input_data["veggies"]),
             "HvyAlcoholConsump": int(input_data["heavy_alcohol"]),
-            "AnyHealthcare": 1,  # Assume has healthcare
-            "NoDocbcCost": 0,  # Assume no cost barrier
             "GenHlth": input_data["general_health"],
             "MentHlth": input_data["mental_health"],
             "PhysHlth": input_data["physical_health"],
             "DiffWalk": int(input_data["difficulty_walking"]),
             "Sex": 1 if input_data["sex"] == "male" else 0,
             "Age": self.get_age_category(input_data["age"]),
-            "Education": 5,  # Default to college graduate
-            "Income": 7,  # Default to middle income
+            **DEFAULT_FEATURE_VALUES,
         }
         
         # Order features according to model training
         feature_vector = [features[name] for name in FEATURE_ORDER]
         
         return np.array(feature_vector).reshape(1, -1)
+
+    def prepare_bmi_grid(
+        self,
+        input_data: dict[str, Any],
+        bmi: np.ndarray
+    ) -> np.ndarray:
+        """
+        Build the feature matrix of one input at many BMI values.
+        
+        Args:
+            input_data: Validated user input
+            bmi: BMI for each row of the grid
+        
+        Returns:
+            NumPy array of shape (len(bmi), n_features) in model order;
+            rows differ only in the BMI column
+        """
+        features = self.prepare_features(input_data, 0.0).astype(np.float64)
+        grid = np.repeat(features, len(bmi), axis=0)
+        grid[:, BMI_FEATURE_INDEX] = bmi
+        return grid
+    
+    def get_age_category_batch(self, ages: np.ndarray) -> np.ndarray:
+        """
+        Vectorized version of get_age_category.
+        
+        Args:
+            ages: Array of ages in years
+        
+        Returns:
+            Integer array of age categories (1-13)
+        """
+        ages = np.asarray(ages)
+        categories = np.searchsorted(_AGE_CATEGORY_LOWER_BOUNDS, ages, side="right")
+        out_of_range = (ages < _AGE_CATEGORY_MIN) | (ages > _AGE_CATEGORY_MAX)
+        return np.where(out_of_range, 13, categories)  # 80+ fallback
+    
+    def prepare_features_batch(
+        self,
+        input_rows: list[dict[str, Any]],
+        bmi: np.ndarray
+    ) -> np.ndarray:
+        """
+        Transform many inputs into a feature matrix in one columnar pass.
+        
+        Produces the same values as stacking prepare_features() for every
+        row, but fills each column with NumPy instead of building a dict
+        per row.
+        
+        Args:
+            input_rows: Validated user inputs
+            bmi: Calculated BMI per row
+        
+        Returns:
+            NumPy array of shape (n_rows, n_features) in model order
+        """
+        n_rows = len(input_rows)
+        features = np.empty((n_rows, len(FEATURE_ORDER)), dtype=np.float64)
+        
+        def column(field: str) -> np.ndarray:
+            return np.fromiter(
+                (row[field] for row in input_rows), dtype=np.float64, count=n_rows
+            )
+        
+        for name, field in BOOLEAN_FEATURE_FIELDS.items():
+            features[:, _FEATURE_INDEX[name]] = column(field)
+        for name, field in INTEGER_FEATURE_FIELDS.items():
+            features[:, _FEATURE_INDEX[name]] = column(field)
+        for name, value in DEFAULT_FEATURE_VALUES.items():
+            features[:, _FEATURE_INDEX[name]] = value
+        
+        features[:, BMI_FEATURE_INDEX] = bmi
+        features[:, _FEATURE_INDEX["Sex"]] = np.fromiter(
+            (row["sex"] == "male" for row in input_rows),
+            dtype=np.float64,
+            count=n_rows
+        )
+        features[:, _FEATURE_INDEX["Age"]] = self.get_age_category_batch(column("age"))
+        
+        return features
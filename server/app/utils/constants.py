@@ -42,6 +42,39 @@ FEATURE_ORDER = [
     "Income",
 ]
 
+# Index of the only continuous feature (BMI) within FEATURE_ORDER
+BMI_FEATURE_INDEX = FEATURE_ORDER.index("BMI")
+
+# Model features not collected by the API, filled with fixed values
+DEFAULT_FEATURE_VALUES = {
+    "CholCheck": 1,  # Assume cholesterol check done
+    "AnyHealthcare": 1,  # Assume has healthcare
+    "NoDocbcCost": 0,  # Assume no cost barrier
+    "Education": 5,  # Default to college graduate
+    "Income": 7,  # Default to middle income
+}
+
+# Model features taken directly from boolean API fields
+BOOLEAN_FEATURE_FIELDS = {
+    "HighBP": "high_bp",
+    "HighChol": "high_chol",
+    "Smoker": "smoker",
+    "Stroke": "stroke",
+    "HeartDiseaseorAttack": "heart_disease",
+    "PhysActivity": "phys_activity",
+    "Fruits": "fruits",
+    "Veggies": "veggies",
+    "HvyAlcoholConsump": "heavy_alcohol",
+    "DiffWalk": "difficulty_walking",
+}
+
+# Model features taken directly from integer API fields
+INTEGER_FEATURE_FIELDS = {
+    "GenHlth": "general_health",
+    "MentHlth": "mental_health",
+    "PhysHlth": "physical_health",
+}
+
 # Age category mapping (BRFSS format)
 # Category: (min_age, max_age)
 AGE_CATEGORIES = {
@@ -68,6 +101,9 @@ BMI_CATEGORIES = {
     "Obese": (30, 100),
 }
 
+# Default BMI range of /predict/risk-curve (also bounds weight curves)
+RISK_CURVE_BMI_RANGE = (15.0, 45.0)
+
 # General health mapping
 # 1 = Excellent, 2 = Very Good, 3 = Good, 4 = Fair, 5 = Poor
 GENERAL_HEALTH_LABELS = {
@@ -0,0 +1,535 @@
+"""
+Metrics - Multiprocess Counters and Histograms
+
+Low-overhead counters and fixed-bucket histograms for the request
+pipeline, rendered in the Prometheus text exposition format.
+
+Each process only ever adds to its own values. With METRICS_DIR set they
+live in a memory-mapped file per process (named by pid and start time,
+so a reused pid never takes over an exited worker's file) and /metrics sums
+every file in the directory, so totals cover all gunicorn workers no
+matter which worker answers the scrape. Without METRICS_DIR values are
+kept in memory and only cover the current process.
+
+prometheus_client's multiprocess mode does the same aggregation, but it
+reads PROMETHEUS_MULTIPROC_DIR once at import and must not be mixed with
+its single-process registry. Here the store follows the Flask config
+(configure() from create_app, no-op when METRICS_ENABLED is off, per-test
+directories), and the service needs only counters and histograms, so it
+stays free of another runtime dependency.
+"""
+import json
+import math
+import mmap
+import os
+import struct
+import threading
+import time
+from abc import ABC, abstractmethod
+from bisect import bisect_left
+from pathlib import Path
+
+# File layout: an 8-byte count of used bytes, then entries of
+# (uint32 key length, UTF-8 key padded to 8 bytes, float64 value)
+_USED = struct.Struct("<Q")
+_KEY_LENGTH = struct.Struct("<I")
+_VALUE = struct.Struct("<d")
+_INITIAL_FILE_SIZE = 64 * 1024
+
+FILE_PATTERN = "metrics_*.db"
+
+
+class _MemoryValues:
+    """Values of the current process, kept in a dict."""
+    
+    def __init__(self):
+        """Initialize an empty store."""
+        self._values: dict[str, float] = {}
+        self._lock = threading.Lock()
+    
+    def add(self, key: str, amount: float) -> None:
+        """Add an amount to the value stored under a key."""
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+    
+    def observe(self, bucket_key: str, sum_key: str, count_key: str, value: float) -> None:
+        """Record a histogram observation under one lock."""
+        values = self._values
+        with self._lock:
+            values[bucket_key] = values.get(bucket_key, 0.0) + 1.0
+            values[sum_key] = values.get(sum_key, 0.0) + value
+            values[count_key] = values.get(count_key, 0.0) + 1.0
+    
+    def totals(self) -> dict[str, float]:
+        """Snapshot of every value."""
+        with self._lock:
+            return dict(self._values)
+
+
+class _FileValues:
+    """Values of the current process, in a memory-mapped file only it writes."""
+    
+    def __init__(self, path: Path):
+        """
+        Create the value file for this process.
+        
+        Args:
+            path: File to write, unique to the process
+        
+        Raises:
+            FileExistsError: If the file already exists
+        """
+        self.path = path
+        self._lock = threading.Lock()
+        # Key -> index of its value in the file viewed as float64s
+        self._indexes: dict[str, int] = {}
+        # Exclusive create: truncating another process's file would make
+        # the summed counters go backwards
+        self._file = open(path, "x+b")
+        self._file.truncate(_INITIAL_FILE_SIZE)
+        self._map = mmap.mmap(self._file.fileno(), _INITIAL_FILE_SIZE)
+        self._values = memoryview(self._map).cast("d")
+        self._used = _USED.size
+        _USED.pack_into(self._map, 0, self._used)
+    
+    def _index(self, key: str) -> int:
+        """Index of a key's value, appending an entry for a new key."""
+        index = self._indexes.get(key)
+        if index is None:
+            index = self._indexes[key] = self._append(key) // _VALUE.size
+        return index
+    
+    def add(self, key: str, amount: float) -> None:
+        """Add an amount to the value stored under a key."""
+        with self._lock:
+            # Resolve the index first: a new key may remap the file
+            index = self._index(key)
+            self._values[index] += amount
+    
+    def observe(self, bucket_key: str, sum_key: str, count_key: str, value: float) -> None:
+        """Record a histogram observation under one lock."""
+        with self._lock:
+            bucket = self._index(bucket_key)
+            total = self._index(sum_key)
+            count = self._index(count_key)
+            values = self._values
+            values[bucket] += 1.0
+            values[total] += value
+            values[count] += 1.0
+    
+    def _append(self, key: str) -> int:
+        """Write a zero-valued entry for a new key and return its byte offset."""
+        encoded = key.encode()
+        padded = _KEY_LENGTH.size + len(encoded)
+        padded += -padded % 8
+        size = padded + _VALUE.size
+        if self._used + size > len(self._map):
+            self._grow(self._used + size)
+        
+        _KEY_LENGTH.pack_into(self._map, self._used, len(encoded))
+        start = self._used + _KEY_LENGTH.size
+        self._map[start:start + len(encoded)] = encoded
+        offset = self._used + padded
+        _VALUE.pack_into(self._map, offset, 0.0)
+        
+        # Publish the entry to readers only once it is fully written
+        self._used += size
+        _USED.pack_into(self._map, 0, self._used)
+        return offset
+    
+    def _grow(self, needed: int) -> None:
+        """Double the file until it holds at least needed bytes."""
+        capacity = len(self._map)
+        while capacity < needed:
+            capacity *= 2
+        self._values.release()
+        self._map.close()
+        self._file.truncate(capacity)
+        self._map = mmap.mmap(self._file.fileno(), capacity)
+        self._values = memoryview(self._map).cast("d")
+    
+    def totals(self) -> dict[str, float]:
+        """Snapshot of every value."""
+        return read_values(self.path)
+
+
+def read_values(path: Path) -> dict[str, float]:
+    """
+    Read every value from a process's metrics file.
+    
+    Args:
+        path: File written by a (possibly exited) process
+    
+    Returns:
+        Dictionary mapping sample keys to values
+    """
+    data = path.read_bytes()
+    if len(data) < _USED.size:
+        return {}
+    
+    (used,) = _USED.unpack_from(data, 0)
+    used = min(used, len(data))
+    values = {}
+    position = _USED.size
+    while position + _KEY_LENGTH.size <= used:
+        (length,) = _KEY_LENGTH.unpack_from(data, position)
+        start = position + _KEY_LENGTH.size
+        key = data[start:start + length].decode()
+        padded = _KEY_LENGTH.size + length
+        padded += -padded % 8
+        (value,) = _VALUE.unpack_from(data, position + padded)
+        values[key] = values.get(key, 0.0) + value
+        position += padded + _VALUE.size
+    return values
+
+
+# Where this process records values; None when metrics are disabled
+_store: _MemoryValues | _FileValues | None = _MemoryValues()
+_directory: Path | None = None
+
+
+def configure(enabled: bool = True, directory: str | None = None) -> None:
+    """
+    Choose where this process records metrics.
+    
+    Calling again with the same settings keeps the current values.
+    
+    Args:
+        enabled: False turns every metric into a no-op
+        directory: Shared directory for multiprocess aggregation (None or
+            empty keeps values in memory for this process only)
+    """
+    global _store, _directory
+    
+    path = Path(directory) if enabled and directory else None
+    if not enabled:
+        _store = None
+    elif path != _directory or _store is None:
+        _store = _open_store(path)
+    _directory = path
+
+
+def _open_store(directory: Path | None) -> _MemoryValues | _FileValues:
+    """Create an empty store for the current process."""
+    if directory is None:
+        return _MemoryValues()
+    directory.mkdir(parents=True, exist_ok=True)
+    return _FileValues(directory / f"metrics_{os.getpid()}_{time.time_ns()}.db")
+
+
+def store_path() -> Path | None:
+    """
+    Get the file this process records metrics in.
+    
+    Returns:
+        Path of the value file, None without METRICS_DIR
+    """
+    return _store.path if isinstance(_store, _FileValues) else None
+
+
+def _reset_after_fork() -> None:
+    """Give a forked worker its own empty store; the parent keeps its values."""
+    global _store
+    if _store is not None:
+        _store = _open_store(_directory)
+
+
+os.register_at_fork(after_in_child=_reset_after_fork)
+
+
+def collect() -> dict[str, float]:
+    """
+    Sum the values of every process sharing the metrics directory.
+    
+    Files of exited workers are included, so counters never go backwards
+    when a worker is replaced.
+    
+    Returns:
+        Dictionary mapping sample keys to totals
+    """
+    if _store is None:
+        return {}
+    if _directory is None:
+        return _store.totals()
+    
+    totals: dict[str, float] = {}
+    for path in sorted(_directory.glob(FILE_PATTERN)):
+        for key, value in read_values(path).items():
+            totals[key] = totals.get(key, 0.0) + value
+    return totals
+
+
+def _sample_key(name: str, suffix: str, labels: dict[str, str]) -> str:
+    """Encode a sample as the key it is stored under."""
+    return json.dumps([name, suffix, labels], separators=(",", ":"))
+
+
+def _format_value(value: float) -> str:
+    """Format a number for the text exposition format."""
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    return repr(float(value))
+
+
+def _format_labels(labels: dict[str, str]) -> str:
+    """Format a label set as {name="value",...}."""
+    if not labels:
+        return ""
+    escaped = (
+        (name, value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"'))
+        for name, value in labels.items()
+    )
+    return "{" + ",".join(f'{name}="{value}"' for name, value in escaped) + "}"
+
+
+class _Metric(ABC):
+    """Base class for a metric family with optional labels."""
+    
+    type_name = ""
+    
+    def __init__(self, name: str, documentation: str, labelnames: tuple[str, ...] = ()):
+        """
+        Define a metric family and register it for /metrics.
+        
+        Args:
+            name: Prometheus metric name
+            documentation: HELP text
+            labelnames: Names of the labels every sample carries
+        """
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._children: dict[tuple[str, ...], object] = {}
+        self._lock = threading.Lock()
+        REGISTRY.append(self)
+    
+    def labels(self, **labels):
+        """
+        Get the child for one combination of label values.
+        
+        Bind children once at import time on hot paths.
+        
+        Returns:
+            Child with inc() or observe() for the label values
+        """
+        values = tuple(str(labels[name]) for name in self.labelnames)
+        child = self._children.get(values)
+        if child is None:
+            with self._lock:
+                child = self._children.get(values)
+                if child is None:
+                    child = self._make_child(dict(zip(self.labelnames, values, strict=True)))
+                    self._children[values] = child
+        return child
+    
+    @abstractmethod
+    def _make_child(self, labels: dict[str, str]):
+        """
+        Create the child recording samples for one label combination.
+        
+        Args:
+            labels: Label names mapped to their values
+        
+        Returns:
+            Child exposing the family's recording method (inc or observe)
+        """
+    
+    @abstractmethod
+    def render(self, samples: list[tuple[str, dict[str, str], float]]) -> list[str]:
+        """
+        Format the family's collected samples as exposition lines.
+        
+        Args:
+            samples: (sample name, labels, value) triples summed over processes
+        
+        Returns:
+            Sample lines (render() adds the HELP and TYPE lines)
+        """
+
+
+class _CounterChild:
+    """Counter for one label combination."""
+    
+    __slots__ = ("_key",)
+    
+    def __init__(self, key: str):
+        self._key = key
+    
+    def inc(self, amount: float = 1.0) -> None:
+        """Increase the counter."""
+        store = _store
+        if store is not None:
+            store.add(self._key, amount)
+
+
+class Counter(_Metric):
+    """Monotonic counter."""
+    
+    type_name = "counter"
+    
+    def _make_child(self, labels: dict[str, str]) -> _CounterChild:
+        """Create the counter for one label combination."""
+        return _CounterChild(_sample_key(self.name, "", labels))
+    
+    def render(self, samples: list[tuple[str, dict[str, str], float]]) -> list[str]:
+        """Format the family's collected samples as exposition lines."""
+        return [
+            f"{self.name}{_format_labels(labels)} {_format_value(value)}"
+            for _, labels, value in sorted(samples, key=lambda sample: sorted(sample[1].items()))
+        ]
+
+
+class _Timer:
+    """Context manager observing the elapsed seconds into a histogram."""
+    
+    __slots__ = ("_child", "_started")
+    
+    def __init__(self, child: "_HistogramChild"):
+        self._child = child
+    
+    def __enter__(self) -> "_Timer":
+        self._started = time.perf_counter()
+        return self
+    
+    def __exit__(self, *exc_info) -> None:
+        self._child.observe(time.perf_counter() - self._started)
+
+
+class _HistogramChild:
+    """Histogram for one label combination."""
+    
+    __slots__ = ("_bounds", "_bucket_keys", "_sum_key", "_count_key")
+    
+    def __init__(self, name: str, labels: dict[str, str], bounds: tuple[float, ...]):
+        self._bounds = bounds
+        # Buckets are stored non-cumulatively; render() accumulates them
+        self._bucket_keys = [
+            _sample_key(name, "_bucket", {**labels, "le": _format_value(bound)})
+            for bound in bounds
+        ]
+        self._sum_key = _sample_key(name, "_sum", labels)
+        self._count_key = _sample_key(name, "_count", labels)
+    
+    def observe(self, value: float) -> None:
+        """Record one observation."""
+        store = _store
+        if store is not None:
+            store.observe(
+                self._bucket_keys[bisect_left(self._bounds, value)],
+                self._sum_key,
+                self._count_key,
+                value
+            )
+    
+    def time(self) -> _Timer:
+        """Time a block of code: `with child.time(): ...`."""
+        return _Timer(self)
+
+
+class Histogram(_Metric):
+    """Histogram with fixed upper bucket bounds."""
+    
+    type_name = "histogram"
+    
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: tuple[str, ...] = (),
+        buckets: tuple[float, ...] = ()
+    ):
+        """
+        Define a histogram family.
+        
+        Args:
+            name: Prometheus metric name
+            documentation: HELP text
+            labelnames: Names of the labels every sample carries
+            buckets: Increasing upper bounds; +Inf is always added
+        """
+        super().__init__(name, documentation, labelnames)
+        bounds = sorted(float(bound) for bound in buckets)
+        if not bounds or bounds[-1] != math.inf:
+            bounds.append(math.inf)
+        self.bounds = tuple(bounds)
+    
+    def _make_child(self, labels: dict[str, str]) -> _HistogramChild:
+        """Create the histogram for one label combination."""
+        return _HistogramChild(self.name, labels, self.bounds)
+    
+    def render(self, samples: list[tuple[str, dict[str, str], float]]) -> list[str]:
+        """Format the family's collected samples as exposition lines."""
+        series: dict[tuple, dict[str, float]] = {}
+        for suffix, labels, value in samples:
+            le = labels.pop("le", None)
+            values = series.setdefault(tuple(sorted(labels.items())), {})
+            values[le if suffix == "_bucket" else suffix] = value
+        
+        lines = []
+        for label_items, values in sorted(series.items()):
+            labels = dict(label_items)
+            cumulative = 0.0
+            for bound in self.bounds:
+                le = _format_value(bound)
+                cumulative += values.get(le, 0.0)
+                bucket_labels = _format_labels({**labels, "le": le})
+                lines.append(f"{self.name}_bucket{bucket_labels} {_format_value(cumulative)}")
+            formatted = _format_labels(labels)
+            lines.append(f"{self.name}_sum{formatted} {_format_value(values.get('_sum', 0.0))}")
+            lines.append(f"{self.name}_count{formatted} {_format_value(values.get('_count', 0.0))}")
+        return lines
+
+
+REGISTRY: list[_Metric] = []
+
+
+def render() -> str:
+    """
+    Render every registered metric in the Prometheus text format.
+    
+    Returns:
+        Exposition text (version 0.0.4) summed over all processes
+    """
+    samples: dict[str, list[tuple[str, dict[str, str], float]]] = {}
+    for key, value in collect().items():
+        name, suffix, labels = json.loads(key)
+        samples.setdefault(name, []).append((suffix, labels, value))
+    
+    lines = []
+    for metric in REGISTRY:
+        lines.append(f"# HELP {metric.name} {metric.documentation}")
+        lines.append(f"# TYPE {metric.name} {metric.type_name}")
+        lines.extend(metric.render(samples.get(metric.name, [])))
+    return "\n".join(lines) + "\n"
+
+
+# Content type of render() output
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# Stage timings are tens of microseconds, so buckets start at 10us
+STAGE_BUCKETS = (
+    0.00001, 0.000025, 0.00005, 0.0001, 0.00025, 0.0005,
+    0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0,
+)
+
+PREDICT_STAGE_SECONDS = Histogram(
+    "diabetes_predict_stage_seconds",
+    "Seconds spent in each stage of a /predict request.",
+    ("stage",),
+    STAGE_BUCKETS
+)
+PREDICTIONS = Counter(
+    "diabetes_predictions_total",
+    "Assessments scored, by model version.",
+    ("model_version",)
+)
+CACHE_LOOKUPS = Counter(
+    "diabetes_cache_lookups_total",
+    "Prediction cache lookups, by cache and hit or miss.",
+    ("cache", "result")
+)
+ERRORS = Counter(
+    "diabetes_errors_total",
+    "Error responses, by error handler.",
+    ("handler",)
+)
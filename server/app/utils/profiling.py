@@ -0,0 +1,153 @@
+"""
+Profiling - On-demand Per-request Profiles
+
+WSGI middleware that runs a single request under cProfile when it carries
+the X-Profile-Token header with the configured PROFILING_TOKEN. The
+profile is saved under an ID returned in the X-Profile-Id response header
+and can be fetched from any worker with GET /profiles/<id>.
+
+The middleware is only installed when a token is configured, and an
+unprofiled request costs one header lookup.
+"""
+import cProfile
+import hmac
+import io
+import pstats
+import re
+import time
+import uuid
+from contextvars import ContextVar
+from pathlib import Path
+
+PROFILE_HEADER = "X-Profile-Token"
+PROFILE_ID_HEADER = "X-Profile-Id"
+
+# Profile IDs are uuid4 hex strings; anything else is never a file name
+PROFILE_ID_PATTERN = re.compile(r"[0-9a-f]{32}")
+
+# Fetching a saved profile is never profiled itself
+PROFILES_PATH_PREFIX = "/profiles/"
+
+_ENVIRON_KEY = "HTTP_" + PROFILE_HEADER.upper().replace("-", "_")
+
+# True while the current request is being profiled
+_profiling: ContextVar[bool] = ContextVar("profiling", default=False)
+
+
+def active() -> bool:
+    """
+    Check whether the current request is being profiled.
+    
+    Profiled requests skip prediction caches and micro-batching, which
+    return identical results, so the profile covers the model itself.
+    
+    Returns:
+        True inside a profiled request
+    """
+    return _profiling.get()
+
+
+class ProfilingMiddleware:
+    """WSGI middleware profiling requests that present the profiling token."""
+    
+    def __init__(self, wsgi_app, token: str, directory: str | Path, top_n: int, keep: int):
+        """
+        Wrap a WSGI application.
+        
+        Args:
+            wsgi_app: Application to call
+            token: Secret the X-Profile-Token header must match
+            directory: Where profiles are saved (shared by all workers)
+            top_n: Functions listed in the text report
+            keep: Newest profiles kept on disk
+        """
+        self.wsgi_app = wsgi_app
+        self.token = token.encode()
+        self.directory = Path(directory)
+        self.top_n = top_n
+        self.keep = keep
+    
+    def __call__(self, environ, start_response):
+        """Call the app, under the profiler if the request asks for it."""
+        provided = environ.get(_ENVIRON_KEY)
+        if provided is None:
+            return self.wsgi_app(environ, start_response)
+        
+        if not hmac.compare_digest(provided.encode(), self.token):
+            start_response("401 UNAUTHORIZED", [("Content-Type", "application/json")])
+            return [b'{"error":"Unauthorized","message":"Invalid X-Profile-Token"}\n']
+        if environ.get("PATH_INFO", "").startswith(PROFILES_PATH_PREFIX):
+            return self.wsgi_app(environ, start_response)
+        
+        profile_id = uuid.uuid4().hex
+        status_line = []
+        
+        def profiled_start_response(status, headers, exc_info=None):
+            status_line.append(status)
+            headers.append((PROFILE_ID_HEADER, profile_id))
+            return start_response(status, headers, exc_info)
+        
+        profiler = cProfile.Profile()
+        token = _profiling.set(True)
+        started = time.perf_counter()
+        profiler.enable()
+        try:
+            # Drain the body so work done while streaming is profiled too
+            iterable = self.wsgi_app(environ, profiled_start_response)
+            try:
+                body = list(iterable)
+            finally:
+                if hasattr(iterable, "close"):
+                    iterable.close()
+        finally:
+            profiler.disable()
+            elapsed = time.perf_counter() - started
+            _profiling.reset(token)
+        
+        summary = (
+            f"{environ.get('REQUEST_METHOD', '')} {environ.get('PATH_INFO', '')} "
+            f"-> {status_line[0] if status_line else 'no response'} "
+            f"in {elapsed * 1000:.2f} ms"
+        )
+        self._save(profile_id, profiler, summary)
+        return body
+    
+    def _save(self, profile_id: str, profiler: cProfile.Profile, summary: str) -> None:
+        """Write the text report and raw pstats, then prune old profiles."""
+        self.directory.mkdir(parents=True, exist_ok=True)
+        profiler.dump_stats(self.directory / f"{profile_id}.prof")
+        
+        report = io.StringIO()
+        report.write(f"Profile {profile_id}\n{summary}\n\n")
+        stats = pstats.Stats(profiler, stream=report)
+        stats.sort_stats(pstats.SortKey.CUMULATIVE).print_stats(self.top_n)
+        (self.directory / f"{profile_id}.txt").write_text(report.getvalue())
+        
+        try:
+            reports = sorted(
+                self.directory.glob("*.txt"), key=lambda path: path.stat().st_mtime_ns
+            )
+        except FileNotFoundError:
+            # Another worker is pruning at the same time
+            return
+        for path in reports[:max(len(reports) - self.keep, 0)]:
+            path.unlink(missing_ok=True)
+            path.with_suffix(".prof").unlink(missing_ok=True)
+
+
+def profile_path(directory: str | Path, profile_id: str, raw: bool = False) -> Path | None:
+    """
+    Locate a saved profile.
+    
+    Args:
+        directory: Profile directory
+        profile_id: ID from the X-Profile-Id header
+        raw: True for the pstats file instead of the text report
+    
+    Returns:
+        Path of the saved file, or None if the ID is unknown or malformed
+    """
+    if not PROFILE_ID_PATTERN.fullmatch(profile_id):
+        return None
+    path = Path(directory) / f"{profile_id}.{'prof' if raw else 'txt'}"
+    return path if path.is_file() else None
@@ -0,0 +1,52 @@
+"""
+Warm-up - Deferred Loading of the Prediction Stack
+
+create_app only imports what every request needs. The prediction routes,
+with marshmallow, NumPy and the model layer behind them, and the model
+itself are loaded here: from create_app by default, or by the first
+request that needs them when MODEL_LAZY_LOAD is set.
+"""
+import importlib
+import threading
+
+from flask import Flask
+
+# Key in app.extensions marking an app as warmed up
+_EXTENSION_KEY = "warmed_up"
+
+_lock = threading.Lock()
+
+
+def warm_up(app: Flask) -> None:
+    """
+    Import the prediction stack and load the model, once per app.
+    
+    The model is loaded on this thread, or started on a background thread
+    with MODEL_BACKGROUND_LOAD. The artifact watcher is started when
+    MODEL_RELOAD_INTERVAL is set. Later calls return immediately.
+    
+    Args:
+        app: Flask application whose config locates the artifact
+    """
+    if app.extensions.get(_EXTENSION_KEY):
+        return
+    
+    with _lock:
+        if app.extensions.get(_EXTENSION_KEY):
+            return
+        
+        importlib.import_module("app.api.prediction_routes")
+        
+        with app.app_context():
+            from app.models.ml_model import DiabetesModel
+            if app.config["MODEL_BACKGROUND_LOAD"]:
+                model = DiabetesModel()
+                model.start_background_load(app)
+            else:
+                model = DiabetesModel.get_instance()
+            
+            # Pick up newly trained artifacts without restarting workers
+            if app.config["MODEL_RELOAD_INTERVAL"] > 0:
+                model.start_watcher(app, app.config["MODEL_RELOAD_INTERVAL"])
+        
+        app.extensions[_EXTENSION_KEY] = True
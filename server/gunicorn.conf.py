@@ -0,0 +1,35 @@
+"""
+Gunicorn Configuration
+
+Picked up automatically by `gunicorn run:app` from the server directory.
+"""
+import gc
+import os
+import sys
+from pathlib import Path
+
+# Load the app (and model) once in the master before forking, so workers
+# share the model's memory copy-on-write instead of each loading their own
+preload_app = os.environ.get("GUNICORN_PRELOAD", "False").lower() == "true"
+
+# Workers record metrics in per-process files here; /metrics sums them
+metrics_dir = os.environ.get("METRICS_DIR", "")
+
+
+def on_starting(server):
+    """Drop metrics files left by a previous run so counters start at zero."""
+    if metrics_dir:
+        # With preload the master has already opened its own file
+        metrics = sys.modules.get("app.utils.metrics")
+        own_file = metrics.store_path() if metrics is not None else None
+        for path in Path(metrics_dir).glob("metrics_*.db"):
+            if path != own_file:
+                path.unlink()
+
+
+def when_ready(server):
+    """Freeze objects created during preload so GC never writes to them."""
+    if preload_app:
+        # Moving preloaded objects to the permanent generation keeps the
+        # collector from touching their pages, which would un-share them
+        gc.freeze()
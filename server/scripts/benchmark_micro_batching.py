@@ -0,0 +1,138 @@
+"""
+Micro-batching Benchmark
+
+Drives concurrent /predict requests through the Flask app with
+micro-batching off and on, and reports latency percentiles and throughput.
+"""
+import argparse
+import random
+import sys
+import threading
+import time
+from pathlib import Path
+
+import numpy as np
+
+# Paths
+BASE_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(BASE_DIR))
+
+from app import create_app  # noqa: E402
+from app.config import Config  # noqa: E402
+from app.models.ml_model import DiabetesModel  # noqa: E402
+
+
+def make_payload(rng: random.Random) -> dict:
+    """Generate a random valid /predict payload."""
+    return {
+        "age": rng.randint(18, 90),
+        "sex": rng.choice(["male", "female"]),
+        "weight": round(rng.uniform(45, 140), 1),
+        "height": round(rng.uniform(150, 200), 1),
+        "high_bp": rng.random() < 0.5,
+        "high_chol": rng.random() < 0.5,
+        "smoker": rng.random() < 0.4,
+        "stroke": rng.random() < 0.05,
+        "heart_disease": rng.random() < 0.1,
+        "phys_activity": rng.random() < 0.7,
+        "fruits": rng.random() < 0.6,
+        "veggies": rng.random() < 0.8,
+        "heavy_alcohol": rng.random() < 0.05,
+        "general_health": rng.randint(1, 5),
+        "mental_health": rng.randint(0, 30),
+        "physical_health": rng.randint(0, 30),
+        "difficulty_walking": rng.random() < 0.2,
+    }
+
+
+def build_app(batching: bool, engine: str, window_ms: float, max_rows: int):
+    """Create an app with caches disabled and batching toggled."""
+    class BenchmarkConfig(Config):
+        DEBUG = False
+        MODEL_ENGINE = engine
+        PREDICTION_CACHE_SIZE = 0
+        BMI_CURVE_CACHE_SIZE = 0
+        MICRO_BATCH_ENABLED = batching
+        MICRO_BATCH_WINDOW_MS = window_ms
+        MICRO_BATCH_MAX_ROWS = max_rows
+    
+    app = create_app(BenchmarkConfig)
+    with app.app_context():
+        DiabetesModel.get_instance()._load_model()
+    return app
+
+
+def run_load(app, concurrency: int, requests_per_thread: int) -> dict:
+    """
+    Send requests from concurrent threads and collect latencies.
+    
+    Returns:
+        Dictionary with p50/p99 latency (ms) and throughput (req/s)
+    """
+    latencies = []
+    lock = threading.Lock()
+    start_barrier = threading.Barrier(concurrency)
+    
+    def worker(seed: int):
+        rng = random.Random(seed)
+        client = app.test_client()
+        payloads = [make_payload(rng) for _ in range(requests_per_thread)]
+        local = []
+        start_barrier.wait()
+        for payload in payloads:
+            started = time.perf_counter()
+            response = client.post("/predict", json=payload)
+            local.append(time.perf_counter() - started)
+            assert response.status_code == 200
+        with lock:
+            latencies.extend(local)
+    
+    threads = [
+        threading.Thread(target=worker, args=(seed,)) for seed in range(concurrency)
+    ]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+    
+    latencies_ms = np.array(latencies) * 1000
+    return {
+        "p50_ms": float(np.percentile(latencies_ms, 50)),
+        "p99_ms": float(np.percentile(latencies_ms, 99)),
+        "throughput_rps": len(latencies) / elapsed,
+    }
+
+
+def main():
+    """Run the benchmark with batching off and on."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 8, 32])
+    parser.add_argument("--requests", type=int, default=50, help="Requests per thread")
+    parser.add_argument("--engine", default="sklearn", choices=["sklearn", "compiled"])
+    parser.add_argument("--window-ms", type=float, default=2.0)
+    parser.add_argument("--max-rows", type=int, default=64)
+    args = parser.parse_args()
+    
+    print("="*60)
+    print("MICRO-BATCHING BENCHMARK")
+    print("="*60)
+    print(f"Engine: {args.engine}, window: {args.window_ms} ms, max rows: {args.max_rows}")
+    
+    print("\nThreads | Batching |  p50 ms |  p99 ms |  req/s")
+    print("-" * 50)
+    for concurrency in args.concurrency:
+        for batching in (False, True):
+            app = build_app(batching, args.engine, args.window_ms, args.max_rows)
+            run_load(app, concurrency, min(args.requests, 5))  # warm-up
+            result = run_load(app, concurrency, args.requests)
+            print(
+                f"  {concurrency:4d}  |   {'on ' if batching else 'off'}    | "
+                f"{result['p50_ms']:7.2f} | {result['p99_ms']:7.2f} | "
+                f"{result['throughput_rps']:6.1f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,360 @@
+"""
+Prediction Stack Benchmark Suite
+
+Times each layer of the prediction stack on fixed synthetic inputs:
+feature building, the model (single rows and batches of 10 to 10k rows),
+PredictionService.predict end to end and /predict through the Flask test
+client. Results are written to JSON, and `compare` fails when a benchmark
+is slower than a stored baseline by more than a threshold.
+
+Caches and micro-batching are disabled so every call does the full work.
+
+Usage:
+    python scripts/benchmark_suite.py run --output results.json
+    python scripts/benchmark_suite.py run --save-baseline
+    python scripts/benchmark_suite.py run --compare --threshold 10
+    python scripts/benchmark_suite.py compare baseline.json results.json
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+from datetime import UTC, datetime
+from pathlib import Path
+
+import numpy as np
+
+# Paths
+BASE_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(BASE_DIR))
+
+from app import create_app  # noqa: E402
+from app.config import Config  # noqa: E402
+from app.models.ml_model import probe_features  # noqa: E402
+from app.services.prediction_service import PredictionService  # noqa: E402
+
+RESULTS_FORMAT = 1
+DEFAULT_BASELINE = BASE_DIR / "artifacts" / "benchmark_baseline.json"
+
+BATCH_SIZES = (10, 100, 1000, 10000)
+SINGLE_ROWS = 64
+PAYLOAD_ROWS = 256
+
+
+def synthetic_payloads(n_rows: int, seed: int = 0) -> list[dict]:
+    """
+    Generate validated /predict inputs (the same seed gives the same rows).
+    
+    Args:
+        n_rows: Number of payloads
+        seed: Random seed
+    
+    Returns:
+        List of request dictionaries with loaded (typed) values
+    """
+    rng = np.random.default_rng(seed)
+    flags = rng.random((n_rows, 11)) < 0.4
+    flag_fields = (
+        "high_bp", "high_chol", "smoker", "stroke", "heart_disease", "phys_activity",
+        "fruits", "veggies", "heavy_alcohol", "difficulty_walking", "_male"
+    )
+    payloads = []
+    for row in range(n_rows):
+        payload = {
+            "age": int(rng.integers(18, 91)),
+            "weight": round(float(rng.uniform(45, 140)), 1),
+            "height": round(float(rng.uniform(150, 200)), 1),
+            "general_health": int(rng.integers(1, 6)),
+            "mental_health": int(rng.integers(0, 31)),
+            "physical_health": int(rng.integers(0, 31)),
+        }
+        payload.update(zip(flag_fields, flags[row].tolist(), strict=True))
+        payload["sex"] = "male" if payload.pop("_male") else "female"
+        payloads.append(payload)
+    return payloads
+
+
+def time_case(function, rows_per_call: int, repeat: int, min_time: float) -> dict:
+    """
+    Time a callable with an automatically chosen number of calls.
+    
+    Args:
+        function: Zero-argument callable doing one unit of work
+        rows_per_call: Rows the callable processes per call
+        repeat: Timing repetitions (the best is the headline figure)
+        min_time: Minimum seconds per repetition
+    
+    Returns:
+        Dictionary of timings for the case
+    """
+    function()  # warm up
+    number = 1
+    while True:
+        started = time.perf_counter()
+        for _ in range(number):
+            function()
+        if time.perf_counter() - started >= min_time:
+            break
+        number *= 2
+    
+    per_call = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        for _ in range(number):
+            function()
+        per_call.append((time.perf_counter() - started) / number * 1e6)
+    
+    best = min(per_call)
+    return {
+        "rows_per_call": rows_per_call,
+        "calls": number,
+        "repeat": repeat,
+        "best_us": round(best, 3),
+        "median_us": round(statistics.median(per_call), 3),
+        "us_per_row": round(best / rows_per_call, 3),
+        "rows_per_sec": round(rows_per_call / best * 1e6, 1),
+    }
+
+
+def build_cases(engine: str):
+    """
+    Create the app and the benchmark callables.
+    
+    Args:
+        engine: MODEL_ENGINE to benchmark
+    
+    Returns:
+        Tuple of (list of (name, callable, rows per call), model version)
+    """
+    class BenchmarkConfig(Config):
+        DEBUG = False
+        MODEL_ENGINE = engine
+        PREDICTION_CACHE_SIZE = 0
+        BMI_CURVE_CACHE_SIZE = 0
+        MICRO_BATCH_ENABLED = False
+        MODEL_BACKGROUND_LOAD = False
+        MODEL_RELOAD_INTERVAL = 0
+        PROFILING_TOKEN = ""
+    
+    app = create_app(BenchmarkConfig)
+    app.app_context().push()
+    client = app.test_client()
+    
+    service = PredictionService()
+    preprocessing = service.preprocessing
+    model = service.model
+    
+    payloads = synthetic_payloads(PAYLOAD_ROWS)
+    bmis = [preprocessing.calculate_bmi(p["weight"], p["height"]) for p in payloads]
+    bmi_array = np.array(bmis)
+    single_rows = [row.reshape(1, -1) for row in probe_features(SINGLE_ROWS, seed=1)]
+    batch = probe_features(max(BATCH_SIZES), seed=2)
+    request_bodies = [json.dumps(payload) for payload in payloads[:SINGLE_ROWS]]
+    
+    def prepare_features():
+        for payload, bmi in zip(payloads, bmis, strict=True):
+            preprocessing.prepare_features(payload, bmi)
+    
+    def prepare_features_batch():
+        preprocessing.prepare_features_batch(payloads, bmi_array)
+    
+    def predict_proba_single():
+        for features in single_rows:
+            model.predict_proba(features)
+    
+    def predict_proba_batch(size):
+        rows = batch[:size]
+        return lambda: model.predict_proba_batch(rows)
+    
+    def service_predict():
+        for payload in payloads[:SINGLE_ROWS]:
+            service.predict(payload)
+    
+    def http_predict():
+        for body in request_bodies:
+            response = client.post("/predict", data=body, content_type="application/json")
+            assert response.status_code == 200, response.data
+    
+    cases = [
+        ("preprocessing.prepare_features", prepare_features, PAYLOAD_ROWS),
+        (f"preprocessing.prepare_features_batch[{PAYLOAD_ROWS}]",
+         prepare_features_batch, PAYLOAD_ROWS),
+        ("model.predict_proba[1]", predict_proba_single, SINGLE_ROWS),
+        *(
+            (f"model.predict_proba_batch[{size}]", predict_proba_batch(size), size)
+            for size in BATCH_SIZES
+        ),
+        ("service.predict", service_predict, SINGLE_ROWS),
+        ("http.predict", http_predict, SINGLE_ROWS),
+    ]
+    return cases, model.version
+
+
+def environment(engine: str, model_version: str) -> dict:
+    """Describe the machine and software the results were measured on."""
+    import sklearn
+    
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=BASE_DIR, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    
+    return {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "numpy": np.__version__,
+        "scikit_learn": sklearn.__version__,
+        "engine": engine,
+        "model_version": model_version,
+        "git_commit": commit,
+    }
+
+
+def run(args) -> int:
+    """Run the suite, write results and optionally compare to a baseline."""
+    cases, model_version = build_cases(args.engine)
+    if args.only:
+        cases = [case for case in cases if any(text in case[0] for text in args.only)]
+    
+    print("="*60)
+    print("PREDICTION STACK BENCHMARKS")
+    print("="*60)
+    print(f"Engine: {args.engine}, model: {model_version}\n")
+    print(f"{'Benchmark':<42} {'us/row':>10} {'rows/s':>12}")
+    print("-" * 66)
+    
+    benchmarks = {}
+    for name, function, rows in cases:
+        result = time_case(function, rows, args.repeat, args.min_time)
+        benchmarks[name] = result
+        print(f"{name:<42} {result['us_per_row']:>10.2f} {result['rows_per_sec']:>12,.0f}")
+    
+    results = {
+        "format": RESULTS_FORMAT,
+        "created": datetime.now(UTC).isoformat(timespec="seconds"),
+        "environment": environment(args.engine, model_version),
+        "benchmarks": benchmarks,
+    }
+    
+    print()
+    for path in (args.output, args.save_baseline):
+        if path is not None:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            path.write_text(json.dumps(results, indent=2) + "\n")
+            print(f"Results written to {path}")
+    
+    if args.compare is None:
+        return 0
+    if not args.compare.exists():
+        print(f"Baseline {args.compare} not found; create it with --save-baseline")
+        return 2
+    baseline = json.loads(args.compare.read_text())
+    return report_comparison(baseline, results, args.threshold)
+
+
+def report_comparison(baseline: dict, current: dict, threshold: float) -> int:
+    """
+    Print per-benchmark changes and check them against a threshold.
+    
+    Args:
+        baseline: Stored results
+        current: New results
+        threshold: Largest allowed slowdown in percent
+    
+    Returns:
+        Exit status: 1 if any benchmark regressed past the threshold
+    """
+    print("\n" + "="*60)
+    print(f"COMPARISON (fail above +{threshold:g}%)")
+    print("="*60)
+    
+    for key in ("engine", "cpu_count", "platform"):
+        before = baseline.get("environment", {}).get(key)
+        after = current.get("environment", {}).get(key)
+        if before != after:
+            print(f"Warning: {key} differs (baseline {before!r}, current {after!r})")
+    
+    print(f"{'Benchmark':<42} {'base':>9} {'now':>9} {'change':>8}")
+    print("-" * 72)
+    
+    regressions = []
+    for name, result in current["benchmarks"].items():
+        reference = baseline["benchmarks"].get(name)
+        if reference is None:
+            print(f"{name:<42} {'-':>9} {result['us_per_row']:>9.2f}      new")
+            continue
+        change = (result["us_per_row"] / reference["us_per_row"] - 1) * 100
+        status = ""
+        if change > threshold:
+            status = "  REGRESSION"
+            regressions.append(name)
+        print(
+            f"{name:<42} {reference['us_per_row']:>9.2f} "
+            f"{result['us_per_row']:>9.2f} {change:>+7.1f}%{status}"
+        )
+    for name in sorted(baseline["benchmarks"].keys() - current["benchmarks"].keys()):
+        print(f"{name:<42} (missing from current results)")
+    
+    if regressions:
+        print(f"\n{len(regressions)} benchmark(s) regressed by more than {threshold:g}%")
+        return 1
+    print("\nNo regressions")
+    return 0
+
+
+def compare(args) -> int:
+    """Compare two stored result files."""
+    baseline = json.loads(args.baseline.read_text())
+    current = json.loads(args.current.read_text())
+    return report_comparison(baseline, current, args.threshold)
+
+
+def main():
+    """Parse arguments and dispatch to run or compare."""
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    commands = parser.add_subparsers(dest="command", required=True)
+    
+    run_parser = commands.add_parser("run", help="Run the benchmarks")
+    run_parser.add_argument("--output", type=Path, help="Write results JSON here")
+    default_baseline = DEFAULT_BASELINE.relative_to(BASE_DIR)
+    run_parser.add_argument(
+        "--compare", type=Path, nargs="?", const=DEFAULT_BASELINE, metavar="BASELINE",
+        help=f"Compare against baseline results (default: {default_baseline})"
+    )
+    run_parser.add_argument(
+        "--save-baseline", type=Path, nargs="?", const=DEFAULT_BASELINE, metavar="PATH",
+        help=f"Also store these results as the baseline (default: {default_baseline})"
+    )
+    run_parser.add_argument("--threshold", type=float, default=10.0,
+                            help="Allowed slowdown in percent")
+    run_parser.add_argument("--engine", default=Config.MODEL_ENGINE,
+                            choices=["sklearn", "compiled"])
+    run_parser.add_argument("--repeat", type=int, default=5, help="Repetitions per case")
+    run_parser.add_argument("--min-time", type=float, default=0.2,
+                            help="Minimum seconds per repetition")
+    run_parser.add_argument("--only", nargs="+", help="Run cases whose name contains any of these")
+    run_parser.set_defaults(handler=run)
+    
+    compare_parser = commands.add_parser("compare", help="Compare two result files")
+    compare_parser.add_argument("baseline", type=Path)
+    compare_parser.add_argument("current", type=Path)
+    compare_parser.add_argument("--threshold", type=float, default=10.0,
+                                help="Allowed slowdown in percent")
+    compare_parser.set_defaults(handler=compare)
+    
+    args = parser.parse_args()
+    sys.exit(args.handler(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+"""
+Request Validation Benchmark
+
+Compares per-request validation time of the previous double marshmallow
+pass (validate() then load()) with the single-pass CompiledValidator,
+for valid and invalid /predict payloads.
+"""
+import argparse
+import sys
+import timeit
+from pathlib import Path
+
+# Paths
+BASE_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(BASE_DIR))
+
+from marshmallow import ValidationError  # noqa: E402
+
+from app.api.compiled_validator import CompiledValidator  # noqa: E402
+from app.api.schemas import PredictionRequestSchema  # noqa: E402
+
+VALID_PAYLOAD = {
+    "age": 45,
+    "sex": "male",
+    "weight": 85.0,
+    "height": 175.0,
+    "high_bp": True,
+    "high_chol": True,
+    "smoker": False,
+    "stroke": False,
+    "heart_disease": False,
+    "phys_activity": True,
+    "fruits": True,
+    "veggies": True,
+    "heavy_alcohol": False,
+    "general_health": 3,
+    "mental_health": 5,
+    "physical_health": 3,
+    "difficulty_walking": False,
+}
+
+INVALID_PAYLOAD = {**VALID_PAYLOAD, "age": 12, "sex": "other", "weight": "heavy"}
+
+
+def marshmallow_double_pass(schema, payload):
+    """Previous /predict flow: validate, then load if valid."""
+    errors = schema.validate(payload)
+    if errors:
+        return errors
+    return schema.load(payload)
+
+
+def compiled_single_pass(validator, payload):
+    """Current /predict flow: one compiled load."""
+    try:
+        return validator.load(payload)
+    except ValidationError as error:
+        return error.messages
+
+
+def time_per_call(function, number: int) -> float:
+    """Best-of-5 time per call in microseconds."""
+    return min(timeit.repeat(function, number=number, repeat=5)) / number * 1e6
+
+
+def main():
+    """Run the benchmark for valid and invalid payloads."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--number", type=int, default=5000, help="Calls per timing")
+    args = parser.parse_args()
+    
+    schema = PredictionRequestSchema()
+    validator = CompiledValidator(schema)
+    
+    print("="*60)
+    print("REQUEST VALIDATION BENCHMARK")
+    print("="*60)
+    print("\nPayload | marshmallow x2 (us) | compiled (us) | speed-up")
+    print("-" * 60)
+    for label, payload in (("valid", VALID_PAYLOAD), ("invalid", INVALID_PAYLOAD)):
+        before = time_per_call(lambda p=payload: marshmallow_double_pass(schema, p), args.number)
+        after = time_per_call(lambda p=payload: compiled_single_pass(validator, p), args.number)
+        print(f"{label:7s} | {before:19.1f} | {after:13.1f} | {before / after:7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -3,20 +3,30 @@ Data Exploration Script
 
 Performs exploratory data analysis on the BRFSS2015 diabetes dataset.
 Generates statistics, distributions, and correlation analysis.
+
+Columns come from the shared dataset cache (see scripts.lib.dataset_cache)
+in their narrow integer dtypes rather than float64.
 """
+import sys
 from pathlib import Path
 
 import pandas as pd
 
 # Paths
-DATA_DIR = Path(__file__).resolve().parent.parent.parent / "data"
+BASE_DIR = Path(__file__).resolve().parent.parent
+DATA_DIR = BASE_DIR.parent / "data"
 DATASET_PATH = DATA_DIR / "diabetes_binary_5050split_health_indicators_BRFSS2015.csv"
+CACHE_DIR = DATA_DIR / "cache"
+
+sys.path.insert(0, str(BASE_DIR))
+
+from scripts.lib.dataset_cache import load_dataset  # noqa: E402
 
 
 def load_data() -> pd.DataFrame:
     """Load the diabetes dataset."""
     print(f"Loading data from: {DATASET_PATH}")
-    df = pd.read_csv(DATASET_PATH)
+    df = load_dataset(DATASET_PATH, CACHE_DIR, "Diabetes_binary").frame()
     print(f"Dataset shape: {df.shape}")
     return df
 
@@ -2,17 +2,26 @@
 Model Evaluation Script
 
 Loads trained model and generates detailed evaluation reports.
+
+The threshold analysis sorts the test probabilities once and sweeps every
+distinct threshold (see scripts.lib.threshold_sweep); the sweep is saved
+to artifacts/threshold_sweep.npz with its summary.
+
+The subgroup analysis scores the dataset once and computes accuracy,
+recall and ROC-AUC for every cell of a cross-product of dimensions and
+its roll-ups (see scripts.lib.subgroup_metrics). The table is written
+to artifacts/subgroup_metrics.csv so two model versions can be diffed,
+e.g. with --baseline.
+
+Both read the shared dataset cache (see scripts.lib.dataset_cache), so
+the test split is the one train_model.py held out.
 """
+import argparse
+import sys
 from pathlib import Path
 
 import joblib
 import pandas as pd
-from sklearn.metrics import (
-    f1_score,
-    precision_score,
-    recall_score,
-    roc_auc_score,
-)
 
 # Paths
 BASE_DIR = Path(__file__).resolve().parent.parent
@@ -20,6 +29,33 @@ DATA_DIR = BASE_DIR.parent / "data"
 ARTIFACTS_DIR = BASE_DIR / "artifacts"
 DATASET_PATH = DATA_DIR / "diabetes_binary_5050split_health_indicators_BRFSS2015.csv"
 MODEL_PATH = ARTIFACTS_DIR / "model.pkl"
+CACHE_DIR = DATA_DIR / "cache"
+SWEEP_PATH = ARTIFACTS_DIR / "threshold_sweep.npz"
+SUBGROUP_PATH = ARTIFACTS_DIR / "subgroup_metrics.csv"
+
+# Thresholds tabulated by the threshold analysis
+REPORT_THRESHOLDS = [0.3, 0.4, 0.5, 0.6, 0.7]
+
+# Recall targets to find the most precise threshold for (PRD: 0.70)
+RECALL_TARGETS = [0.70, 0.80, 0.90]
+
+# Metric changes against a baseline table that are reported
+SUBGROUP_DIFF_TOLERANCE = 0.005
+
+sys.path.insert(0, str(BASE_DIR))
+
+from app.utils.constants import RISK_THRESHOLD  # noqa: E402
+from scripts.lib.dataset_cache import load_dataset  # noqa: E402
+from scripts.lib.subgroup_metrics import Dimension, SubgroupCube  # noqa: E402
+from scripts.lib.threshold_sweep import ThresholdSweep  # noqa: E402
+
+# Subgroup dimensions, selectable with --dimensions
+DIMENSIONS = {
+    "age": Dimension("age", "Age", [4.5, 8.5], ["18-39", "40-59", "60+"]),
+    "sex": Dimension("sex", "Sex", [0.5], ["Female", "Male"]),
+    "bmi": Dimension("bmi", "BMI", [25, 30], ["<25", "25-30", ">=30"]),
+    "high_bp": Dimension("high_bp", "HighBP", [0.5], ["No", "Yes"]),
+}
 
 
 def load_model():
@@ -39,91 +75,134 @@ def load_model():
     return model_data
 
 
-def load_test_data(feature_order):
-    """Load and prepare test data."""
-    print(f"\nLoading data from: {DATASET_PATH}")
-    df = pd.read_csv(DATASET_PATH)
-    
-    # Use same split as training (random_state=42, test_size=0.2)
-    from sklearn.model_selection import train_test_split
-    
-    X = df[feature_order]
-    y = df["Diabetes_binary"]
-    
-    _, X_test, _, y_test = train_test_split(
-        X, y,
-        test_size=0.2,
-        stratify=y,
-        random_state=42
-    )
+def load_test_data(dataset, feature_order):
+    """Select the held-out test split from the cached dataset."""
+    # Same split as training, persisted with the cache
+    _, X_test, _, y_test = dataset.split(feature_order, "Diabetes_binary")
     
     print(f"Test set size: {len(X_test):,} samples")
     return X_test, y_test
 
 
-def evaluate_threshold_impact(model, X_test, y_test):
+def evaluate_threshold_impact(model, X_test, y_test, trained_at=None):
     """Analyze impact of different probability thresholds."""
     print("\n" + "="*60)
     print("THRESHOLD ANALYSIS")
     print("="*60)
     
     y_proba = model.predict_proba(X_test)[:, 1]
+    sweep = ThresholdSweep.from_scores(y_test, y_proba)
+    summary = sweep.summary(REPORT_THRESHOLDS, RECALL_TARGETS)
+    
+    print(f"\n{summary['n_thresholds']:,} distinct thresholds swept")
+    print(f"ROC-AUC:           {summary['roc_auc']:.4f}")
+    print(f"Average precision: {summary['average_precision']:.4f}")
     
     print("\nThreshold | Precision | Recall | F1 Score")
     print("-" * 50)
     
-    for threshold in [0.3, 0.4, 0.5, 0.6, 0.7]:
-        y_pred = (y_proba >= threshold).astype(int)
-        prec = precision_score(y_test, y_pred)
-        rec = recall_score(y_test, y_pred)
-        f1 = f1_score(y_test, y_pred)
-        print(f"  {threshold:.1f}    |   {prec:.4f}  |  {rec:.4f} |  {f1:.4f}")
+    for point in summary["at_threshold"]:
+        marker = "  <- RISK_THRESHOLD" if point["threshold"] == RISK_THRESHOLD else ""
+        print(
+            f"  {point['threshold']:.1f}    |   {point['precision']:.4f}  |  "
+            f"{point['recall']:.4f} |  {point['f1']:.4f}{marker}"
+        )
+    
+    print("\n--- Chosen Thresholds ---")
+    best = summary["best_f1"]
+    print(
+        f"Best F1:       {best['threshold']:.4f} (precision {best['precision']:.4f}, "
+        f"recall {best['recall']:.4f}, F1 {best['f1']:.4f})"
+    )
+    for target, point in summary["for_recall"].items():
+        if point is None:
+            print(f"Recall >= {target}: unreachable")
+            continue
+        print(
+            f"Recall >= {target}: {point['threshold']:.4f} (precision "
+            f"{point['precision']:.4f}, recall {point['recall']:.4f})"
+        )
+    
+    SWEEP_PATH.parent.mkdir(parents=True, exist_ok=True)
+    sweep.save(SWEEP_PATH, metadata={
+        "model_trained_at": trained_at,
+        "risk_threshold": RISK_THRESHOLD,
+        "summary": summary,
+    })
+    print(f"\nThreshold sweep saved to: {SWEEP_PATH}")
 
 
-def evaluate_subgroups(model, feature_order):
-    """Evaluate model performance on different subgroups."""
+def evaluate_subgroups(model, df, feature_order, dimensions, max_rolled_up=None, baseline=None):
+    """Evaluate model performance on every subgroup cell and roll-up."""
     print("\n" + "="*60)
     print("SUBGROUP ANALYSIS")
     print("="*60)
     
-    df = pd.read_csv(DATASET_PATH)
-    X = df[feature_order]
-    y = df["Diabetes_binary"]
+    # One prediction pass; class 1 above 0.5, as model.predict does
+    y_proba = model.predict_proba(df[feature_order])[:, 1]
+    cube = SubgroupCube.from_predictions(
+        dimensions, df, df["Diabetes_binary"], y_proba, threshold=0.5
+    )
+    table = pd.DataFrame(cube.table(max_rolled_up))
+    names = [dimension.name for dimension in dimensions]
     
-    y_pred = model.predict(X)
-    y_proba = model.predict_proba(X)[:, 1]
+    # Marginals: one dimension kept, the others rolled up
+    for dimension in dimensions:
+        others = [name for name in names if name != dimension.name]
+        marginal = table[(table[others] == "All").all(axis=1) & (table[dimension.name] != "All")]
+        if marginal.empty:
+            continue
+        print(f"\n--- Performance by {dimension.name} ---")
+        print(f"{dimension.name:12s} |      n | Accuracy | Recall | ROC-AUC")
+        print("-" * 55)
+        for _, row in marginal.iterrows():
+            print(
+                f"{row[dimension.name]:12s} | {row['n']:6d} |  {row['accuracy']:.4f}  | "
+                f"{row['recall']:.4f} |  {row['roc_auc']:.4f}"
+            )
     
-    # By age group
-    print("\n--- Performance by Age Group ---")
-    age_groups = {
-        "Young (18-39)": df["Age"] <= 4,
-        "Middle (40-59)": (df["Age"] >= 5) & (df["Age"] <= 8),
-        "Senior (60+)": df["Age"] >= 9
-    }
+    cells = table[(table[names] != "All").all(axis=1)]
+    print(f"\n{len(cells):,} cells over {' x '.join(names)}; {len(table):,} rows with roll-ups")
     
-    print("Age Group    | Accuracy | Recall | ROC-AUC")
-    print("-" * 50)
-    for label, mask in age_groups.items():
-        acc = (y_pred[mask] == y[mask]).mean()
-        rec = recall_score(y[mask], y_pred[mask])
-        auc = roc_auc_score(y[mask], y_proba[mask])
-        print(f"{label:12s} |  {acc:.4f}  | {rec:.4f} |  {auc:.4f}")
-    
-    # By BMI category
-    print("\n--- Performance by BMI Category ---")
-    bmi_groups = {
-        "Normal (<25)": df["BMI"] < 25,
-        "Overweight": (df["BMI"] >= 25) & (df["BMI"] < 30),
-        "Obese (>=30)": df["BMI"] >= 30
-    }
-    
-    print("BMI Category | Accuracy | Recall | ROC-AUC")
-    print("-" * 50)
-    for label, mask in bmi_groups.items():
-        acc = (y_pred[mask] == y[mask]).mean()
-        rec = recall_score(y[mask], y_pred[mask])
-        auc = roc_auc_score(y[mask], y_proba[mask])
-        print(f"{label:12s} |  {acc:.4f}  | {rec:.4f} |  {auc:.4f}")
+    SUBGROUP_PATH.parent.mkdir(parents=True, exist_ok=True)
+    table.to_csv(SUBGROUP_PATH, index=False, float_format="%.6f")
+    print(f"Subgroup table saved to: {SUBGROUP_PATH}")
+    
+    if baseline is not None:
+        compare_subgroups(pd.read_csv(baseline, keep_default_na=False, na_values=[""]),
+                          pd.read_csv(SUBGROUP_PATH, keep_default_na=False, na_values=[""]),
+                          names)
+
+
+def compare_subgroups(baseline, current, names):
+    """Print subgroup metrics that moved by more than SUBGROUP_DIFF_TOLERANCE."""
+    metrics = ["accuracy", "recall", "roc_auc"]
+    baseline_names = [column for column in baseline.columns if column not in metrics + ["n", "positives"]]
+    if baseline_names != names:
+        print(f"\nBaseline is over {' x '.join(baseline_names)}, not {' x '.join(names)}; "
+              f"rerun with --dimensions {' '.join(baseline_names)}")
+        return
+    
+    merged = baseline.merge(current, on=names, how="outer", suffixes=("_old", "_new"))
+    
+    changes = pd.DataFrame({
+        metric: merged[f"{metric}_new"] - merged[f"{metric}_old"] for metric in metrics
+    })
+    largest = changes.abs().max(axis=1)
+    moved = merged[(largest > SUBGROUP_DIFF_TOLERANCE) | largest.isna()]
+    
+    print(f"\n--- Changes vs baseline (|delta| > {SUBGROUP_DIFF_TOLERANCE}) ---")
+    if moved.empty:
+        print("No subgroup moved beyond the tolerance")
+        return
+    print(" / ".join(names) + " | " + " | ".join(f"{metric} delta" for metric in metrics))
+    for index in largest[moved.index].sort_values(ascending=False, na_position="first").index:
+        cell = " / ".join(str(merged.at[index, name]) for name in names)
+        deltas = " | ".join(
+            f"{changes.at[index, metric]:+.4f}" if pd.notna(changes.at[index, metric]) else "n/a"
+            for metric in metrics
+        )
+        print(f"{cell} | {deltas}")
 
 
 def print_feature_importance(model, feature_order):
@@ -145,6 +224,20 @@ def print_feature_importance(model, feature_order):
 
 def main():
     """Run evaluation pipeline."""
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("--dimensions", nargs="+", default=list(DIMENSIONS),
+                        choices=list(DIMENSIONS),
+                        help="Subgroup dimensions to cross")
+    parser.add_argument("--max-rolled-up", type=int, default=None,
+                        help="Roll up at most this many dimensions at once (default: all)")
+    parser.add_argument("--baseline", type=Path, default=None,
+                        help="Subgroup table of another model version to diff against")
+    parser.add_argument("--rebuild-cache", action="store_true",
+                        help="Rebuild the dataset cache even if the CSV is unchanged")
+    args = parser.parse_args()
+    
     print("="*60)
     print("DIABETES RISK MODEL EVALUATION")
     print("="*60)
@@ -160,14 +253,22 @@ def main():
     for key, value in metrics.items():
         print(f"  {key}: {value:.4f}")
     
-    # Load test data
-    X_test, y_test = load_test_data(feature_order)
+    # Load data once for the threshold and subgroup analyses
+    print(f"\nLoading data from: {DATASET_PATH}")
+    dataset = load_dataset(DATASET_PATH, CACHE_DIR, "Diabetes_binary", rebuild=args.rebuild_cache)
+    if model_data.get("dataset_hash") not in (None, dataset.source_hash):
+        print("WARNING: model was trained on a different version of the dataset")
+    df = dataset.frame()
+    X_test, y_test = load_test_data(dataset, feature_order)
     
     # Threshold analysis
-    evaluate_threshold_impact(model, X_test, y_test)
+    evaluate_threshold_impact(model, X_test, y_test, model_data.get("trained_at"))
     
     # Subgroup analysis
-    evaluate_subgroups(model, feature_order)
+    evaluate_subgroups(
+        model, df, feature_order, [DIMENSIONS[name] for name in args.dimensions],
+        args.max_rolled_up, args.baseline
+    )
     
     # Feature importance
     print_feature_importance(model, feature_order)
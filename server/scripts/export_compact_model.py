@@ -0,0 +1,166 @@
+"""
+Compact Model Export Script
+
+Flattens the trained model.pkl into a single versioned file with narrow
+dtypes (float32 thresholds and leaf probabilities, int16 features, int32
+child indices) used by MODEL_LOAD_MODE=compact, and compares how long the
+server takes to start, and how much memory it uses, with each artifact.
+"""
+import argparse
+import json
+import subprocess
+import sys
+import textwrap
+from pathlib import Path
+
+import joblib
+import numpy as np
+
+# Paths
+BASE_DIR = Path(__file__).resolve().parent.parent
+ARTIFACTS_DIR = BASE_DIR / "artifacts"
+MODEL_PATH = ARTIFACTS_DIR / "model.pkl"
+COMPACT_PATH = ARTIFACTS_DIR / "model.compact"
+
+# float32 leaf probabilities differ from the float64 mean by rounding only
+MAX_PROBABILITY_DIFF = 1e-6
+
+sys.path.insert(0, str(BASE_DIR))
+
+from app.models.compiled_forest import CompiledForest  # noqa: E402
+from app.models.ml_model import probe_features  # noqa: E402
+
+# Run in a fresh interpreter per load mode: build the app, load the model
+# and score one request, then report timings, memory and heavy imports.
+# Memory comes from /proc/self/status: ru_maxrss survives exec, so it
+# would report this script's own peak.
+_STARTUP_PROBE = textwrap.dedent("""
+    import json, sys, time
+    started = time.perf_counter()
+    from app import create_app
+    from app.config import Config
+    from app.models.ml_model import DiabetesModel, probe_features
+    
+    class ProbeConfig(Config):
+        DEBUG = False
+        MODEL_LOAD_MODE = sys.argv[1]
+        MODEL_PATH = sys.argv[2]
+        COMPACT_MODEL_PATH = sys.argv[3]
+        MODEL_BACKGROUND_LOAD = False
+        MODEL_RELOAD_INTERVAL = 0
+        METRICS_ENABLED = False
+    
+    imported = time.perf_counter()
+    app = create_app(ProbeConfig)
+    loaded = time.perf_counter()
+    with app.app_context():
+        DiabetesModel.get_instance().predict_proba(probe_features(1, seed=1))
+    finished = time.perf_counter()
+    with open("/proc/self/status") as f:
+        status = {
+            key: int(value.split()[0]) / 1024
+            for key, _, value in (line.partition(":") for line in f)
+            if key in ("VmRSS", "VmHWM")
+        }
+    print(json.dumps({
+        "import_s": imported - started,
+        "load_s": loaded - imported,
+        "first_predict_s": finished - loaded,
+        "total_s": finished - started,
+        "rss_mb": status["VmRSS"],
+        "peak_rss_mb": status["VmHWM"],
+        "sklearn_imported": "sklearn" in sys.modules,
+        "joblib_imported": "joblib" in sys.modules,
+    }))
+""")
+
+
+def export_compact(model_path: Path, compact_path: Path) -> CompiledForest:
+    """Load the pickled model, flatten it and write the compact file."""
+    print(f"Loading model from: {model_path}")
+    model_data = joblib.load(model_path)
+    model = model_data["model"]
+    model.verbose = 0
+    
+    metadata = {
+        "feature_order": list(model_data.get("feature_order", [])),
+        "trained_at": model_data.get("trained_at"),
+        "metrics": {
+            key: float(value) for key, value in model_data.get("metrics", {}).items()
+        },
+        "source": model_path.name,
+    }
+    CompiledForest.from_estimator(model, metadata=metadata).save_compact(compact_path)
+    forest = CompiledForest.load_compact(compact_path, mmap=False)
+    
+    # Sanity check: the narrow dtypes must keep the estimator's predictions
+    probe = probe_features(1024)
+    max_diff = np.abs(
+        forest.predict_proba(probe)[:, 1] - model.predict_proba(probe)[:, 1]
+    ).max()
+    if max_diff > MAX_PROBABILITY_DIFF:
+        compact_path.unlink()
+        raise RuntimeError(f"Compact forest differs from model by {max_diff}")
+    
+    print(f"Compact forest saved to: {compact_path}")
+    print(f"Trees: {forest.n_trees}, nodes: {forest.n_nodes:,}, max depth: {forest.max_depth}")
+    print(f"Max probability difference on probe rows: {max_diff:.2e}")
+    print(
+        f"Size on disk: {compact_path.stat().st_size / (1024 * 1024):.2f} MB "
+        f"(pickle: {model_path.stat().st_size / (1024 * 1024):.2f} MB)"
+    )
+    return forest
+
+
+def measure_startup(mode: str, model_path: Path, compact_path: Path) -> dict:
+    """Start the app in a fresh interpreter and measure one load mode."""
+    result = subprocess.run(
+        [sys.executable, "-c", _STARTUP_PROBE, mode, str(model_path), str(compact_path)],
+        cwd=BASE_DIR,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def compare_startup(model_path: Path, compact_path: Path, repeat: int) -> None:
+    """Print startup time and RSS for the pickle and compact artifacts."""
+    print("\n--- Startup comparison (fresh interpreter, best of "
+          f"{repeat}) ---")
+    print(
+        f"{'Mode':8s} | {'import s':>8s} | {'load s':>7s} | {'1st pred s':>10s} | "
+        f"{'total s':>7s} | {'RSS MB':>7s} | {'peak MB':>7s} | sklearn"
+    )
+    print("-" * 82)
+    for mode in ("pickle", "compact"):
+        runs = [measure_startup(mode, model_path, compact_path) for _ in range(repeat)]
+        best = min(runs, key=lambda run: run["total_s"])
+        print(
+            f"{mode:8s} | {best['import_s']:8.3f} | {best['load_s']:7.3f} | "
+            f"{best['first_predict_s']:10.4f} | {best['total_s']:7.3f} | "
+            f"{best['rss_mb']:7.1f} | {best['peak_rss_mb']:7.1f} | "
+            f"{'yes' if best['sklearn_imported'] else 'no'}"
+        )
+
+
+def main():
+    """Export the compact model and compare it with the pickle."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--model", type=Path, default=MODEL_PATH)
+    parser.add_argument("--output", type=Path, default=COMPACT_PATH)
+    parser.add_argument("--repeat", type=int, default=3,
+                        help="Startup runs per load mode (0 skips the comparison)")
+    args = parser.parse_args()
+    
+    print("="*60)
+    print("COMPACT MODEL EXPORT")
+    print("="*60)
+    
+    export_compact(args.model, args.output)
+    if args.repeat > 0:
+        compare_startup(args.model, args.output, args.repeat)
+
+
+if __name__ == "__main__":
+    main()
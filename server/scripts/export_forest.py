@@ -0,0 +1,72 @@
+"""
+Compiled Forest Export Script
+
+Flattens the trained model.pkl into the memory-mappable compiled forest
+layout used by MODEL_LOAD_MODE=mmap.
+"""
+import argparse
+import sys
+from pathlib import Path
+
+import joblib
+import numpy as np
+
+# Paths
+BASE_DIR = Path(__file__).resolve().parent.parent
+ARTIFACTS_DIR = BASE_DIR / "artifacts"
+MODEL_PATH = ARTIFACTS_DIR / "model.pkl"
+FOREST_PATH = ARTIFACTS_DIR / "model_forest"
+
+sys.path.insert(0, str(BASE_DIR))
+
+from app.models.compiled_forest import CompiledForest  # noqa: E402
+
+
+def export_forest(model_path: Path, forest_path: Path) -> CompiledForest:
+    """Load the pickled model, flatten it and write the array layout."""
+    print(f"Loading model from: {model_path}")
+    model_data = joblib.load(model_path)
+    model = model_data["model"]
+    model.verbose = 0
+    
+    metadata = {
+        "feature_order": list(model_data.get("feature_order", [])),
+        "trained_at": model_data.get("trained_at"),
+        "metrics": {
+            key: float(value) for key, value in model_data.get("metrics", {}).items()
+        },
+        "source": model_path.name,
+    }
+    forest = CompiledForest.from_estimator(model, metadata=metadata)
+    
+    # Sanity check: the flattened forest must reproduce the estimator
+    rng = np.random.default_rng(0)
+    probe = rng.integers(0, 14, size=(256, forest.n_features)).astype(float)
+    probe[:, 3] = rng.uniform(15, 50, size=256)
+    max_diff = np.abs(
+        forest.predict_proba(probe)[:, 1] - model.predict_proba(probe)[:, 1]
+    ).max()
+    if max_diff > 1e-9:
+        raise RuntimeError(f"Compiled forest differs from model by {max_diff}")
+    
+    forest.save(forest_path)
+    
+    size_mb = sum(f.stat().st_size for f in forest_path.iterdir()) / (1024 * 1024)
+    print(f"Forest saved to: {forest_path}")
+    print(f"Trees: {forest.n_trees}, nodes: {forest.n_nodes:,}, max depth: {forest.max_depth}")
+    print(f"Size on disk: {size_mb:.2f} MB")
+    return forest
+
+
+def main():
+    """Export the compiled forest."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--model", type=Path, default=MODEL_PATH)
+    parser.add_argument("--output", type=Path, default=FOREST_PATH)
+    args = parser.parse_args()
+    
+    export_forest(args.model, args.output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,129 @@
+"""
+Import Time Report
+
+Imports the app and builds it in a fresh interpreter under
+`python -X importtime`, then reports where startup time goes: the slowest
+modules by cumulative and by self time, and self time summed per
+top-level package.
+
+Modes:
+    lazy   create_app with MODEL_LAZY_LOAD (what a cold start that only
+           serves /health pays)
+    eager  create_app with the default warm-up (prediction stack imported
+           and model loaded)
+"""
+import argparse
+import subprocess
+import sys
+from collections import defaultdict
+from pathlib import Path
+
+# Paths
+BASE_DIR = Path(__file__).resolve().parent.parent
+
+# Imported and built under -X importtime; argv[1] is MODEL_LAZY_LOAD
+_STARTUP_SNIPPET = """
+import sys
+from app import create_app
+from app.config import Config
+
+class ReportConfig(Config):
+    DEBUG = False
+    MODEL_LAZY_LOAD = sys.argv[1] == "lazy"
+    MODEL_BACKGROUND_LOAD = False
+    MODEL_RELOAD_INTERVAL = 0
+
+create_app(ReportConfig)
+"""
+
+
+def measure_imports(mode: str) -> list[dict]:
+    """
+    Run the startup snippet and parse the -X importtime output.
+    
+    Args:
+        mode: "lazy" or "eager"
+    
+    Returns:
+        One entry per imported module with module, self_us, cumulative_us
+        and depth (0 for imports made by the snippet itself)
+    """
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", _STARTUP_SNIPPET, mode],
+        cwd=BASE_DIR,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    
+    modules = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        modules.append({
+            "module": name.strip(),
+            "self_us": int(self_us),
+            "cumulative_us": int(cumulative_us),
+            "depth": (len(name) - len(name.lstrip()) - 1) // 2,
+        })
+    return modules
+
+
+def package_totals(modules: list[dict]) -> dict[str, int]:
+    """Sum self time per top-level package, slowest first."""
+    totals = defaultdict(int)
+    for module in modules:
+        totals[module["module"].split(".")[0]] += module["self_us"]
+    return dict(sorted(totals.items(), key=lambda item: item[1], reverse=True))
+
+
+def print_report(mode: str, modules: list[dict], top: int) -> None:
+    """Print the slowest modules and packages for one mode."""
+    total_ms = sum(module["self_us"] for module in modules) / 1000
+    print(f"\n--- Mode: {mode} ({len(modules)} modules, {total_ms:.1f} ms importing) ---")
+    
+    print(f"\nSlowest {top} modules by cumulative time:")
+    print(f"{'cumulative ms':>13s} | {'self ms':>8s} | module")
+    by_cumulative = sorted(modules, key=lambda module: module["cumulative_us"], reverse=True)
+    for module in by_cumulative[:top]:
+        indent = "  " * module["depth"]
+        print(
+            f"{module['cumulative_us'] / 1000:13.1f} | {module['self_us'] / 1000:8.1f} | "
+            f"{indent}{module['module']}"
+        )
+    
+    print(f"\nSlowest {top} modules by self time:")
+    print(f"{'self ms':>8s} | module")
+    by_self = sorted(modules, key=lambda module: module["self_us"], reverse=True)
+    for module in by_self[:top]:
+        print(f"{module['self_us'] / 1000:8.1f} | {module['module']}")
+    
+    print("\nSelf time per top-level package:")
+    print(f"{'self ms':>8s} | {'share':>6s} | package")
+    for package, self_us in list(package_totals(modules).items())[:top]:
+        share = self_us / 1000 / total_ms if total_ms else 0.0
+        print(f"{self_us / 1000:8.1f} | {share:6.1%} | {package}")
+
+
+def main():
+    """Print import-time reports for the requested startup modes."""
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("--modes", nargs="+", default=["lazy", "eager"],
+                        choices=["lazy", "eager"])
+    parser.add_argument("--top", type=int, default=15,
+                        help="Rows per table")
+    args = parser.parse_args()
+    
+    print("="*60)
+    print("IMPORT TIME REPORT")
+    print("="*60)
+    
+    for mode in args.modes:
+        print_report(mode, measure_imports(mode), args.top)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,6 @@
+"""
+Script Library - Shared Script Helpers
+
+Modules used only by the training and evaluation scripts, kept out of the
+app package so the server never imports them.
+"""
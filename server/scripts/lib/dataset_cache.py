@@ -0,0 +1,268 @@
+"""
+Dataset Cache - Typed, Memory-mapped Training Data
+
+Converts the BRFSS CSV once into one .npy file per column, each in the
+narrowest dtype that holds its values exactly (uint8 for nearly every
+feature), plus the stratified train/test split indices. Caches are keyed
+by the CSV's SHA-256, so editing or replacing the file builds a new one.
+
+Scripts memory-map the columns instead of parsing text into float64
+DataFrames, and all of them see the identical split.
+"""
+import hashlib
+import json
+import os
+import shutil
+from pathlib import Path
+
+import numpy as np
+
+# On-disk layout: one .npy file per column, the split indices and a JSON manifest
+MANIFEST_NAME = "dataset.json"
+FORMAT_NAME = "dataset-cache"
+FORMAT_VERSION = 1
+
+# Split shared by every script (matches the original train_test_split call)
+TEST_SIZE = 0.2
+RANDOM_STATE = 42
+
+# Candidate dtypes for integral columns, narrowest first
+_INTEGER_DTYPES = (np.uint8, np.int8, np.uint16, np.int16, np.uint32, np.int32, np.int64)
+
+# Bytes read at a time while hashing the source file
+_HASH_CHUNK_BYTES = 1 << 20
+
+
+def file_hash(path: str | Path) -> str:
+    """SHA-256 hex digest of a file."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        while chunk := f.read(_HASH_CHUNK_BYTES):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def narrowest_dtype(values: np.ndarray) -> np.dtype:
+    """
+    Pick the narrowest dtype that represents every value exactly.
+    
+    Args:
+        values: Column values
+    
+    Returns:
+        An integer dtype for whole numbers, else float32 if it round-trips,
+        else float64
+    """
+    values = np.asarray(values)
+    if values.dtype.kind in "iub" or (
+        values.dtype.kind == "f" and np.isfinite(values).all()
+        and (values == np.round(values)).all()
+    ):
+        low, high = (values.min(), values.max()) if len(values) else (0, 0)
+        for dtype in _INTEGER_DTYPES:
+            info = np.iinfo(dtype)
+            if info.min <= low and high <= info.max:
+                return np.dtype(dtype)
+    if values.dtype.kind == "f" and (values.astype(np.float32) == values).all():
+        return np.dtype(np.float32)
+    return values.dtype
+
+
+class CachedDataset:
+    """Memory-mapped columns and split indices of a cached dataset."""
+    
+    def __init__(self, directory: Path, manifest: dict, mmap: bool = True):
+        """
+        Open the arrays of a cache directory.
+        
+        Args:
+            directory: Cache directory written by build_cache()
+            manifest: Its parsed manifest
+            mmap: Memory-map the arrays read-only instead of reading them
+        """
+        mmap_mode = "r" if mmap else None
+        self.directory = directory
+        self.manifest = manifest
+        # np.asarray drops the np.memmap subclass but keeps the mapped pages
+        self.columns = {
+            name: np.asarray(np.load(directory / f"{name}.npy", mmap_mode=mmap_mode))
+            for name in manifest["columns"]
+        }
+        self.train_index = np.asarray(np.load(directory / "train_index.npy", mmap_mode=mmap_mode))
+        self.test_index = np.asarray(np.load(directory / "test_index.npy", mmap_mode=mmap_mode))
+    
+    @property
+    def n_rows(self) -> int:
+        """Number of rows in the dataset."""
+        return self.manifest["n_rows"]
+    
+    @property
+    def source_hash(self) -> str:
+        """SHA-256 of the CSV the cache was built from."""
+        return self.manifest["source_hash"]
+    
+    def frame(self, columns: list[str] | None = None, rows: np.ndarray | None = None):
+        """
+        Build a DataFrame from the cached columns.
+        
+        Args:
+            columns: Columns to include, in order (default: all, CSV order)
+            rows: Row positions to select (default: all); they become the
+                index, as with a DataFrame read from the CSV
+        
+        Returns:
+            pandas DataFrame with the cached dtypes
+        
+        Raises:
+            KeyError: If a column is not in the cache
+        """
+        import pandas as pd
+        
+        columns = list(self.columns) if columns is None else columns
+        if rows is None:
+            data = {name: self.columns[name] for name in columns}
+            index = pd.RangeIndex(self.n_rows)
+        else:
+            data = {name: self.columns[name][rows] for name in columns}
+            index = pd.Index(rows.astype(np.int64))
+        return pd.DataFrame(data, index=index, copy=False)
+    
+    def split(self, feature_order: list[str], target: str):
+        """
+        Get the shared stratified train/test split.
+        
+        Args:
+            feature_order: Feature columns, in model order
+            target: Target column
+        
+        Returns:
+            Tuple of (X_train, X_test, y_train, y_test), as returned by
+            train_test_split on the CSV's DataFrame
+        """
+        train = self.frame(feature_order + [target], self.train_index)
+        test = self.frame(feature_order + [target], self.test_index)
+        return train[feature_order], test[feature_order], train[target], test[target]
+
+
+def build_cache(source: str | Path, directory: str | Path, target: str, source_hash: str) -> None:
+    """
+    Convert a CSV into a cache directory.
+    
+    Files are written to a temporary directory first and then moved into
+    place, so readers never see a half-written cache. An existing cache is
+    renamed aside and deleted only after the move.
+    
+    Args:
+        source: CSV file
+        directory: Target directory (replaced if it exists)
+        target: Binary target column to stratify the split on
+        source_hash: SHA-256 of the CSV, recorded in the manifest
+    
+    Raises:
+        ValueError: If the target column is missing
+    """
+    import pandas as pd
+    from sklearn.model_selection import train_test_split
+    
+    df = pd.read_csv(source)
+    if target not in df.columns:
+        raise ValueError(f"Target column '{target}' not found in {source}")
+    
+    directory = Path(directory)
+    staging = directory.with_name(directory.name + ".tmp")
+    previous = directory.with_name(directory.name + ".old")
+    shutil.rmtree(staging, ignore_errors=True)
+    shutil.rmtree(previous, ignore_errors=True)
+    staging.mkdir(parents=True)
+    
+    columns = {}
+    for name in df.columns:
+        values = df[name].to_numpy()
+        dtype = narrowest_dtype(values)
+        np.save(staging / f"{name}.npy", np.ascontiguousarray(values.astype(dtype)))
+        columns[name] = dtype.str
+    
+    # Only the labels decide a stratified split, so splitting row positions
+    # gives the same rows as splitting the DataFrame
+    train_index, test_index = train_test_split(
+        np.arange(len(df)),
+        test_size=TEST_SIZE,
+        stratify=df[target],
+        random_state=RANDOM_STATE
+    )
+    index_dtype = narrowest_dtype(np.array([0, len(df)]))
+    np.save(staging / "train_index.npy", train_index.astype(index_dtype))
+    np.save(staging / "test_index.npy", test_index.astype(index_dtype))
+    
+    manifest = {
+        "format": FORMAT_NAME,
+        "format_version": FORMAT_VERSION,
+        "source": Path(source).name,
+        "source_hash": source_hash,
+        "n_rows": len(df),
+        "columns": columns,
+        "split": {
+            "target": target,
+            "test_size": TEST_SIZE,
+            "random_state": RANDOM_STATE,
+            "n_train": len(train_index),
+            "n_test": len(test_index),
+        },
+    }
+    # Manifest last: its presence marks a complete cache
+    with open(staging / MANIFEST_NAME, "w") as f:
+        json.dump(manifest, f, indent=2)
+    
+    if directory.exists():
+        os.replace(directory, previous)
+    os.replace(staging, directory)
+    shutil.rmtree(previous, ignore_errors=True)
+
+
+def load_dataset(
+    source: str | Path,
+    cache_root: str | Path,
+    target: str,
+    rebuild: bool = False,
+    mmap: bool = True
+) -> CachedDataset:
+    """
+    Open the cache for a CSV, building it if the CSV has changed.
+    
+    Args:
+        source: CSV file
+        cache_root: Directory holding caches, one per source hash
+        target: Binary target column to stratify the split on
+        rebuild: Rebuild the cache even if it is current
+        mmap: Memory-map the cached arrays
+    
+    Returns:
+        CachedDataset for the CSV's current contents
+    """
+    source = Path(source)
+    source_hash = file_hash(source)
+    directory = Path(cache_root) / f"{source.stem}-{source_hash[:16]}"
+    
+    manifest = _read_manifest(directory)
+    if rebuild or manifest is None or (
+        manifest.get("source_hash") != source_hash
+        or manifest["split"]["target"] != target
+    ):
+        build_cache(source, directory, target, source_hash)
+        manifest = _read_manifest(directory)
+    
+    return CachedDataset(directory, manifest, mmap=mmap)
+
+
+def _read_manifest(directory: Path) -> dict | None:
+    """Parse a cache manifest, or None if it is missing or another format."""
+    try:
+        with open(directory / MANIFEST_NAME) as f:
+            manifest = json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return None
+    if manifest.get("format") != FORMAT_NAME or (
+        manifest.get("format_version") != FORMAT_VERSION
+    ):
+        return None
+    return manifest
@@ -0,0 +1,94 @@
+"""
+Fit Cache - Content-keyed Store for Training Results
+
+Stores fitted models and prediction arrays under a key derived from
+everything that determines them: the dataset hash, the estimator's
+hyperparameters, the stage and fold, and the scikit-learn version.
+Re-running training with unchanged inputs loads results instead of
+fitting again; changing any input changes the key.
+"""
+import hashlib
+import json
+import os
+from pathlib import Path
+from typing import Any
+
+import joblib
+import numpy as np
+import sklearn
+
+# Included in every key, so results from another layout are never reused
+FIT_CACHE_VERSION = 1
+
+
+def fit_key(**parts: Any) -> str:
+    """
+    Derive a cache key from JSON-serializable parts.
+    
+    Args:
+        **parts: Inputs that determine the cached result (dataset hash,
+            hyperparameters, stage, fold, ...)
+    
+    Returns:
+        SHA-256 hex digest of the parts, the cache format version and the
+        scikit-learn version
+    """
+    payload = {
+        "fit_cache_version": FIT_CACHE_VERSION,
+        "sklearn_version": sklearn.__version__,
+        **parts,
+    }
+    encoded = json.dumps(payload, sort_keys=True, default=str).encode()
+    return hashlib.sha256(encoded).hexdigest()
+
+
+class FitCache:
+    """Fitted models (joblib) and arrays (.npy) stored under fit keys."""
+    
+    def __init__(self, directory: str | Path, enabled: bool = True):
+        """
+        Initialize the cache.
+        
+        Args:
+            directory: Directory holding cached results
+            enabled: Read and write results; when False every lookup misses
+                and nothing is stored
+        """
+        self.directory = Path(directory)
+        self.enabled = enabled
+    
+    def _path(self, key: str, suffix: str) -> Path:
+        """File holding a key's result."""
+        return self.directory / key[:2] / f"{key}{suffix}"
+    
+    def _write(self, path: Path, write) -> None:
+        """Write through a temporary file so readers never see partial results."""
+        path.parent.mkdir(parents=True, exist_ok=True)
+        staging = path.with_name(path.name + f".{os.getpid()}.tmp")
+        with open(staging, "wb") as f:
+            write(f)
+        os.replace(staging, path)
+    
+    def load_model(self, key: str):
+        """Load a cached model, or None if there is none."""
+        path = self._path(key, ".joblib")
+        if not self.enabled or not path.exists():
+            return None
+        return joblib.load(path)
+    
+    def save_model(self, key: str, model) -> None:
+        """Store a fitted model."""
+        if self.enabled:
+            self._write(self._path(key, ".joblib"), lambda f: joblib.dump(model, f))
+    
+    def load_array(self, key: str) -> np.ndarray | None:
+        """Load a cached array, or None if there is none."""
+        path = self._path(key, ".npy")
+        if not self.enabled or not path.exists():
+            return None
+        return np.load(path)
+    
+    def save_array(self, key: str, array: np.ndarray) -> None:
+        """Store an array."""
+        if self.enabled:
+            self._write(self._path(key, ".npy"), lambda f: np.save(f, array))
@@ -0,0 +1,247 @@
+"""
+Subgroup Metrics - One-pass Metrics Cube
+
+Computes accuracy, recall and ROC-AUC for every cell of a cross-product
+of binned dimensions (e.g. age category x sex x BMI category x HighBP),
+and rolls the cube up to any subset of those dimensions.
+
+Rows are reduced once to positive and negative counts per (cell,
+distinct score) pair. Every metric of every cell, including the
+rank-based ROC-AUC, comes from that table, and a roll-up only re-groups
+the table instead of revisiting rows, so adding dimensions or rows costs
+about one more sort.
+"""
+from itertools import combinations
+
+import numpy as np
+
+# Label of a dimension that was rolled up
+ALL_LABEL = "All"
+
+
+class Dimension:
+    """A column binned into labelled categories."""
+    
+    def __init__(self, name: str, column: str, edges, labels):
+        """
+        Initialize a binned dimension.
+        
+        Args:
+            name: Name shown in tables
+            column: Source column
+            edges: Ascending bin edges; a value equal to an edge falls in
+                the upper bin
+            labels: One label per bin (len(edges) + 1)
+        
+        Raises:
+            ValueError: If the number of labels does not match the edges
+        """
+        if len(labels) != len(edges) + 1:
+            raise ValueError(f"Dimension '{name}' needs {len(edges) + 1} labels")
+        self.name = name
+        self.column = column
+        self.edges = np.asarray(edges, dtype=np.float64)
+        self.labels = list(labels)
+    
+    def codes(self, values) -> np.ndarray:
+        """Bin index of each value."""
+        return np.searchsorted(self.edges, np.asarray(values, dtype=np.float64), side="right")
+
+
+class SubgroupCube:
+    """
+    Positive and negative counts per (cell, distinct score) pair.
+    
+    Cells index the cross-product of the dimensions' bins in row-major
+    order; only cells with rows are stored.
+    """
+    
+    def __init__(
+        self,
+        dimensions: list[Dimension],
+        cells: np.ndarray,
+        scores: np.ndarray,
+        positives: np.ndarray,
+        negatives: np.ndarray,
+        threshold: float
+    ):
+        """
+        Initialize from the reduced table, sorted by cell then score.
+        
+        Args:
+            dimensions: Dimensions spanning the cube
+            cells: Cell index of each entry
+            scores: Score of each entry
+            positives: Positive rows with that cell and score
+            negatives: Negative rows with that cell and score
+            threshold: Rows scoring above it are predicted positive
+        """
+        self.dimensions = dimensions
+        self.cells = cells
+        self.scores = scores
+        self.positives = positives
+        self.negatives = negatives
+        self.threshold = threshold
+    
+    @classmethod
+    def from_predictions(
+        cls,
+        dimensions: list[Dimension],
+        columns,
+        y_true,
+        y_score,
+        threshold: float = 0.5
+    ) -> "SubgroupCube":
+        """
+        Reduce scored rows to the cube's table in one pass.
+        
+        Args:
+            dimensions: Dimensions spanning the cube
+            columns: Mapping (e.g. a DataFrame) from column name to values
+            y_true: Binary labels
+            y_score: Positive-class scores
+            threshold: Rows scoring above it are predicted positive (0.5
+                matches predict())
+        
+        Returns:
+            SubgroupCube over the rows
+        
+        Raises:
+            ValueError: If the inputs differ in length or are empty
+        """
+        y_true = np.asarray(y_true).astype(bool, copy=False).ravel()
+        y_score = np.asarray(y_score, dtype=np.float64).ravel()
+        if len(y_true) != len(y_score) or len(y_true) == 0:
+            raise ValueError("y_true and y_score must be non-empty and of equal length")
+        
+        shape = tuple(len(dimension.labels) for dimension in dimensions)
+        cell = np.ravel_multi_index(
+            [dimension.codes(columns[dimension.column]) for dimension in dimensions], shape
+        ) if dimensions else np.zeros(len(y_true), dtype=np.intp)
+        
+        cells, scores, positives, negatives = _group_counts(
+            cell, y_score, y_true.astype(np.int64), (~y_true).astype(np.int64)
+        )
+        return cls(dimensions, cells, scores, positives, negatives, threshold)
+    
+    def rollup(self, keep: list[str]) -> list[dict]:
+        """
+        Metrics per cell of the cube rolled up to some dimensions.
+        
+        Args:
+            keep: Names of the dimensions to keep; the others are labelled
+                ALL_LABEL
+        
+        Returns:
+            One row per non-empty cell with each dimension's label, n,
+            positives, accuracy, recall and roc_auc (None when undefined)
+        
+        Raises:
+            ValueError: If keep names a dimension not in the cube
+        """
+        names = [dimension.name for dimension in self.dimensions]
+        unknown = set(keep) - set(names)
+        if unknown:
+            raise ValueError(f"Unknown dimensions: {sorted(unknown)}")
+        
+        shape = tuple(len(dimension.labels) for dimension in self.dimensions)
+        codes = np.unravel_index(self.cells, shape) if shape else ()
+        kept = [i for i, name in enumerate(names) if name in keep]
+        kept_shape = tuple(shape[i] for i in kept)
+        group = np.ravel_multi_index(
+            [codes[i] for i in kept], kept_shape
+        ) if kept else np.zeros(len(self.cells), dtype=np.intp)
+        
+        groups, scores, positives, negatives = _group_counts(
+            group, self.scores, self.positives, self.negatives
+        )
+        metrics = _metrics(groups, scores, positives, negatives, self.threshold)
+        
+        rows = []
+        kept_codes = np.unravel_index(metrics["group"], kept_shape) if kept else ()
+        for j in range(len(metrics["group"])):
+            row = {name: ALL_LABEL for name in names}
+            for position, i in enumerate(kept):
+                row[names[i]] = self.dimensions[i].labels[kept_codes[position][j]]
+            for key in ("n", "positives"):
+                row[key] = int(metrics[key][j])
+            for key in ("accuracy", "recall", "roc_auc"):
+                value = metrics[key][j]
+                row[key] = None if np.isnan(value) else float(value)
+            rows.append(row)
+        return rows
+    
+    def table(self, max_rolled_up: int | None = None) -> list[dict]:
+        """
+        Metrics for every cell and every roll-up of the cube.
+        
+        Args:
+            max_rolled_up: Roll up at most this many dimensions at once
+                (None rolls up every subset, down to the overall row)
+        
+        Returns:
+            Rows of rollup() for each grouping, full cells first
+        """
+        names = [dimension.name for dimension in self.dimensions]
+        limit = len(names) if max_rolled_up is None else min(max_rolled_up, len(names))
+        rows = []
+        for n_rolled_up in range(limit + 1):
+            for keep in combinations(names, len(names) - n_rolled_up):
+                rows.extend(self.rollup(list(keep)))
+        return rows
+
+
+def _group_counts(group, scores, positives, negatives):
+    """
+    Sum positive and negative counts per (group, score) pair.
+    
+    Returns:
+        Tuple of (groups, scores, positives, negatives), sorted by group
+        then score
+    """
+    order = np.lexsort((scores, group))
+    group = group[order]
+    scores = scores[order]
+    
+    starts = np.flatnonzero(np.concatenate((
+        [True], (group[1:] != group[:-1]) | (scores[1:] != scores[:-1])
+    )))
+    return (
+        group[starts],
+        scores[starts],
+        np.add.reduceat(positives[order], starts),
+        np.add.reduceat(negatives[order], starts),
+    )
+
+
+def _metrics(groups, scores, positives, negatives, threshold):
+    """Per-group metrics from counts sorted by group then score."""
+    starts = np.flatnonzero(np.concatenate(([True], groups[1:] != groups[:-1])))
+    group_of_entry = np.cumsum(np.concatenate(([False], groups[1:] != groups[:-1])))
+    
+    n_positive = np.add.reduceat(positives, starts).astype(np.float64)
+    n_negative = np.add.reduceat(negatives, starts).astype(np.float64)
+    
+    predicted = scores > threshold
+    true_positives = np.add.reduceat(np.where(predicted, positives, 0), starts)
+    true_negatives = np.add.reduceat(np.where(predicted, 0, negatives), starts)
+    
+    # Mann-Whitney: each negative is outscored by the positives above it
+    # in its group and ties with those at its score
+    cumulative = np.cumsum(positives)
+    before_group = (cumulative - positives)[starts]
+    positives_below = cumulative - positives - before_group[group_of_entry]
+    positives_above = n_positive[group_of_entry] - positives_below - positives
+    wins = np.add.reduceat(negatives * (positives_above + positives / 2), starts)
+    
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return {
+            "group": groups[starts],
+            "n": n_positive + n_negative,
+            "positives": n_positive,
+            "accuracy": (true_positives + true_negatives) / (n_positive + n_negative),
+            "recall": np.where(n_positive > 0, true_positives / n_positive, np.nan),
+            "roc_auc": np.where(
+                (n_positive > 0) & (n_negative > 0), wins / (n_positive * n_negative), np.nan
+            ),
+        }
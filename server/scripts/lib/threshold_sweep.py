@@ -0,0 +1,265 @@
+"""
+Threshold Sweep - Single-sort Classification Metrics
+
+Sorts scores once and derives the confusion matrix at every distinct
+threshold with cumulative sums. ROC and precision-recall curves, their
+areas, the metrics at any threshold and the F1-optimal or
+recall-constrained thresholds all come from that one pass, so sweeping
+tens of millions of scored rows costs about one sort.
+"""
+import json
+from pathlib import Path
+
+import numpy as np
+
+# Format written into saved sweeps
+SWEEP_FORMAT_VERSION = 1
+
+
+class ThresholdSweep:
+    """
+    Confusion counts at every distinct score threshold.
+    
+    Entry i counts rows with score >= thresholds[i]; thresholds are
+    descending, so true and false positives are non-decreasing.
+    """
+    
+    def __init__(
+        self,
+        thresholds: np.ndarray,
+        true_positives: np.ndarray,
+        false_positives: np.ndarray,
+        n_positive: int,
+        n_negative: int
+    ):
+        """
+        Initialize from cumulative confusion counts.
+        
+        Args:
+            thresholds: Distinct scores, descending
+            true_positives: Positives scoring at least each threshold
+            false_positives: Negatives scoring at least each threshold
+            n_positive: Total positive rows
+            n_negative: Total negative rows
+        """
+        self.thresholds = thresholds
+        self.true_positives = true_positives
+        self.false_positives = false_positives
+        self.n_positive = n_positive
+        self.n_negative = n_negative
+    
+    @classmethod
+    def from_scores(cls, y_true, y_score) -> "ThresholdSweep":
+        """
+        Sweep every distinct threshold of a set of scores.
+        
+        Args:
+            y_true: Binary labels (0/1 or bool)
+            y_score: Scores, higher meaning more likely positive
+        
+        Returns:
+            ThresholdSweep over the distinct scores
+        
+        Raises:
+            ValueError: If the inputs differ in length or are empty
+        """
+        y_true = np.asarray(y_true).astype(bool, copy=False).ravel()
+        y_score = np.asarray(y_score).ravel()
+        if len(y_true) != len(y_score) or len(y_true) == 0:
+            raise ValueError("y_true and y_score must be non-empty and of equal length")
+        
+        order = np.argsort(y_score)[::-1]
+        scores = y_score[order]
+        
+        # Last row of each run of equal scores
+        distinct = np.flatnonzero(scores[1:] != scores[:-1])
+        ends = np.append(distinct, len(scores) - 1)
+        
+        true_positives = np.cumsum(y_true[order], dtype=np.int64)[ends]
+        false_positives = ends + 1 - true_positives
+        n_positive = int(true_positives[-1])
+        return cls(
+            scores[ends], true_positives, false_positives,
+            n_positive, len(scores) - n_positive
+        )
+    
+    def _count_at(self, threshold: float, strict: bool) -> tuple[int, int]:
+        """True and false positives of predicting positive at a threshold."""
+        # Thresholds are descending; count entries predicted positive
+        ascending = self.thresholds[::-1]
+        side = "right" if strict else "left"
+        n_entries = len(ascending) - np.searchsorted(ascending, threshold, side=side)
+        if n_entries == 0:
+            return 0, 0
+        return int(self.true_positives[n_entries - 1]), int(self.false_positives[n_entries - 1])
+    
+    def at(self, threshold: float, strict: bool = False) -> dict[str, float]:
+        """
+        Get the metrics of predicting positive at a threshold.
+        
+        Args:
+            threshold: Score threshold
+            strict: Predict positive only above the threshold (as
+                predict() does at 0.5) instead of at or above it
+        
+        Returns:
+            Dictionary with threshold, tp, fp, fn, tn, accuracy, precision,
+            recall, f1 and specificity
+        """
+        tp, fp = self._count_at(threshold, strict)
+        fn = self.n_positive - tp
+        tn = self.n_negative - fp
+        precision = tp / (tp + fp) if tp + fp else 0.0
+        recall = tp / self.n_positive if self.n_positive else 0.0
+        return {
+            "threshold": float(threshold),
+            "tp": tp,
+            "fp": fp,
+            "fn": fn,
+            "tn": tn,
+            "accuracy": (tp + tn) / (self.n_positive + self.n_negative),
+            "precision": precision,
+            "recall": recall,
+            "f1": 2 * precision * recall / (precision + recall) if precision + recall else 0.0,
+            "specificity": tn / self.n_negative if self.n_negative else 0.0,
+        }
+    
+    def recall(self) -> np.ndarray:
+        """Recall at each threshold."""
+        return self.true_positives / max(self.n_positive, 1)
+    
+    def precision(self) -> np.ndarray:
+        """Precision at each threshold."""
+        return self.true_positives / (self.true_positives + self.false_positives)
+    
+    def f1(self) -> np.ndarray:
+        """F1 score at each threshold."""
+        # 2 tp / (2 tp + fp + fn), which is 0 rather than undefined at tp = 0
+        return 2 * self.true_positives / (
+            self.true_positives + self.false_positives + self.n_positive
+        )
+    
+    def roc_curve(self) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Get the ROC curve, starting at (0, 0).
+        
+        Returns:
+            Tuple of (false positive rate, true positive rate)
+        """
+        fpr = np.concatenate([[0.0], self.false_positives / max(self.n_negative, 1)])
+        tpr = np.concatenate([[0.0], self.recall()])
+        return fpr, tpr
+    
+    def roc_auc(self) -> float:
+        """Area under the ROC curve (ties count half, as in roc_auc_score)."""
+        fpr, tpr = self.roc_curve()
+        return float(np.diff(fpr) @ (tpr[1:] + tpr[:-1]) / 2)
+    
+    def average_precision(self) -> float:
+        """Average precision, as in average_precision_score."""
+        recall_steps = np.diff(np.concatenate([[0.0], self.recall()]))
+        return float(recall_steps @ self.precision())
+    
+    def best_f1(self) -> dict[str, float]:
+        """Metrics at the threshold with the highest F1 score."""
+        return self.at(self.thresholds[np.argmax(self.f1())])
+    
+    def threshold_for_recall(self, min_recall: float) -> dict[str, float] | None:
+        """
+        Find the most precise threshold that keeps recall at min_recall.
+        
+        Args:
+            min_recall: Required recall (0.0 to 1.0)
+        
+        Returns:
+            Metrics at that threshold (the highest one among equally
+            precise thresholds), or None if no threshold reaches min_recall
+        """
+        candidates = np.flatnonzero(self.recall() >= min_recall)
+        if len(candidates) == 0:
+            return None
+        # argmax returns the first, i.e. highest, of equally precise thresholds
+        best = candidates[np.argmax(self.precision()[candidates])]
+        return self.at(self.thresholds[best])
+    
+    def summary(self, thresholds=(), min_recalls=()) -> dict:
+        """
+        Collect the headline metrics of the sweep.
+        
+        Args:
+            thresholds: Thresholds to report metrics at
+            min_recalls: Recall targets to find thresholds for
+        
+        Returns:
+            JSON-serializable dictionary
+        """
+        return {
+            "n_positive": self.n_positive,
+            "n_negative": self.n_negative,
+            "n_thresholds": len(self.thresholds),
+            "roc_auc": self.roc_auc(),
+            "average_precision": self.average_precision(),
+            "best_f1": self.best_f1(),
+            "at_threshold": [self.at(threshold) for threshold in thresholds],
+            "for_recall": {
+                str(min_recall): self.threshold_for_recall(min_recall)
+                for min_recall in min_recalls
+            },
+        }
+    
+    def save(self, path, metadata: dict | None = None) -> None:
+        """
+        Write the sweep to a compressed .npz file.
+        
+        Counts are stored as int32 when they fit. Thresholds stay float64,
+        so metrics at any threshold match the unsaved sweep exactly.
+        
+        Args:
+            path: Target file (conventionally ending in .npz)
+            metadata: JSON-serializable data stored with the sweep
+        """
+        count_dtype = np.int32 if self.n_positive + self.n_negative < 2**31 else np.int64
+        
+        header = {
+            "format_version": SWEEP_FORMAT_VERSION,
+            "n_positive": self.n_positive,
+            "n_negative": self.n_negative,
+            "metadata": metadata or {},
+        }
+        with open(path, "wb") as f:
+            np.savez_compressed(
+                f,
+                header=np.frombuffer(json.dumps(header).encode(), dtype=np.uint8),
+                thresholds=self.thresholds.astype(np.float64),
+                true_positives=self.true_positives.astype(count_dtype),
+                false_positives=self.false_positives.astype(count_dtype),
+            )
+    
+    @classmethod
+    def load(cls, path) -> tuple["ThresholdSweep", dict]:
+        """
+        Read a sweep written by save().
+        
+        Args:
+            path: File written by save()
+        
+        Returns:
+            Tuple of (ThresholdSweep, metadata)
+        
+        Raises:
+            ValueError: If the file was written by another format version
+        """
+        with np.load(Path(path)) as data:
+            header = json.loads(data["header"].tobytes())
+            if header.get("format_version") != SWEEP_FORMAT_VERSION:
+                raise ValueError(
+                    f"Unsupported sweep format version {header.get('format_version')}"
+                )
+            sweep = cls(
+                data["thresholds"],
+                data["true_positives"].astype(np.int64),
+                data["false_positives"].astype(np.int64),
+                header["n_positive"],
+                header["n_negative"],
+            )
+        return sweep, header["metadata"]
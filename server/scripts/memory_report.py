@@ -0,0 +1,144 @@
+"""
+Worker Memory Report
+
+Starts gunicorn with several workers in each model loading mode and
+reports per-worker RSS and PSS (proportional set size, which splits
+shared pages between the processes using them).
+
+Linux only: reads /proc/<pid>/smaps_rollup.
+"""
+import argparse
+import json
+import os
+import signal
+import subprocess
+import sys
+import time
+import urllib.request
+from pathlib import Path
+
+# Paths
+BASE_DIR = Path(__file__).resolve().parent.parent
+
+# Environment for each loading mode
+MODES = {
+    "pickle": {"MODEL_LOAD_MODE": "pickle", "GUNICORN_PRELOAD": "false"},
+    "preload": {"MODEL_LOAD_MODE": "pickle", "GUNICORN_PRELOAD": "true"},
+    "mmap": {"MODEL_LOAD_MODE": "mmap", "GUNICORN_PRELOAD": "false"},
+    "mmap+preload": {"MODEL_LOAD_MODE": "mmap", "GUNICORN_PRELOAD": "true"},
+}
+
+SAMPLE_REQUEST = {
+    "age": 45, "sex": "male", "weight": 85.0, "height": 175.0,
+    "high_bp": True, "high_chol": True, "smoker": False, "stroke": False,
+    "heart_disease": False, "phys_activity": True, "fruits": True,
+    "veggies": True, "heavy_alcohol": False, "general_health": 3,
+    "mental_health": 5, "physical_health": 3, "difficulty_walking": False,
+}
+
+
+def read_memory(pid: int) -> dict[str, float]:
+    """Read RSS and PSS (MB) for a process."""
+    values = {}
+    with open(f"/proc/{pid}/smaps_rollup") as f:
+        for line in f:
+            key, _, rest = line.partition(":")
+            if key in ("Rss", "Pss"):
+                values[key.lower()] = int(rest.split()[0]) / 1024
+    return values
+
+
+def child_pids(pid: int) -> list[int]:
+    """List direct children of a process."""
+    with open(f"/proc/{pid}/task/{pid}/children") as f:
+        return [int(child) for child in f.read().split()]
+
+
+def wait_for_server(port: int, timeout: float = 120.0) -> None:
+    """Poll /health until the server answers."""
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            urllib.request.urlopen(f"http://127.0.0.1:{port}/health", timeout=1)
+            return
+        except OSError:
+            time.sleep(0.25)
+    raise TimeoutError(f"Server on port {port} did not start")
+
+
+def send_predictions(port: int, count: int) -> None:
+    """Send /predict requests so every worker pages in the model."""
+    body = json.dumps(SAMPLE_REQUEST).encode()
+    for _ in range(count):
+        request = urllib.request.Request(
+            f"http://127.0.0.1:{port}/predict",
+            data=body,
+            headers={"Content-Type": "application/json"},
+        )
+        urllib.request.urlopen(request, timeout=30).read()
+
+
+def measure_mode(mode: str, workers: int, port: int) -> list[dict]:
+    """Run gunicorn in one mode and measure its workers."""
+    env = {
+        **os.environ,
+        **MODES[mode],
+        "FLASK_DEBUG": "False",
+        # Keep every request on the model path
+        "PREDICTION_CACHE_SIZE": "0",
+        "BMI_CURVE_CACHE_SIZE": "0",
+    }
+    server = subprocess.Popen(
+        [
+            sys.executable, "-m", "gunicorn", "run:app",
+            "--workers", str(workers),
+            "--bind", f"127.0.0.1:{port}",
+        ],
+        cwd=BASE_DIR,
+        env=env,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    try:
+        wait_for_server(port)
+        # Workers load lazily (without preload); wait until all are up
+        deadline = time.time() + 120
+        while len(child_pids(server.pid)) < workers and time.time() < deadline:
+            time.sleep(0.25)
+        send_predictions(port, workers * 10)
+        time.sleep(1)
+        
+        rows = [{"process": "master", **read_memory(server.pid)}]
+        for index, pid in enumerate(sorted(child_pids(server.pid)), 1):
+            rows.append({"process": f"worker {index}", **read_memory(pid)})
+        return rows
+    finally:
+        server.send_signal(signal.SIGTERM)
+        server.wait(timeout=60)
+
+
+def main():
+    """Print RSS/PSS per process for each loading mode."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--modes", nargs="+", default=list(MODES), choices=list(MODES))
+    args = parser.parse_args()
+    
+    print("="*60)
+    print("WORKER MEMORY REPORT")
+    print("="*60)
+    
+    for mode in args.modes:
+        rows = measure_mode(mode, args.workers, args.port)
+        print(f"\n--- Mode: {mode} ({args.workers} workers) ---")
+        print("Process    |   RSS MB |   PSS MB")
+        print("-" * 35)
+        for row in rows:
+            print(f"{row['process']:10s} | {row['rss']:8.1f} | {row['pss']:8.1f}")
+        total_pss = sum(row["pss"] for row in rows)
+        print(f"{'total':10s} | {'':8s} | {total_pss:8.1f}")
+
+
+if __name__ == "__main__":
+    main()
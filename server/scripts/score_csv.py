@@ -0,0 +1,324 @@
+"""
+Bulk CSV Scoring Script
+
+Scores an arbitrarily large CSV in chunks across a process pool and
+writes probabilities, risk levels and contributing factors in input order.
+
+The input may use the API's request fields (age, sex, weight, height, ...)
+or BRFSS columns matching FEATURE_ORDER. Each worker process creates the
+app once, so the model is loaded once per process.
+"""
+import argparse
+import json
+import os
+import sys
+import time
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+# Paths
+BASE_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(BASE_DIR))
+
+from app.config import Config  # noqa: E402
+from app.utils.constants import (  # noqa: E402
+    AGE_CATEGORIES,
+    BOOLEAN_FEATURE_FIELDS,
+    FEATURE_ORDER,
+    INTEGER_FEATURE_FIELDS,
+)
+
+OUTPUT_COLUMNS = [
+    "row", "probability", "risk_level", "bmi", "bmi_category",
+    "contributing_factors", "error",
+]
+
+# Request fields needed to score API-format rows
+API_FIELDS = [
+    "age", "sex", "weight", "height", "high_bp", "high_chol", "smoker",
+    "stroke", "heart_disease", "phys_activity", "fruits", "veggies",
+    "heavy_alcohol", "general_health", "mental_health", "physical_health",
+    "difficulty_walking",
+]
+
+# Per-process state set up by _init_worker
+_service = None
+_validator = None
+
+
+def detect_format(columns) -> str:
+    """
+    Identify the input layout from its header.
+    
+    Returns:
+        "brfss" when every FEATURE_ORDER column is present, "api" when every
+        request field is present
+    
+    Raises:
+        ValueError: If neither layout matches
+    """
+    columns = set(columns)
+    if columns.issuperset(FEATURE_ORDER):
+        return "brfss"
+    if columns.issuperset(API_FIELDS):
+        return "api"
+    raise ValueError(
+        "CSV must have either the BRFSS feature columns or the API request fields; "
+        f"missing API fields: {sorted(set(API_FIELDS) - columns)}"
+    )
+
+
+def _init_worker(model_path: str, engine: str) -> None:
+    """Create the app and prediction service once per process."""
+    global _service, _validator
+    
+    class ScoringConfig(Config):
+        DEBUG = False
+        MODEL_PATH = model_path
+        MODEL_LOAD_MODE = "pickle"
+        MODEL_ENGINE = engine
+        PREDICTION_CACHE_SIZE = 0
+        BMI_CURVE_CACHE_SIZE = 0
+        MICRO_BATCH_ENABLED = False
+        MODEL_BACKGROUND_LOAD = False
+        MODEL_RELOAD_INTERVAL = 0
+    
+    from app import create_app
+    from app.api.compiled_validator import CompiledValidator
+    from app.api.schemas import PredictionRequestSchema
+    from app.services.prediction_service import PredictionService
+    
+    app = create_app(ScoringConfig)
+    app.app_context().push()
+    
+    _service = PredictionService()
+    _validator = CompiledValidator(PredictionRequestSchema())
+    
+    # One process per core already; don't let each fan out to all cores
+    estimator = _service.model.current().model
+    if hasattr(estimator, "n_jobs"):
+        estimator.n_jobs = 1
+
+
+def _result_row(row: int, result: dict) -> dict:
+    """Flatten a prediction result into an output row."""
+    return {
+        "row": row,
+        "probability": result["probability"],
+        "risk_level": result["risk_level"],
+        "bmi": result["bmi"],
+        "bmi_category": result["bmi_category"],
+        "contributing_factors": "; ".join(result["contributing_factors"]),
+        "error": "",
+    }
+
+
+def _error_row(row: int, error: str) -> dict:
+    """Output row for an input that could not be scored."""
+    return {
+        "row": row, "probability": None, "risk_level": "", "bmi": None,
+        "bmi_category": "", "contributing_factors": "", "error": error,
+    }
+
+
+def _score_api_chunk(start: int, chunk: pd.DataFrame) -> list[dict]:
+    """Validate and score rows given as API request fields."""
+    from marshmallow import ValidationError
+    
+    output = [None] * len(chunk)
+    valid_positions = []
+    valid_rows = []
+    for position, record in enumerate(chunk[API_FIELDS].to_dict("records")):
+        # Empty cells arrive as NaN; treat them as missing fields
+        record = {key: value for key, value in record.items() if value == value}
+        try:
+            valid_rows.append(_validator.load(record))
+            valid_positions.append(position)
+        except ValidationError as error:
+            output[position] = _error_row(start + position, json.dumps(error.messages))
+    
+    results, _ = _service.predict_batch(valid_rows)
+    for position, result in zip(valid_positions, results, strict=True):
+        output[position] = _result_row(start + position, result)
+    return output
+
+
+def _brfss_inputs(chunk: pd.DataFrame) -> list[dict]:
+    """
+    Map BRFSS columns to the request fields used for contributing factors.
+    
+    Age is reported as the lower bound of the BRFSS age category.
+    """
+    columns = {
+        field: chunk[feature].to_numpy()
+        for feature, field in {**BOOLEAN_FEATURE_FIELDS, **INTEGER_FEATURE_FIELDS}.items()
+    }
+    age_lower_bounds = {category: low for category, (low, _) in AGE_CATEGORIES.items()}
+    columns["age"] = [age_lower_bounds.get(int(c), 0) for c in chunk["Age"].to_numpy()]
+    return pd.DataFrame(columns).to_dict("records")
+
+
+def _score_brfss_chunk(start: int, chunk: pd.DataFrame) -> list[dict]:
+    """Score rows given as BRFSS feature columns (BMI already computed)."""
+    features = chunk[FEATURE_ORDER].to_numpy(dtype=np.float64)
+    complete = ~np.isnan(features).any(axis=1)
+    
+    output = [None] * len(chunk)
+    for position in np.flatnonzero(~complete):
+        output[position] = _error_row(start + position, "Missing feature values")
+    
+    positions = np.flatnonzero(complete)
+    probabilities = _service.model.predict_proba_batch(features[complete])
+    bmis = features[complete, FEATURE_ORDER.index("BMI")]
+    inputs = _brfss_inputs(chunk.iloc[positions])
+    
+    results = _service.build_results(inputs, bmis, probabilities)
+    for position, result in zip(positions.tolist(), results, strict=True):
+        output[position] = _result_row(start + position, result)
+    return output
+
+
+def score_chunk(start: int, chunk: pd.DataFrame, layout: str) -> pd.DataFrame:
+    """
+    Score one chunk in a worker process.
+    
+    Args:
+        start: Index of the chunk's first row in the input file
+        chunk: Rows to score
+        layout: "api" or "brfss"
+    
+    Returns:
+        DataFrame with OUTPUT_COLUMNS, one row per input row
+    """
+    if layout == "brfss":
+        rows = _score_brfss_chunk(start, chunk)
+    else:
+        rows = _score_api_chunk(start, chunk)
+    return pd.DataFrame(rows, columns=OUTPUT_COLUMNS)
+
+
+def write_synthetic_csv(path: Path, rows: int, seed: int = 0) -> None:
+    """Write a synthetic API-format CSV for benchmarking."""
+    rng = np.random.default_rng(seed)
+    chunk_rows = 500_000
+    for offset in range(0, rows, chunk_rows):
+        n = min(chunk_rows, rows - offset)
+        data = {
+            "age": rng.integers(18, 91, n),
+            "sex": rng.choice(["male", "female"], n),
+            "weight": np.round(rng.uniform(45, 140, n), 1),
+            "height": np.round(rng.uniform(150, 200, n), 1),
+        }
+        for field in API_FIELDS:
+            if field not in data:
+                data[field] = rng.random(n) < 0.4
+        data["general_health"] = rng.integers(1, 6, n)
+        data["mental_health"] = rng.integers(0, 31, n)
+        data["physical_health"] = rng.integers(0, 31, n)
+        pd.DataFrame(data)[API_FIELDS].to_csv(
+            path, mode="w" if offset == 0 else "a", header=offset == 0, index=False
+        )
+
+
+def score_csv(
+    input_path: Path,
+    output_path: Path,
+    workers: int,
+    chunk_size: int,
+    model_path: str,
+    engine: str
+) -> tuple[int, float]:
+    """
+    Score a CSV file into an output CSV, preserving input order.
+    
+    At most two chunks per worker are in flight, so memory stays bounded
+    regardless of file size.
+    
+    Returns:
+        Tuple of (rows scored, elapsed seconds)
+    """
+    reader = pd.read_csv(input_path, chunksize=chunk_size)
+    started = time.perf_counter()
+    rows = 0
+    
+    with open(output_path, "w", newline="") as output:
+        header = True
+        
+        def write(frame: pd.DataFrame) -> None:
+            nonlocal header, rows
+            frame.to_csv(output, header=header, index=False)
+            header = False
+            rows += len(frame)
+        
+        if workers <= 1:
+            _init_worker(model_path, engine)
+            start = 0
+            for chunk in reader:
+                layout = detect_format(chunk.columns)
+                write(score_chunk(start, chunk, layout))
+                start += len(chunk)
+            return rows, time.perf_counter() - started
+        
+        with ProcessPoolExecutor(
+            max_workers=workers,
+            initializer=_init_worker,
+            initargs=(model_path, engine)
+        ) as pool:
+            pending: deque[Future] = deque()
+            start = 0
+            for chunk in reader:
+                layout = detect_format(chunk.columns)
+                pending.append(pool.submit(score_chunk, start, chunk, layout))
+                start += len(chunk)
+                # Write finished chunks in order, keeping the pool busy
+                while len(pending) >= 2 * workers or (pending and pending[0].done()):
+                    write(pending.popleft().result())
+            while pending:
+                write(pending.popleft().result())
+    
+    return rows, time.perf_counter() - started
+
+
+def main():
+    """Parse arguments and score the file."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("input", type=Path, help="CSV to score")
+    parser.add_argument("output", type=Path, nargs="?", help="Output CSV")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--chunk-size", type=int, default=20_000)
+    parser.add_argument("--model", default=Config.MODEL_PATH, help="Model artifact")
+    parser.add_argument("--engine", default="compiled", choices=["sklearn", "compiled"])
+    parser.add_argument(
+        "--make-synthetic", type=int, metavar="ROWS",
+        help="Write a synthetic API-format CSV with ROWS rows to INPUT and exit"
+    )
+    args = parser.parse_args()
+    
+    if args.make_synthetic:
+        write_synthetic_csv(args.input, args.make_synthetic)
+        print(f"Wrote {args.make_synthetic:,} synthetic rows to {args.input}")
+        return
+    
+    if args.output is None:
+        parser.error("output is required when scoring")
+    
+    print("="*60)
+    print("BULK CSV SCORING")
+    print("="*60)
+    print(f"Input: {args.input}")
+    print(f"Workers: {args.workers}, chunk size: {args.chunk_size:,}, engine: {args.engine}")
+    
+    rows, elapsed = score_csv(
+        args.input, args.output, args.workers, args.chunk_size, args.model, args.engine
+    )
+    
+    print(f"\nScored {rows:,} rows in {elapsed:.1f}s ({rows / elapsed:,.0f} rows/sec)")
+    print(f"Output: {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -3,30 +3,83 @@ Model Training Script
 
 Trains a Random Forest classifier for diabetes risk prediction.
 Generates model.pkl artifact for Flask application.
+
+The dataset is read through the shared dataset cache (see
+scripts.lib.dataset_cache): typed, memory-mapped columns and the same
+stratified train/test split that evaluate_model.py uses.
+
+With --compact, first searches tree counts and depths for the forest with
+the lowest inference latency that still meets the PRD thresholds (plus
+--compact-margin), and records the trade-off curve in the artifact
+metadata. If the refit forest then misses the PRD on the test set, the
+default size is trained instead and the rejection is recorded.
+
+Cross-validation folds are fitted concurrently within a CPU budget
+(--cpus), sharing the training matrix through a read-only memory map.
+Fold predictions and the final model are cached under a key of the
+dataset hash, split, features, target and hyperparameters (see
+scripts.lib.fit_cache), so a re-run with unchanged inputs skips every
+fit. Wall-clock time per stage is printed at the end.
 """
+import argparse
+import copy
+import io
+import os
+import sys
+import time
+import timeit
+from contextlib import contextmanager
 from datetime import datetime
 from pathlib import Path
 
 import joblib
+import numpy as np
 import pandas as pd
+from joblib import Parallel, delayed
+from sklearn.base import clone
 from sklearn.ensemble import RandomForestClassifier
-from sklearn.metrics import (
-    classification_report,
-    confusion_matrix,
-    f1_score,
-    precision_score,
-    recall_score,
-    roc_auc_score,
-)
-from sklearn.model_selection import cross_val_score, train_test_split
+from sklearn.metrics import classification_report
+from sklearn.model_selection import StratifiedKFold, train_test_split
 
 # Paths
 BASE_DIR = Path(__file__).resolve().parent.parent
 DATA_DIR = BASE_DIR.parent / "data"
 ARTIFACTS_DIR = BASE_DIR / "artifacts"
 DATASET_PATH = DATA_DIR / "diabetes_binary_5050split_health_indicators_BRFSS2015.csv"
+CACHE_DIR = DATA_DIR / "cache"
+FIT_CACHE_DIR = CACHE_DIR / "fits"
 MODEL_PATH = ARTIFACTS_DIR / "model.pkl"
 
+sys.path.insert(0, str(BASE_DIR))
+
+from scripts.lib.dataset_cache import load_dataset  # noqa: E402
+from scripts.lib.fit_cache import FitCache, fit_key  # noqa: E402
+from scripts.lib.threshold_sweep import ThresholdSweep  # noqa: E402
+
+# PRD requirements on the test set
+RECALL_THRESHOLD = 0.70
+ROC_AUC_THRESHOLD = 0.75
+
+# Default forest size, and the compaction search space
+N_ESTIMATORS = 100
+MAX_DEPTH = 15
+COMPACT_DEPTHS = [6, 8, 10, 12, 15]
+COMPACT_TREE_STEP = 10
+
+# Headroom compaction candidates need above each PRD threshold on the
+# validation split, since test metrics of the refit forest differ slightly
+COMPACT_MARGIN = 0.01
+
+# Rows per timed predict_proba call when measuring per-row latency
+LATENCY_BATCH_ROWS = 1000
+
+# Cross-validation folds (stratified, unshuffled, as cross_val_score(cv=5))
+CV_FOLDS = 5
+
+# Parameters that change speed or logging, not the fitted model; left out
+# of fit cache keys
+RUNTIME_PARAMS = ("n_jobs", "verbose")
+
 # Feature order must match constants.py in the application
 FEATURE_ORDER = [
     "HighBP",
@@ -53,74 +106,327 @@ FEATURE_ORDER = [
 ]
 
 
-def load_and_prepare_data():
-    """Load dataset and prepare features/target."""
+def load_and_prepare_data(rebuild_cache=False):
+    """Load the cached dataset and validate its features."""
     print("Loading dataset...")
-    df = pd.read_csv(DATASET_PATH)
-    print(f"Dataset shape: {df.shape}")
+    dataset = load_dataset(DATASET_PATH, CACHE_DIR, "Diabetes_binary", rebuild=rebuild_cache)
+    print(f"Dataset: {dataset.n_rows:,} rows (cache {dataset.directory.name})")
     
     # Validate feature order
     for feat in FEATURE_ORDER:
-        if feat not in df.columns:
+        if feat not in dataset.columns:
             raise ValueError(f"Feature '{feat}' not found in dataset!")
     
-    # Prepare features and target
-    X = df[FEATURE_ORDER]
-    y = df["Diabetes_binary"]
-    
-    print(f"Features shape: {X.shape}")
-    print(f"Target distribution: {y.value_counts().to_dict()}")
+    y = dataset.columns["Diabetes_binary"]
+    print(f"Features shape: ({dataset.n_rows}, {len(FEATURE_ORDER)})")
+    print(f"Target distribution: {dict(enumerate(np.bincount(y).tolist()))}")
     
-    return X, y
+    return dataset
 
 
-def train_model(X_train, y_train):
-    """Train Random Forest classifier."""
-    print("\nTraining Random Forest classifier...")
-    
-    # Model hyperparameters
+@contextmanager
+def stage(timings, name):
+    """Record and print the wall-clock time of a pipeline stage."""
+    started = time.perf_counter()
+    yield
+    timings[name] = time.perf_counter() - started
+    print(f"[{name}] {timings[name]:.2f}s")
+
+
+def build_model(n_estimators=N_ESTIMATORS, max_depth=MAX_DEPTH, n_jobs=-1, verbose=1):
+    """Create an unfitted Random Forest classifier."""
     # Using balanced class_weight to handle any residual imbalance
     # Limiting max_depth for faster inference and to prevent overfitting
-    model = RandomForestClassifier(
-        n_estimators=100,
-        max_depth=15,
+    return RandomForestClassifier(
+        n_estimators=n_estimators,
+        max_depth=max_depth,
         min_samples_split=10,
         min_samples_leaf=5,
         class_weight="balanced",
         random_state=42,
-        n_jobs=-1,
-        verbose=1
+        n_jobs=n_jobs,
+        verbose=verbose
     )
+
+
+def model_params(model):
+    """Hyperparameters that determine the fitted model, for cache keys."""
+    return {
+        name: value for name, value in model.get_params().items()
+        if name not in RUNTIME_PARAMS
+    }
+
+
+def train_model(X_train, y_train, n_estimators=N_ESTIMATORS, max_depth=MAX_DEPTH, verbose=1,
+                n_jobs=-1):
+    """Train Random Forest classifier."""
+    print(f"\nTraining Random Forest classifier ({n_estimators} trees, max_depth={max_depth})...")
     
+    model = build_model(n_estimators, max_depth, n_jobs, verbose)
     model.fit(X_train, y_train)
     print("Training complete!")
     
     return model
 
 
-def evaluate_model(model, X_train, y_train, X_test, y_test):
+def train_final_model(X_train, y_train, n_estimators, max_depth, cache, data_key, cpus):
+    """
+    Train the final forest, or load it from the fit cache.
+    
+    Args:
+        X_train: Training features
+        y_train: Training labels
+        n_estimators: Number of trees
+        max_depth: Maximum tree depth
+        cache: FitCache for the fitted model
+        data_key: Dataset hash, split, features and target, part of the cache key
+        cpus: Cores the fit may use
+    
+    Returns:
+        Fitted forest
+    """
+    params = model_params(build_model(n_estimators, max_depth))
+    key = fit_key(stage="final", params=params, **data_key)
+    model = cache.load_model(key)
+    if model is not None:
+        print(f"\nLoaded final model from fit cache ({key[:12]})")
+        return model
+    
+    model = train_model(X_train, y_train, n_estimators, max_depth, n_jobs=cpus)
+    # The budget is for training; predictions keep using every core
+    model.set_params(n_jobs=-1)
+    cache.save_model(key, model)
+    return model
+
+
+def _fit_fold(model, X, y, train_index, val_index, cache, key):
+    """Fit one fold, cache and return its held-out probabilities."""
+    model.fit(X[train_index], y[train_index])
+    probabilities = model.predict_proba(X[val_index])[:, 1]
+    cache.save_array(key, probabilities)
+    return probabilities
+
+
+def cross_validate(model, X, y, cache, data_key, cpus, n_folds=CV_FOLDS):
+    """
+    Cross-validate recall with folds fitted concurrently and cached.
+    
+    Folds match cross_val_score(model, X, y, cv=n_folds, scoring="recall").
+    Up to cpus folds run at once, each forest using an equal share of the
+    budget; X is handed to the workers as one read-only memory map
+    instead of a copy per worker.
+    
+    Args:
+        model: Unfitted estimator
+        X: Training features (NumPy array)
+        y: Training labels (NumPy array)
+        cache: FitCache for fold predictions
+        data_key: Dataset hash, split, features and target, part of the cache keys
+        cpus: Cores the fits may use together
+        n_folds: Number of stratified folds
+    
+    Returns:
+        Tuple of (recall per fold, number of folds fitted rather than cached)
+    """
+    folds = list(StratifiedKFold(n_splits=n_folds).split(X, y))
+    params = model_params(model)
+    keys = [
+        fit_key(stage="cv", fold=fold, n_folds=n_folds, params=params, **data_key)
+        for fold in range(n_folds)
+    ]
+    
+    probabilities = [cache.load_array(key) for key in keys]
+    missing = [fold for fold, cached in enumerate(probabilities) if cached is None]
+    if missing:
+        workers = min(len(missing), cpus)
+        fold_model = clone(model).set_params(n_jobs=max(1, cpus // workers), verbose=0)
+        print(f"Fitting {len(missing)} fold(s): {workers} at a time, "
+              f"{fold_model.n_jobs} core(s) each")
+        # max_nbytes=0 memory-maps every array argument for the workers
+        fitted = Parallel(n_jobs=workers, max_nbytes=0, mmap_mode="r")(
+            delayed(_fit_fold)(clone(fold_model), X, y, *folds[fold], cache, keys[fold])
+            for fold in missing
+        )
+        for fold, fold_probabilities in zip(missing, fitted, strict=True):
+            probabilities[fold] = fold_probabilities
+    
+    # predict() picks class 1 only above 0.5
+    scores = np.array([
+        ThresholdSweep.from_scores(y[val_index], fold_probabilities).at(0.5, strict=True)["recall"]
+        for (_, val_index), fold_probabilities in zip(folds, probabilities, strict=True)
+    ])
+    return scores, len(missing)
+
+
+def forest_prefix(model, n_trees):
+    """Forest made of the first n_trees trees of a fitted forest."""
+    prefix = copy.copy(model)
+    prefix.estimators_ = model.estimators_[:n_trees]
+    prefix.n_estimators = n_trees
+    return prefix
+
+
+def measure_latency(model, X, repeat=5):
+    """
+    Measure single-threaded predict_proba time per row.
+    
+    Args:
+        model: Fitted forest
+        X: Feature array with at least LATENCY_BATCH_ROWS rows
+        repeat: Timed calls (the best is returned)
+    
+    Returns:
+        Microseconds per row on a LATENCY_BATCH_ROWS batch
+    """
+    model = copy.copy(model)
+    model.n_jobs = 1
+    batch = X[:LATENCY_BATCH_ROWS]
+    model.predict_proba(batch)  # warm up
+    best = min(timeit.repeat(lambda: model.predict_proba(batch), number=1, repeat=repeat))
+    return best / len(batch) * 1e6
+
+
+def artifact_size(model):
+    """Size in bytes of the model as joblib would save it."""
+    buffer = io.BytesIO()
+    joblib.dump(model, buffer)
+    return buffer.tell()
+
+
+def mark_pareto_front(candidates):
+    """Flag candidates no other candidate beats on both latency and ROC-AUC."""
+    for candidate in candidates:
+        candidate["pareto"] = not any(
+            other["us_per_row"] <= candidate["us_per_row"]
+            and other["roc_auc"] >= candidate["roc_auc"]
+            and (other["us_per_row"], other["roc_auc"])
+            != (candidate["us_per_row"], candidate["roc_auc"])
+            for other in candidates
+        )
+
+
+def meets_prd(recall, roc_auc, margin=0.0):
+    """Whether unrounded metrics clear both PRD thresholds by at least margin."""
+    return recall >= RECALL_THRESHOLD + margin and roc_auc >= ROC_AUC_THRESHOLD + margin
+
+
+def compact_forest(X_train, y_train, depths, tree_step, margin=COMPACT_MARGIN):
+    """
+    Find the fastest forest size that still meets the PRD thresholds.
+    
+    Candidates are forests of each max_depth, fit on 80% of the training
+    set, and every prefix of their trees in steps of tree_step. They are
+    scored on the remaining 20% so the test set stays unseen. Prefix
+    probabilities come from one pass over per-tree predictions.
+    
+    Args:
+        X_train: Training features
+        y_train: Training target
+        depths: max_depth values to try
+        tree_step: Tree count increment
+        margin: Headroom required above each PRD threshold
+    
+    Returns:
+        Tuple of (chosen candidate or None if none meets the PRD, all
+        candidates sorted by latency)
+    """
+    print("\n" + "="*60)
+    print("FOREST COMPACTION")
+    print("="*60)
+    
+    X_fit, X_val, y_fit, y_val = train_test_split(
+        X_train, y_train,
+        test_size=0.2,
+        stratify=y_train,
+        random_state=42
+    )
+    X_val_array = X_val.to_numpy(dtype=np.float32)
+    
+    candidates = []
+    for depth in depths:
+        forest = train_model(X_fit, y_fit, max_depth=depth, verbose=0)
+        tree_probabilities = np.stack([
+            tree.predict_proba(X_val_array, check_input=False)[:, 1]
+            for tree in forest.estimators_
+        ])
+        running_sums = np.cumsum(tree_probabilities, axis=0)
+        
+        for n_trees in range(tree_step, forest.n_estimators + 1, tree_step):
+            probabilities = running_sums[n_trees - 1] / n_trees
+            sweep = ThresholdSweep.from_scores(y_val, probabilities)
+            recall, roc_auc = sweep.at(0.5, strict=True)["recall"], sweep.roc_auc()
+            prefix = forest_prefix(forest, n_trees)
+            # Rounded for display only; selection uses the unrounded metrics
+            candidates.append({
+                "n_estimators": n_trees,
+                "max_depth": depth,
+                "recall": round(recall, 4),
+                "roc_auc": round(roc_auc, 4),
+                "us_per_row": round(measure_latency(prefix, X_val_array), 3),
+                "size_bytes": artifact_size(prefix),
+                "meets_prd": meets_prd(recall, roc_auc, margin),
+            })
+    
+    candidates.sort(key=lambda candidate: (candidate["us_per_row"], candidate["size_bytes"]))
+    mark_pareto_front(candidates)
+    
+    print(f"\nLatency/ROC-AUC trade-off ({len(candidates)} candidates, Pareto front shown):")
+    print(f"{'trees':>5} {'depth':>5} {'recall':>7} {'roc_auc':>7} {'us/row':>8} {'MB':>7}  PRD")
+    for candidate in candidates:
+        if candidate["pareto"]:
+            print(
+                f"{candidate['n_estimators']:>5} {candidate['max_depth']:>5} "
+                f"{candidate['recall']:>7.4f} {candidate['roc_auc']:>7.4f} "
+                f"{candidate['us_per_row']:>8.2f} {candidate['size_bytes'] / 2**20:>7.2f}  "
+                f"{'✓' if candidate['meets_prd'] else '✗'}"
+            )
+    
+    # Sorted by latency then size, so the first passing candidate wins
+    chosen = next((candidate for candidate in candidates if candidate["meets_prd"]), None)
+    if chosen is None:
+        print(f"\nNo candidate meets the PRD thresholds + {margin}; keeping the full forest")
+    else:
+        print(
+            f"\nChosen: {chosen['n_estimators']} trees, max_depth={chosen['max_depth']} "
+            f"({chosen['us_per_row']:.2f} us/row)"
+        )
+    return chosen, candidates
+
+
+def evaluate_model(model, cv_scores, X_test, y_test):
     """Evaluate model performance."""
     print("\n" + "="*60)
     print("MODEL EVALUATION")
     print("="*60)
     
     # Cross-validation on training set
-    print("\n--- Cross-Validation (5-fold) ---")
-    cv_scores = cross_val_score(model, X_train, y_train, cv=5, scoring="recall")
+    print(f"\n--- Cross-Validation ({len(cv_scores)}-fold) ---")
     print(f"Recall scores: {cv_scores}")
     print(f"Mean CV Recall: {cv_scores.mean():.4f} (+/- {cv_scores.std()*2:.4f})")
     
-    # Test set predictions
-    y_pred = model.predict(X_test)
+    # Test set predictions; model.predict picks class 1 only above 0.5
     y_proba = model.predict_proba(X_test)[:, 1]
+    y_pred = (y_proba > 0.5).astype(int)
+    
+    # Metrics, computed once from a single-sort threshold sweep
+    sweep = ThresholdSweep.from_scores(y_test, y_proba)
+    point = sweep.at(0.5, strict=True)
+    metrics = {
+        "cv_recall_mean": cv_scores.mean(),
+        "cv_recall_std": cv_scores.std(),
+        "test_accuracy": point["accuracy"],
+        "test_precision": point["precision"],
+        "test_recall": point["recall"],
+        "test_f1": point["f1"],
+        "test_roc_auc": sweep.roc_auc()
+    }
     
-    # Metrics
     print("\n--- Test Set Metrics ---")
-    print(f"Accuracy:  {(y_pred == y_test).mean():.4f}")
-    print(f"Precision: {precision_score(y_test, y_pred):.4f}")
-    print(f"Recall:    {recall_score(y_test, y_pred):.4f}")
-    print(f"F1 Score:  {f1_score(y_test, y_pred):.4f}")
-    print(f"ROC-AUC:   {roc_auc_score(y_test, y_proba):.4f}")
+    print(f"Accuracy:  {metrics['test_accuracy']:.4f}")
+    print(f"Precision: {metrics['test_precision']:.4f}")
+    print(f"Recall:    {metrics['test_recall']:.4f}")
+    print(f"F1 Score:  {metrics['test_f1']:.4f}")
+    print(f"ROC-AUC:   {metrics['test_roc_auc']:.4f}")
     
     # Classification report
     print("\n--- Classification Report ---")
@@ -128,11 +434,10 @@ def evaluate_model(model, X_train, y_train, X_test, y_test):
     
     # Confusion matrix
     print("\n--- Confusion Matrix ---")
-    cm = confusion_matrix(y_test, y_pred)
     print("                 Predicted")
     print("                 No    Yes")
-    print(f"Actual No  {cm[0][0]:6d} {cm[0][1]:6d}")
-    print(f"Actual Yes {cm[1][0]:6d} {cm[1][1]:6d}")
+    print(f"Actual No  {point['tn']:6d} {point['fp']:6d}")
+    print(f"Actual Yes {point['fn']:6d} {point['tp']:6d}")
     
     # Feature importance
     print("\n--- Top 10 Feature Importances ---")
@@ -144,18 +449,10 @@ def evaluate_model(model, X_train, y_train, X_test, y_test):
     for _, row in importance_df.head(10).iterrows():
         print(f"  {row['feature']:25s}: {row['importance']:.4f}")
     
-    return {
-        "cv_recall_mean": cv_scores.mean(),
-        "cv_recall_std": cv_scores.std(),
-        "test_accuracy": (y_pred == y_test).mean(),
-        "test_precision": precision_score(y_test, y_pred),
-        "test_recall": recall_score(y_test, y_pred),
-        "test_f1": f1_score(y_test, y_pred),
-        "test_roc_auc": roc_auc_score(y_test, y_proba)
-    }
+    return metrics
 
 
-def save_model(model, metrics):
+def save_model(model, metrics, compaction=None, dataset_hash=None):
     """Save trained model to disk."""
     print("\n" + "="*60)
     print("SAVING MODEL")
@@ -170,8 +467,11 @@ def save_model(model, metrics):
         "feature_order": FEATURE_ORDER,
         "metrics": metrics,
         "trained_at": datetime.now().isoformat(),
-        "sklearn_version": pd.__version__
+        "sklearn_version": pd.__version__,
+        "dataset_hash": dataset_hash
     }
+    if compaction is not None:
+        model_data["compaction"] = compaction
     
     joblib.dump(model_data, MODEL_PATH)
     
@@ -181,49 +481,187 @@ def save_model(model, metrics):
     print(f"File size: {file_size:.2f} MB")
 
 
+def fit_and_evaluate(
+    X_train, X_test, y_train, y_test, n_estimators, max_depth,
+    cache, data_key, cpus, timings, label=""
+):
+    """
+    Cross-validate, fit on the full training set and evaluate one forest size.
+    
+    Args:
+        X_train, X_test, y_train, y_test: The shared train/test split
+        n_estimators: Number of trees
+        max_depth: Maximum tree depth
+        cache: FitCache for fold predictions and the final model
+        data_key: Fit key parts identifying the training data
+        cpus: Cores for cross-validation and the final fit
+        timings: Stage timings to record into
+        label: Suffix for the stage names
+    
+    Returns:
+        Tuple of (fitted model, evaluation metrics)
+    """
+    with stage(timings, f"cross_validation{label}"):
+        print(f"\nCross-validating ({CV_FOLDS} folds, {cpus} core(s))...")
+        cv_scores, n_fitted = cross_validate(
+            build_model(n_estimators, max_depth),
+            X_train.to_numpy(dtype=np.float32), y_train.to_numpy(),
+            cache, data_key, cpus
+        )
+        print(f"{CV_FOLDS - n_fitted} of {CV_FOLDS} folds loaded from fit cache")
+    
+    with stage(timings, f"final_fit{label}"):
+        model = train_final_model(
+            X_train, y_train, n_estimators, max_depth, cache, data_key, cpus
+        )
+    
+    with stage(timings, f"evaluation{label}"):
+        metrics = evaluate_model(model, cv_scores, X_test, y_test)
+    return model, metrics
+
+
 def main():
     """Main training pipeline."""
+    parser = argparse.ArgumentParser(description="Train the diabetes risk model")
+    parser.add_argument(
+        "--compact", action="store_true",
+        help="Pick the fastest tree count and depth that meets the PRD thresholds"
+    )
+    parser.add_argument(
+        "--compact-depths", type=int, nargs="+", default=COMPACT_DEPTHS,
+        help="max_depth values to try when compacting"
+    )
+    parser.add_argument(
+        "--compact-step", type=int, default=COMPACT_TREE_STEP,
+        help="Tree count increment when compacting"
+    )
+    parser.add_argument(
+        "--compact-margin", type=float, default=COMPACT_MARGIN,
+        help="Headroom candidates need above each PRD threshold when compacting"
+    )
+    parser.add_argument(
+        "--rebuild-cache", action="store_true",
+        help="Rebuild the dataset cache even if the CSV is unchanged"
+    )
+    parser.add_argument(
+        "--cpus", type=int, default=os.cpu_count() or 1,
+        help="Cores for cross-validation and the final fit"
+    )
+    parser.add_argument(
+        "--no-fit-cache", action="store_true",
+        help="Fit every fold and the final model even if cached"
+    )
+    args = parser.parse_args()
+    
     print("="*60)
     print("DIABETES RISK PREDICTION MODEL TRAINING")
     print("="*60)
     print(f"Started at: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
     
+    timings = {}
+    cache = FitCache(FIT_CACHE_DIR, enabled=not args.no_fit_cache)
+    
     # Load data
-    X, y = load_and_prepare_data()
+    with stage(timings, "load"):
+        dataset = load_and_prepare_data(args.rebuild_cache)
+        
+        # Split data (persisted with the cache, shared with evaluate_model.py)
+        print("\nSplitting data (80% train, 20% test)...")
+        X_train, X_test, y_train, y_test = dataset.split(FEATURE_ORDER, "Diabetes_binary")
+        print(f"Training set: {len(X_train):,} samples")
+        print(f"Test set: {len(X_test):,} samples")
+    # Everything about the data that changes a fit; part of every cache key
+    data_key = {
+        "dataset": dataset.source_hash,
+        "split": dataset.manifest["split"],
+        "features": FEATURE_ORDER,
+        "target": "Diabetes_binary",
+    }
     
-    # Split data
-    print("\nSplitting data (80% train, 20% test)...")
-    X_train, X_test, y_train, y_test = train_test_split(
-        X, y,
-        test_size=0.2,
-        stratify=y,
-        random_state=42
-    )
-    print(f"Training set: {len(X_train):,} samples")
-    print(f"Test set: {len(X_test):,} samples")
+    # Optionally choose a smaller forest, then train on the full training set
+    n_estimators, max_depth = N_ESTIMATORS, MAX_DEPTH
+    compaction = None
+    if args.compact:
+        with stage(timings, "compaction"):
+            chosen, candidates = compact_forest(
+                X_train, y_train, args.compact_depths, args.compact_step,
+                args.compact_margin
+            )
+        if chosen is not None:
+            n_estimators, max_depth = chosen["n_estimators"], chosen["max_depth"]
+        compaction = {
+            "selection": "80/20 split of the training set",
+            "latency_batch_rows": LATENCY_BATCH_ROWS,
+            "thresholds": {"recall": RECALL_THRESHOLD, "roc_auc": ROC_AUC_THRESHOLD},
+            "margin": args.compact_margin,
+            "chosen": chosen,
+            "reference": next(
+                (
+                    candidate for candidate in candidates
+                    if (candidate["n_estimators"], candidate["max_depth"])
+                    == (N_ESTIMATORS, MAX_DEPTH)
+                ),
+                None
+            ),
+            "candidates": candidates,
+        }
     
-    # Train model
-    model = train_model(X_train, y_train)
+    model, metrics = fit_and_evaluate(
+        X_train, X_test, y_train, y_test, n_estimators, max_depth,
+        cache, data_key, args.cpus, timings
+    )
     
-    # Evaluate model
-    metrics = evaluate_model(model, X_train, y_train, X_test, y_test)
+    # The margin on the validation split makes this rare, but the refit
+    # forest is what ships: if it misses the PRD, use the reference size
+    if compaction is not None:
+        compaction["rejected"] = None
+        test_pass = meets_prd(metrics["test_recall"], metrics["test_roc_auc"])
+        if not test_pass and (n_estimators, max_depth) != (N_ESTIMATORS, MAX_DEPTH):
+            print(
+                f"\nWARNING: the {n_estimators}-tree, max_depth={max_depth} forest misses "
+                f"the PRD on the test set; falling back to {N_ESTIMATORS} trees, "
+                f"max_depth={MAX_DEPTH}"
+            )
+            compaction["rejected"] = {
+                "n_estimators": n_estimators,
+                "max_depth": max_depth,
+                "test_recall": round(metrics["test_recall"], 4),
+                "test_roc_auc": round(metrics["test_roc_auc"], 4),
+            }
+            n_estimators, max_depth = N_ESTIMATORS, MAX_DEPTH
+            model, metrics = fit_and_evaluate(
+                X_train, X_test, y_train, y_test, n_estimators, max_depth,
+                cache, data_key, args.cpus, timings, label="_fallback"
+            )
     
     # Validate PRD requirements
     print("\n" + "="*60)
     print("PRD REQUIREMENTS VALIDATION")
     print("="*60)
     
-    recall_threshold = 0.70
-    roc_auc_threshold = 0.75
+    recall_pass = metrics["test_recall"] >= RECALL_THRESHOLD
+    roc_auc_pass = metrics["test_roc_auc"] >= ROC_AUC_THRESHOLD
     
-    recall_pass = metrics["test_recall"] >= recall_threshold
-    roc_auc_pass = metrics["test_roc_auc"] >= roc_auc_threshold
+    print(f"Recall >= {RECALL_THRESHOLD}: {'✓ PASS' if recall_pass else '✗ FAIL'} ({metrics['test_recall']:.4f})")
+    print(f"ROC-AUC >= {ROC_AUC_THRESHOLD}: {'✓ PASS' if roc_auc_pass else '✗ FAIL'} ({metrics['test_roc_auc']:.4f})")
     
-    print(f"Recall >= {recall_threshold}: {'✓ PASS' if recall_pass else '✗ FAIL'} ({metrics['test_recall']:.4f})")
-    print(f"ROC-AUC >= {roc_auc_threshold}: {'✓ PASS' if roc_auc_pass else '✗ FAIL'} ({metrics['test_roc_auc']:.4f})")
+    if compaction is not None:
+        compaction["shipped"] = {"n_estimators": n_estimators, "max_depth": max_depth}
+        compaction["test_meets_prd"] = recall_pass and roc_auc_pass
+        if not compaction["test_meets_prd"]:
+            print("\nWARNING: the saved forest misses the PRD on the test set")
+        compaction["test_us_per_row"] = round(
+            measure_latency(model, X_test.to_numpy(dtype=np.float32)), 3
+        )
     
     # Save model
-    save_model(model, metrics)
+    with stage(timings, "save"):
+        save_model(model, metrics, compaction, dataset.source_hash)
+    
+    print("\n--- Stage Timings (wall clock) ---")
+    for name, seconds in timings.items():
+        print(f"  {name:18s}: {seconds:8.2f}s")
+    print(f"  {'total':18s}: {sum(timings.values()):8.2f}s")
     
     print("\n" + "="*60)
     print("TRAINING COMPLETE")
@@ -3,7 +3,9 @@ Test Configuration - Pytest Fixtures
 
 Provides test fixtures for Flask application testing.
 """
+import numpy as np
 import pytest
+from sklearn.ensemble import RandomForestClassifier
 
 from app import create_app
 from app.config import TestingConfig
@@ -50,3 +52,22 @@ def sample_prediction_request():
         "physical_health": 3,
         "difficulty_walking": False,
     }
+
+
+@pytest.fixture(scope="session")
+def synthetic_forest():
+    """Small forest trained on BRFSS-shaped synthetic data, with its inputs."""
+    rng = np.random.default_rng(0)
+    X = rng.integers(0, 6, size=(2000, 21)).astype(float)
+    X[:, 3] = rng.integers(15, 50, size=2000)
+    y = (X[:, 0] + X[:, 3] / 10 + rng.normal(0, 1, 2000) > 5).astype(int)
+    
+    model = RandomForestClassifier(
+        n_estimators=10,
+        max_depth=8,
+        min_samples_leaf=5,
+        class_weight="balanced",
+        random_state=42
+    )
+    model.fit(X, y)
+    return model, X
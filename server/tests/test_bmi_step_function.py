@@ -0,0 +1,137 @@
+"""
+BMI Step Function Tests
+
+Tests that the per-profile BMI step function reproduces the forest exactly.
+"""
+import numpy as np
+import pytest
+
+from app.models.bmi_step_function import (
+    BMIStepFunction,
+    float32_breakpoints,
+    forest_split_thresholds,
+)
+from app.models.compiled_forest import CompiledForest
+from app.models.ml_model import DiabetesModel
+from app.utils.constants import BMI_FEATURE_INDEX
+
+
+def _positive_proba(model):
+    return lambda features: model.predict_proba(features)[:, 1]
+
+
+class TestBreakpoints:
+    """Tests for threshold collection and float32 rounding."""
+    
+    def test_compiled_and_sklearn_thresholds_match(self, synthetic_forest):
+        """Both model types should report the same BMI thresholds."""
+        model, _ = synthetic_forest
+        compiled = CompiledForest.from_estimator(model)
+        
+        np.testing.assert_array_equal(
+            forest_split_thresholds(model, BMI_FEATURE_INDEX),
+            forest_split_thresholds(compiled, BMI_FEATURE_INDEX)
+        )
+    
+    def test_breakpoints_preserve_split_decisions(self):
+        """x <= threshold should equal x <= breakpoint for float32 inputs."""
+        thresholds = np.array([24.5, 27.300000001, 30.1])
+        bounds = float32_breakpoints(thresholds)
+        
+        for threshold, bound in zip(thresholds, bounds, strict=True):
+            for x in np.nextafter(bound, [-np.inf, np.inf]).astype(np.float32):
+                assert (x <= threshold) == (x <= bound)
+            assert bound <= threshold
+
+
+class TestStepFunction:
+    """Tests for step function construction and lookup."""
+    
+    def test_matches_forest_for_every_bmi(self, synthetic_forest):
+        """Lookups should equal direct forest predictions at any BMI."""
+        model, X = synthetic_forest
+        thresholds = forest_split_thresholds(model, BMI_FEATURE_INDEX)
+        breakpoints = float32_breakpoints(thresholds)
+        
+        bmis = np.concatenate([
+            np.linspace(10, 60, 301),
+            thresholds,
+            np.nextafter(thresholds, np.inf),
+            np.nextafter(thresholds, -np.inf),
+        ])
+        for profile in X[:5]:
+            profile = profile.reshape(1, -1)
+            step_function = BMIStepFunction.build(
+                profile, breakpoints, _positive_proba(model)
+            )
+            
+            rows = np.repeat(profile, len(bmis), axis=0)
+            rows[:, BMI_FEATURE_INDEX] = bmis
+            expected = model.predict_proba(rows)[:, 1]
+            
+            actual = np.array([step_function(bmi) for bmi in bmis])
+            np.testing.assert_array_equal(actual, expected)
+            np.testing.assert_array_equal(step_function.evaluate(bmis), expected)
+    
+    def test_collapses_equal_intervals(self, synthetic_forest):
+        """Adjacent intervals with equal probability should be merged."""
+        model, X = synthetic_forest
+        breakpoints = float32_breakpoints(
+            forest_split_thresholds(model, BMI_FEATURE_INDEX)
+        )
+        step_function = BMIStepFunction.build(
+            X[:1], breakpoints, _positive_proba(model)
+        )
+        
+        assert len(step_function.values) == len(step_function.breakpoints) + 1
+        assert np.all(np.diff(step_function.values) != 0)
+    
+    def test_changes_are_exact(self):
+        """Every step inside the range, however narrow, should start a point."""
+        breakpoints = np.array([20.0, 20.001, 30.0, 50.0], dtype=np.float32)
+        step_function = BMIStepFunction(breakpoints, np.array([0.1, 0.9, 0.2, 0.3, 0.4]))
+        
+        bmis, probabilities = step_function.changes(15.0, 45.0)
+        
+        assert bmis[0] == 15.0 and bmis[-1] == 45.0
+        np.testing.assert_array_equal(probabilities, [0.1, 0.9, 0.2, 0.3, 0.3])
+        np.testing.assert_array_equal(
+            bmis[1:-1], np.nextafter(breakpoints[:3], np.float32(np.inf))
+        )
+        np.testing.assert_array_equal(step_function.evaluate(bmis), probabilities)
+    
+    def test_profile_key_ignores_bmi(self):
+        """Profiles differing only in BMI should share a cache key."""
+        a = np.ones((1, 21))
+        b = a.copy()
+        b[0, BMI_FEATURE_INDEX] = 42.0
+        c = a.copy()
+        c[0, 0] = 0.0
+        
+        assert BMIStepFunction.profile_key(a) == BMIStepFunction.profile_key(b)
+        assert BMIStepFunction.profile_key(a) != BMIStepFunction.profile_key(c)
+
+
+class TestModelBMICache:
+    """Tests for the BMI curve cache inside DiabetesModel."""
+    
+    def test_new_weight_for_same_profile_hits_curve_cache(
+        self, app, sample_prediction_request
+    ):
+        """A different BMI for a known profile should not walk the forest again."""
+        from app.services.preprocessing_service import PreprocessingService
+        
+        model = DiabetesModel.get_instance()
+        if model.cache_stats()["bmi_curve"] is None:
+            pytest.skip("Mock predictions have no split thresholds")
+        
+        preprocessing = PreprocessingService()
+        first = preprocessing.prepare_features(sample_prediction_request, 27.1)
+        second = preprocessing.prepare_features(sample_prediction_request, 31.6)
+        
+        model.predict_proba(first)
+        hits_before = model.cache_stats()["bmi_curve"]["hits"]
+        probability = model.predict_proba(second)
+        
+        assert model.cache_stats()["bmi_curve"]["hits"] == hits_before + 1
+        assert probability == model.current()._predict_proba_uncached(second)
@@ -0,0 +1,295 @@
+"""
+Compiled Forest Tests
+
+Parity tests between the array-backed forest evaluator and scikit-learn.
+"""
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+from app.config import TestingConfig
+from app.models.compiled_forest import CompiledForest
+from app.models.ml_model import DiabetesModel
+
+BASE_DIR = Path(__file__).parent.parent
+MODEL_PATH = BASE_DIR / "artifacts" / "model.pkl"
+DATASET_PATH = (
+    BASE_DIR.parent / "data" / "diabetes_binary_5050split_health_indicators_BRFSS2015.csv"
+)
+
+
+class TestCompiledForestParity:
+    """Compiled forest should reproduce scikit-learn probabilities."""
+    
+    def test_matches_sklearn_on_training_rows(self, synthetic_forest):
+        """Probabilities should match predict_proba for every row."""
+        model, X = synthetic_forest
+        compiled = CompiledForest.from_estimator(model)
+        
+        np.testing.assert_allclose(
+            compiled.predict_proba(X), model.predict_proba(X), rtol=0, atol=1e-12
+        )
+    
+    def test_matches_sklearn_on_split_thresholds(self, synthetic_forest):
+        """Rows exactly on a split threshold should go left like sklearn."""
+        model, X = synthetic_forest
+        compiled = CompiledForest.from_estimator(model)
+        
+        tree = model.estimators_[0].tree_
+        split_nodes = np.flatnonzero(tree.children_left != -1)
+        rows = np.repeat(X[:1], len(split_nodes), axis=0)
+        rows[np.arange(len(split_nodes)), tree.feature[split_nodes]] = (
+            tree.threshold[split_nodes]
+        )
+        
+        np.testing.assert_allclose(
+            compiled.predict_proba(rows), model.predict_proba(rows), rtol=0, atol=1e-12
+        )
+    
+    def test_single_row_shape(self, synthetic_forest):
+        """A single row should produce a (1, 2) probability array."""
+        model, X = synthetic_forest
+        compiled = CompiledForest.from_estimator(model)
+        
+        probabilities = compiled.predict_proba(X[:1])
+        assert probabilities.shape == (1, 2)
+        assert abs(probabilities[0].sum() - 1.0) < 1e-12
+    
+    def test_matches_sklearn_on_brfss_test_split(self):
+        """Compiled engine should match the trained model on the BRFSS test split."""
+        if not MODEL_PATH.exists() or not DATASET_PATH.exists():
+            pytest.skip("Model or dataset not found - run train_model.py first")
+        
+        import joblib
+        import pandas as pd
+        from sklearn.model_selection import train_test_split
+        
+        model_data = joblib.load(MODEL_PATH)
+        model = model_data["model"]
+        df = pd.read_csv(DATASET_PATH)
+        _, X_test, _, _ = train_test_split(
+            df[model_data["feature_order"]],
+            df["Diabetes_binary"],
+            test_size=0.2,
+            stratify=df["Diabetes_binary"],
+            random_state=42
+        )
+        X_test = X_test.to_numpy()
+        
+        compiled = CompiledForest.from_estimator(model)
+        np.testing.assert_allclose(
+            compiled.predict_proba(X_test)[:, 1],
+            model.predict_proba(X_test)[:, 1],
+            rtol=0,
+            atol=1e-12
+        )
+
+
+class TestCompiledForestStorage:
+    """Tests for the on-disk, memory-mappable forest layout."""
+    
+    def test_save_and_mmap_load_round_trip(self, synthetic_forest, tmp_path):
+        """A saved forest should load memory-mapped with identical output."""
+        model, X = synthetic_forest
+        compiled = CompiledForest.from_estimator(model, metadata={"trained_at": "now"})
+        compiled.save(tmp_path / "forest")
+        
+        loaded = CompiledForest.load(tmp_path / "forest", mmap=True)
+        
+        assert loaded.metadata == {"trained_at": "now"}
+        assert loaded.max_depth == compiled.max_depth
+        assert not loaded.threshold.flags.writeable
+        np.testing.assert_array_equal(loaded.predict_proba(X), compiled.predict_proba(X))
+        np.testing.assert_array_equal(loaded.predict(X), model.predict(X))
+    
+    def test_save_replaces_existing_forest(self, synthetic_forest, tmp_path):
+        """Saving over a forest should swap it in and leave no side directories."""
+        model, X = synthetic_forest
+        CompiledForest.from_estimator(model, metadata={"version": 1}).save(tmp_path / "forest")
+        old = CompiledForest.load(tmp_path / "forest", mmap=True)
+        
+        CompiledForest.from_estimator(model, metadata={"version": 2}).save(tmp_path / "forest")
+        
+        assert CompiledForest.load(tmp_path / "forest").metadata == {"version": 2}
+        assert sorted(path.name for path in tmp_path.iterdir()) == ["forest"]
+        np.testing.assert_allclose(old.predict_proba(X), model.predict_proba(X), rtol=0, atol=1e-12)
+    
+    def test_rejects_unknown_format(self, synthetic_forest, tmp_path):
+        """Loading a manifest with another format version should fail."""
+        import json
+        
+        model, _ = synthetic_forest
+        CompiledForest.from_estimator(model).save(tmp_path / "forest")
+        manifest_path = tmp_path / "forest" / "forest.json"
+        manifest = json.loads(manifest_path.read_text())
+        manifest["format_version"] = 999
+        manifest_path.write_text(json.dumps(manifest))
+        
+        with pytest.raises(ValueError):
+            CompiledForest.load(tmp_path / "forest")
+    
+    def test_model_serves_memory_mapped_forest(
+        self, app, synthetic_forest, tmp_path
+    ):
+        """MODEL_LOAD_MODE=mmap should serve predictions from FOREST_PATH."""
+        model, X = synthetic_forest
+        CompiledForest.from_estimator(model).save(tmp_path / "forest")
+        
+        diabetes_model = DiabetesModel.get_instance()
+        with app.app_context():
+            app.config["MODEL_LOAD_MODE"] = "mmap"
+            app.config["FOREST_PATH"] = str(tmp_path / "forest")
+            app.config["PREDICTION_CACHE_SIZE"] = 0
+            app.config["BMI_CURVE_CACHE_SIZE"] = 0
+            try:
+                diabetes_model._load_model()
+                probability = diabetes_model.predict_proba(X[:1])
+            finally:
+                app.config.from_object(TestingConfig)
+                diabetes_model._load_model()
+        
+        assert abs(probability - model.predict_proba(X[:1])[0][1]) < 1e-12
+
+
+class TestCompactForestFile:
+    """Tests for the single-file forest with narrow dtypes."""
+    
+    def test_round_trip_keeps_predictions(self, synthetic_forest, tmp_path):
+        """A compact forest should predict like the estimator, up to float32 rounding."""
+        model, X = synthetic_forest
+        compiled = CompiledForest.from_estimator(
+            model, metadata={"feature_order": ["a", "b"], "trained_at": "now"}
+        )
+        compiled.save_compact(tmp_path / "model.compact")
+        
+        loaded = CompiledForest.load_compact(tmp_path / "model.compact")
+        
+        assert loaded.feature.dtype == np.int16
+        assert loaded.threshold.dtype == np.float32
+        assert loaded.left.dtype == np.int32
+        assert loaded.value.dtype == np.float32
+        assert loaded.metadata == {"feature_order": ["a", "b"], "trained_at": "now"}
+        assert not loaded.threshold.flags.writeable
+        np.testing.assert_allclose(
+            loaded.predict_proba(X), model.predict_proba(X), rtol=0, atol=1e-6
+        )
+        np.testing.assert_array_equal(loaded.predict(X), model.predict(X))
+    
+    def test_float32_thresholds_keep_split_decisions(self, synthetic_forest, tmp_path):
+        """Rows exactly on a split threshold should still go left like sklearn."""
+        model, X = synthetic_forest
+        CompiledForest.from_estimator(model).save_compact(tmp_path / "model.compact")
+        loaded = CompiledForest.load_compact(tmp_path / "model.compact", mmap=False)
+        
+        tree = model.estimators_[0].tree_
+        split_nodes = np.flatnonzero(tree.children_left != -1)
+        rows = np.repeat(X[:1], len(split_nodes), axis=0)
+        rows[np.arange(len(split_nodes)), tree.feature[split_nodes]] = (
+            tree.threshold[split_nodes]
+        )
+        
+        np.testing.assert_array_equal(
+            loaded.apply(rows), CompiledForest.from_estimator(model).apply(rows)
+        )
+    
+    def test_rejects_other_files(self, synthetic_forest, tmp_path):
+        """Files without the magic bytes or with another version should fail."""
+        from app.models.compiled_forest import COMPACT_MAGIC
+        
+        model, _ = synthetic_forest
+        path = tmp_path / "model.compact"
+        CompiledForest.from_estimator(model).save_compact(path)
+        data = path.read_bytes()
+        
+        path.write_bytes(data[:len(COMPACT_MAGIC)] + (999).to_bytes(4, "little")
+                         + data[len(COMPACT_MAGIC) + 4:])
+        with pytest.raises(ValueError, match="v999"):
+            CompiledForest.load_compact(path)
+        
+        path.write_bytes(b"not a forest" + data)
+        with pytest.raises(ValueError):
+            CompiledForest.load_compact(path)
+    
+    def test_model_serves_compact_forest(self, app, synthetic_forest, tmp_path):
+        """MODEL_LOAD_MODE=compact should serve predictions from COMPACT_MODEL_PATH."""
+        model, X = synthetic_forest
+        CompiledForest.from_estimator(model).save_compact(tmp_path / "model.compact")
+        
+        diabetes_model = DiabetesModel.get_instance()
+        with app.app_context():
+            app.config["MODEL_LOAD_MODE"] = "compact"
+            app.config["COMPACT_MODEL_PATH"] = str(tmp_path / "model.compact")
+            app.config["PREDICTION_CACHE_SIZE"] = 0
+            app.config["BMI_CURVE_CACHE_SIZE"] = 0
+            try:
+                diabetes_model._load_model()
+                probability = diabetes_model.predict_proba(X[:1])
+                paths = diabetes_model.watched_paths()
+            finally:
+                app.config.from_object(TestingConfig)
+                diabetes_model._load_model()
+        
+        assert paths[0] == str(tmp_path / "model.compact")
+        assert abs(probability - model.predict_proba(X[:1])[0][1]) < 1e-6
+    
+    def test_compact_mode_never_imports_sklearn(self, synthetic_forest, tmp_path):
+        """Serving a compact forest should need nothing beyond NumPy."""
+        import json
+        import subprocess
+        import sys
+        
+        model, _ = synthetic_forest
+        CompiledForest.from_estimator(model).save_compact(tmp_path / "model.compact")
+        script = (
+            "import json, sys\n"
+            "from app import create_app\n"
+            "from app.config import TestingConfig\n"
+            "from app.models.ml_model import DiabetesModel, probe_features\n"
+            "class CompactConfig(TestingConfig):\n"
+            "    MODEL_LOAD_MODE = 'compact'\n"
+            f"    COMPACT_MODEL_PATH = {str(tmp_path / 'model.compact')!r}\n"
+            "app = create_app(CompactConfig)\n"
+            "with app.app_context():\n"
+            "    DiabetesModel.get_instance().predict_proba(probe_features(1))\n"
+            "print(json.dumps(sorted(m for m in ('sklearn', 'joblib', 'scipy')"
+            " if m in sys.modules)))\n"
+        )
+        
+        result = subprocess.run(
+            [sys.executable, "-c", script],
+            cwd=BASE_DIR, capture_output=True, text=True, check=True
+        )
+        
+        assert json.loads(result.stdout.splitlines()[-1]) == []
+
+
+class TestModelEngineConfig:
+    """Tests for selecting the inference engine through config."""
+    
+    def test_compiled_engine_matches_sklearn_engine(self, app, sample_prediction_request):
+        """Both engines should give the same probability for a request."""
+        from app.services.preprocessing_service import PreprocessingService
+        
+        preprocessing = PreprocessingService()
+        bmi = preprocessing.calculate_bmi(85.0, 175.0)
+        features = preprocessing.prepare_features(sample_prediction_request, bmi)
+        
+        model = DiabetesModel.get_instance()
+        with app.app_context():
+            app.config["PREDICTION_CACHE_SIZE"] = 0
+            app.config["BMI_CURVE_CACHE_SIZE"] = 0
+            app.config["MODEL_ENGINE"] = "sklearn"
+            model._load_model()
+            sklearn_probability = model.predict_proba(features)
+            
+            app.config["MODEL_ENGINE"] = "compiled"
+            model._load_model()
+            compiled_probability = model.predict_proba(features)
+            
+            app.config["MODEL_ENGINE"] = "sklearn"
+            app.config["PREDICTION_CACHE_SIZE"] = TestingConfig.PREDICTION_CACHE_SIZE
+            app.config["BMI_CURVE_CACHE_SIZE"] = TestingConfig.BMI_CURVE_CACHE_SIZE
+            model._load_model()
+        
+        assert abs(sklearn_probability - compiled_probability) < 1e-12
@@ -0,0 +1,100 @@
+"""
+Compiled Validator Tests
+
+Tests that the compiled validator matches marshmallow exactly.
+"""
+import pytest
+from marshmallow import EXCLUDE, Schema, ValidationError, fields, validate
+
+from app.api.compiled_validator import CompiledValidator
+from app.api.schemas import PredictionRequestSchema
+
+
+def _variants(base):
+    """Payloads covering coercion, type, range, choice and structure errors."""
+    return [
+        base,
+        {**base, "age": "45", "weight": "85.5", "high_bp": "true", "smoker": 0},
+        {**base, "age": 45.0, "height": 175},
+        {**base, "age": 45.5},
+        {**base, "age": True},
+        {**base, "age": 17, "weight": 501.0},
+        {**base, "age": 120, "weight": 20, "height": 250.0},
+        {**base, "weight": float("nan"), "height": float("inf")},
+        {**base, "weight": "heavy", "general_health": "3"},
+        {**base, "sex": "other"},
+        {**base, "sex": 1},
+        {**base, "sex": None, "high_bp": None},
+        {**base, "high_bp": "maybe", "fruits": 2},
+        {**base, "extra": 1, "another": "x"},
+        {key: value for key, value in base.items() if key not in ("age", "sex")},
+        {key: value for key, value in base.items() if key != "age"} | {"agee": 45},
+        {},
+        [],
+        "not an object",
+        None,
+    ]
+
+
+class TestCompiledValidatorParity:
+    """The compiled validator should be indistinguishable from Schema.load."""
+    
+    @pytest.fixture
+    def schema(self):
+        """Marshmallow request schema."""
+        return PredictionRequestSchema()
+    
+    @pytest.fixture
+    def validator(self, schema):
+        """Validator compiled from the request schema."""
+        return CompiledValidator(schema)
+    
+    def test_validate_matches_marshmallow(
+        self, schema, validator, sample_prediction_request
+    ):
+        """Error payloads should be identical for every variant."""
+        for payload in _variants(sample_prediction_request):
+            assert validator.validate(payload) == schema.validate(payload), payload
+    
+    def test_load_matches_marshmallow(
+        self, schema, validator, sample_prediction_request
+    ):
+        """Loaded values (and their types) should be identical."""
+        for payload in _variants(sample_prediction_request):
+            try:
+                expected = schema.load(payload)
+            except ValidationError as error:
+                with pytest.raises(ValidationError) as raised:
+                    validator.load(payload)
+                assert raised.value.messages == error.messages
+                continue
+            
+            loaded = validator.load(payload)
+            assert loaded == expected
+            assert {k: type(v) for k, v in loaded.items()} == {
+                k: type(v) for k, v in expected.items()
+            }
+    
+    def test_respects_unknown_and_exclusive_ranges(self):
+        """Schema options beyond the request schema should also match."""
+        class CustomSchema(Schema):
+            class Meta:
+                unknown = EXCLUDE
+            
+            score = fields.Float(
+                required=True,
+                validate=validate.Range(min=0, max=1, min_inclusive=False)
+            )
+            label = fields.String(data_key="name")
+        
+        schema = CustomSchema()
+        validator = CompiledValidator(schema)
+        payloads = [
+            {"score": 0.5, "name": "a", "other": 1},
+            {"score": 0},
+            {"score": 1},
+            {"score": float("nan")},
+            {"label": "a"},
+        ]
+        for payload in payloads:
+            assert validator.validate(payload) == schema.validate(payload), payload
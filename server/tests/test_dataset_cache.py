@@ -0,0 +1,107 @@
+"""
+Dataset Cache Tests
+
+Tests for the typed, memory-mapped dataset cache and its persisted split.
+"""
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.model_selection import train_test_split
+
+from scripts.lib.dataset_cache import MANIFEST_NAME, load_dataset, narrowest_dtype
+
+FEATURES = ["HighBP", "BMI", "Age", "Weight"]
+
+
+@pytest.fixture
+def dataset_csv(tmp_path):
+    """A small CSV shaped like the BRFSS export (every value written as a float)."""
+    rng = np.random.default_rng(0)
+    n = 500
+    df = pd.DataFrame({
+        "Diabetes_binary": rng.integers(0, 2, n),
+        "HighBP": rng.integers(0, 2, n),
+        "BMI": rng.integers(12, 99, n),
+        "Age": rng.integers(1, 14, n),
+        "Weight": rng.uniform(40, 150, n).round(1),
+    }).astype(float)
+    path = tmp_path / "brfss.csv"
+    df.to_csv(path, index=False)
+    return path
+
+
+class TestNarrowestDtype:
+    """Tests for narrowest_dtype."""
+    
+    @pytest.mark.parametrize("values,expected", [
+        ([0.0, 1.0, 255.0], np.uint8),
+        ([-1.0, 100.0], np.int8),
+        ([0.0, 300.0], np.uint16),
+        ([0.0, 70_000.0], np.uint32),
+        ([0.5, 1.25], np.float32),
+        ([0.1, 0.2], np.float64),
+    ])
+    def test_picks_narrowest_exact_dtype(self, values, expected):
+        """Whole numbers get the smallest integer type; others the smallest exact float."""
+        assert narrowest_dtype(np.array(values)) == np.dtype(expected)
+
+
+class TestDatasetCache:
+    """Tests for load_dataset and CachedDataset."""
+    
+    def test_columns_are_narrow_and_exact(self, dataset_csv, tmp_path):
+        """Cached columns should use narrow dtypes and equal the CSV values."""
+        dataset = load_dataset(dataset_csv, tmp_path / "cache", "Diabetes_binary")
+        df = pd.read_csv(dataset_csv)
+        
+        assert dataset.columns["HighBP"].dtype == np.uint8
+        assert dataset.columns["BMI"].dtype == np.uint8
+        assert dataset.columns["Weight"].dtype == np.float64
+        pd.testing.assert_frame_equal(dataset.frame(), df, check_dtype=False)
+    
+    def test_split_matches_train_test_split(self, dataset_csv, tmp_path):
+        """The persisted split should be the one train_test_split gives the DataFrame."""
+        dataset = load_dataset(dataset_csv, tmp_path / "cache", "Diabetes_binary")
+        df = pd.read_csv(dataset_csv)
+        expected = train_test_split(
+            df[FEATURES], df["Diabetes_binary"],
+            test_size=0.2, stratify=df["Diabetes_binary"], random_state=42
+        )
+        
+        for part, expected_part in zip(dataset.split(FEATURES, "Diabetes_binary"), expected, strict=True):
+            assert part.index.equals(expected_part.index)
+            np.testing.assert_array_equal(part.to_numpy(dtype=float), expected_part.to_numpy())
+    
+    def test_unchanged_source_reuses_cache(self, dataset_csv, tmp_path):
+        """A second load of the same CSV should open the existing cache."""
+        first = load_dataset(dataset_csv, tmp_path / "cache", "Diabetes_binary")
+        built_at = (first.directory / MANIFEST_NAME).stat().st_mtime_ns
+        
+        second = load_dataset(dataset_csv, tmp_path / "cache", "Diabetes_binary")
+        
+        assert second.directory == first.directory
+        assert (second.directory / MANIFEST_NAME).stat().st_mtime_ns == built_at
+    
+    def test_changed_source_builds_new_cache(self, dataset_csv, tmp_path):
+        """Editing the CSV should change the hash and build a separate cache."""
+        first = load_dataset(dataset_csv, tmp_path / "cache", "Diabetes_binary")
+        df = pd.read_csv(dataset_csv)
+        df.loc[0, "BMI"] = 300
+        df.to_csv(dataset_csv, index=False)
+        
+        second = load_dataset(dataset_csv, tmp_path / "cache", "Diabetes_binary")
+        
+        assert second.source_hash != first.source_hash
+        assert second.directory != first.directory
+        assert second.columns["BMI"].dtype == np.uint16
+    
+    def test_columns_are_memory_mapped_read_only(self, dataset_csv, tmp_path):
+        """Cached columns should be read-only views of the files on disk."""
+        dataset = load_dataset(dataset_csv, tmp_path / "cache", "Diabetes_binary")
+        
+        assert not dataset.columns["Age"].flags.writeable
+    
+    def test_missing_target_is_rejected(self, dataset_csv, tmp_path):
+        """Building a cache without the target column should raise ValueError."""
+        with pytest.raises(ValueError, match="Target column"):
+            load_dataset(dataset_csv, tmp_path / "cache", "Outcome")
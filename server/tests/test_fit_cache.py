@@ -0,0 +1,64 @@
+"""
+Fit Cache Tests
+
+Tests for content-keyed storage of fitted models and fold predictions.
+"""
+import numpy as np
+from sklearn.ensemble import RandomForestClassifier
+
+from scripts.lib.fit_cache import FitCache, fit_key
+
+
+class TestFitKey:
+    """Tests for fit_key."""
+    
+    def test_same_inputs_give_same_key(self):
+        """Keys should not depend on argument or dictionary order."""
+        first = fit_key(dataset="abc", params={"max_depth": 8, "n_estimators": 10}, fold=0)
+        second = fit_key(fold=0, params={"n_estimators": 10, "max_depth": 8}, dataset="abc")
+        
+        assert first == second
+    
+    def test_any_changed_input_changes_key(self):
+        """A different dataset, hyperparameter or fold should give another key."""
+        base = {"dataset": "abc", "params": {"max_depth": 8}, "fold": 0}
+        key = fit_key(**base)
+        
+        assert fit_key(**{**base, "dataset": "abd"}) != key
+        assert fit_key(**{**base, "params": {"max_depth": 9}}) != key
+        assert fit_key(**{**base, "fold": 1}) != key
+
+
+class TestFitCache:
+    """Tests for FitCache."""
+    
+    def test_round_trip(self, synthetic_forest, tmp_path):
+        """Stored models and arrays should load back unchanged."""
+        model, X = synthetic_forest
+        cache = FitCache(tmp_path)
+        key = fit_key(stage="test")
+        probabilities = model.predict_proba(X[:50])[:, 1]
+        
+        cache.save_model(key, model)
+        cache.save_array(key, probabilities)
+        
+        np.testing.assert_array_equal(cache.load_model(key).predict_proba(X[:50])[:, 1], probabilities)
+        np.testing.assert_array_equal(cache.load_array(key), probabilities)
+    
+    def test_missing_key_misses(self, tmp_path):
+        """Lookups of keys never stored should return None."""
+        cache = FitCache(tmp_path)
+        
+        assert cache.load_model(fit_key(stage="none")) is None
+        assert cache.load_array(fit_key(stage="none")) is None
+    
+    def test_disabled_cache_stores_nothing(self, tmp_path):
+        """A disabled cache should neither write nor read results."""
+        key = fit_key(stage="test")
+        FitCache(tmp_path).save_array(key, np.arange(3))
+        disabled = FitCache(tmp_path / "other", enabled=False)
+        
+        disabled.save_model(key, RandomForestClassifier())
+        
+        assert FitCache(tmp_path, enabled=False).load_array(key) is None
+        assert not (tmp_path / "other").exists()
@@ -0,0 +1,181 @@
+"""
+Metrics Tests
+
+Tests for multiprocess metric aggregation and the /metrics endpoint.
+"""
+import json
+import os
+
+import pytest
+
+from app.config import TestingConfig
+from app.utils import metrics
+from app.utils.metrics import Counter, Histogram
+
+
+def _sample(text, line_prefix):
+    """Value of the exposition line starting with line_prefix (0 if absent)."""
+    for line in text.splitlines():
+        if line.startswith(line_prefix + " "):
+            return float(line.rsplit(" ", 1)[1])
+    return 0.0
+
+
+@pytest.fixture
+def metrics_dir(tmp_path):
+    """Record metrics in a temporary shared directory for one test."""
+    metrics.configure(True, str(tmp_path))
+    yield tmp_path
+    metrics.configure(True, None)
+
+
+@pytest.fixture
+def scratch_metrics():
+    """Metric families registered for one test and removed afterwards."""
+    registered = len(metrics.REGISTRY)
+    yield
+    del metrics.REGISTRY[registered:]
+
+
+class TestMetricTypes:
+    """Tests for counters, histograms and rendering."""
+    
+    def test_histogram_buckets_are_cumulative(self, metrics_dir, scratch_metrics):
+        """Each bucket should count observations at or below its bound."""
+        histogram = Histogram("test_seconds", "Test.", ("stage",), (0.1, 1.0))
+        child = histogram.labels(stage="a")
+        for value in (0.05, 0.1, 0.5, 2.0):
+            child.observe(value)
+        
+        text = metrics.render()
+        assert _sample(text, 'test_seconds_bucket{stage="a",le="0.1"}') == 2
+        assert _sample(text, 'test_seconds_bucket{stage="a",le="1.0"}') == 3
+        assert _sample(text, 'test_seconds_bucket{stage="a",le="+Inf"}') == 4
+        assert _sample(text, 'test_seconds_count{stage="a"}') == 4
+        assert _sample(text, 'test_seconds_sum{stage="a"}') == pytest.approx(2.65)
+        assert "# TYPE test_seconds histogram" in text
+    
+    def test_label_values_are_escaped(self, metrics_dir, scratch_metrics):
+        """Quotes and backslashes in label values should be escaped."""
+        counter = Counter("test_total", "Test.", ("name",))
+        counter.labels(name='a"b\\c').inc(2)
+        
+        assert _sample(metrics.render(), 'test_total{name="a\\"b\\\\c"}') == 2
+    
+    def test_disabled_metrics_record_nothing(self, scratch_metrics):
+        """With metrics disabled, observing should be a no-op."""
+        counter = Counter("test_total", "Test.")
+        metrics.configure(False)
+        try:
+            counter.labels().inc()
+            assert metrics.collect() == {}
+        finally:
+            metrics.configure(True, None)
+    
+    def test_file_grows_past_initial_size(self, metrics_dir, scratch_metrics):
+        """Many distinct label values should not overflow the value file."""
+        counter = Counter("test_total", "Test.", ("key",))
+        for index in range(5000):
+            counter.labels(key=f"value-{index:05d}").inc(index)
+        
+        totals = metrics.collect()
+        key = json.dumps(["test_total", "", {"key": "value-04999"}], separators=(",", ":"))
+        assert totals[key] == 4999
+
+
+class TestMultiprocessAggregation:
+    """Tests that values from every worker process are summed."""
+    
+    def test_forked_workers_are_summed(self, metrics_dir, scratch_metrics):
+        """Counts from forked children should add to the parent's counts."""
+        counter = Counter("test_total", "Test.")
+        counter.labels().inc()
+        
+        children = []
+        for _ in range(2):
+            pid = os.fork()
+            if pid == 0:
+                counter.labels().inc(10)
+                os._exit(0)
+            children.append(pid)
+        for pid in children:
+            os.waitpid(pid, 0)
+        
+        assert len(list(metrics_dir.glob(metrics.FILE_PATTERN))) == 3
+        assert _sample(metrics.render(), "test_total") == 21
+
+
+    def test_reused_pid_keeps_the_exited_workers_counts(self, metrics_dir, scratch_metrics):
+        """A new store in the same pid should not replace an existing file."""
+        counter = Counter("test_total", "Test.")
+        counter.labels().inc(5)
+        
+        # A worker that gets the pid of an exited one opens a fresh store
+        metrics._store = metrics._open_store(metrics_dir)
+        counter.labels().inc()
+        
+        assert len(list(metrics_dir.glob(metrics.FILE_PATTERN))) == 2
+        assert _sample(metrics.render(), "test_total") == 6
+
+
+class TestMetricsEndpoint:
+    """Tests for /metrics."""
+    
+    def test_predict_records_every_stage(self, client, sample_prediction_request):
+        """A /predict request should be timed in each pipeline stage."""
+        before = client.get("/metrics").get_data(as_text=True)
+        response = client.post(
+            "/predict",
+            data=json.dumps(sample_prediction_request),
+            content_type="application/json"
+        )
+        after = client.get("/metrics")
+        text = after.get_data(as_text=True)
+        
+        assert after.status_code == 200
+        assert after.content_type == metrics.CONTENT_TYPE
+        for stage in (
+            "parse", "validate", "prepare_features", "predict_proba",
+            "contributing_factors", "serialize",
+        ):
+            prefix = f'diabetes_predict_stage_seconds_count{{stage="{stage}"}}'
+            assert _sample(text, prefix) == _sample(before, prefix) + 1, stage
+        
+        version = json.loads(response.data)["model_version"]
+        prefix = f'diabetes_predictions_total{{model_version="{version}"}}'
+        assert _sample(text, prefix) == _sample(before, prefix) + 1
+    
+    def test_cache_lookups_are_counted(self, client, sample_prediction_request):
+        """A repeated request should be counted as a prediction cache hit."""
+        body = json.dumps(sample_prediction_request)
+        client.post("/predict", data=body, content_type="application/json")
+        prefix = 'diabetes_cache_lookups_total{cache="prediction",result="hit"}'
+        before = _sample(client.get("/metrics").get_data(as_text=True), prefix)
+        
+        client.post("/predict", data=body, content_type="application/json")
+        
+        after = _sample(client.get("/metrics").get_data(as_text=True), prefix)
+        assert after == before + 1
+    
+    def test_errors_are_counted_by_handler(self, client):
+        """Responses from error handlers should be counted per handler."""
+        prefix = 'diabetes_errors_total{handler="not_found"}'
+        before = _sample(client.get("/metrics").get_data(as_text=True), prefix)
+        
+        client.get("/does-not-exist")
+        
+        after = _sample(client.get("/metrics").get_data(as_text=True), prefix)
+        assert after == before + 1
+    
+    def test_disabled_returns_404(self):
+        """/metrics should not exist when metrics are disabled."""
+        from app import create_app
+        
+        class NoMetricsConfig(TestingConfig):
+            METRICS_ENABLED = False
+        
+        app = create_app(NoMetricsConfig)
+        try:
+            assert app.test_client().get("/metrics").status_code == 404
+        finally:
+            metrics.configure(True, None)
@@ -0,0 +1,165 @@
+"""
+Micro Batcher Tests
+
+Tests for coalescing concurrent single-row predictions.
+"""
+import threading
+import time
+
+import numpy as np
+import pytest
+
+from app.models.micro_batcher import MicroBatcher
+
+
+class TestMicroBatcher:
+    """Tests for batching behaviour and result routing."""
+    
+    def test_concurrent_rows_get_their_own_results(self):
+        """Each caller should receive the probability for its own row."""
+        batch_sizes = []
+        
+        def predict_matrix(matrix):
+            batch_sizes.append(len(matrix))
+            return matrix[:, 0] / 100
+        
+        batcher = MicroBatcher(window_ms=50, max_rows=64)
+        results = {}
+        
+        def worker(value):
+            results[value] = batcher.submit(np.array([[float(value), 0.0]]), predict_matrix)
+        
+        threads = [threading.Thread(target=worker, args=(i,)) for i in range(16)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        
+        assert results == {i: i / 100 for i in range(16)}
+        assert sum(batch_sizes) == 16
+        assert len(batch_sizes) < 16
+    
+    def test_batch_size_is_capped(self):
+        """No batch should exceed max_rows."""
+        batch_sizes = []
+        
+        def predict_matrix(matrix):
+            batch_sizes.append(len(matrix))
+            return np.zeros(len(matrix))
+        
+        batcher = MicroBatcher(window_ms=50, max_rows=4)
+        threads = [
+            threading.Thread(target=batcher.submit, args=(np.zeros((1, 2)), predict_matrix))
+            for _ in range(12)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        
+        assert max(batch_sizes) <= 4
+        assert sum(batch_sizes) == 12
+    
+    def test_multi_row_submissions_get_their_own_slices(self):
+        """Matrices batched with single rows should get back their own rows."""
+        batch_sizes = []
+        
+        def predict_matrix(matrix):
+            batch_sizes.append(len(matrix))
+            return matrix[:, 0] / 100
+        
+        batcher = MicroBatcher(window_ms=50, max_rows=64)
+        results = {}
+        
+        def worker(value):
+            matrix = np.array([[float(value), 0.0], [float(value + 50), 0.0]])
+            results[value] = batcher.submit_rows(matrix, predict_matrix).tolist()
+        
+        def single_row_worker():
+            results["single"] = batcher.submit(np.array([[7.0, 0.0]]), predict_matrix)
+        
+        threads = [threading.Thread(target=worker, args=(i,)) for i in range(8)]
+        threads.append(threading.Thread(target=single_row_worker))
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        
+        assert results.pop("single") == 0.07
+        assert results == {i: [i / 100, (i + 50) / 100] for i in range(8)}
+        assert sum(batch_sizes) == 17
+        assert len(batch_sizes) < 9
+    
+    def test_model_errors_reach_the_caller(self):
+        """Exceptions raised while scoring should propagate to submit()."""
+        def predict_matrix(matrix):
+            raise ValueError("bad features")
+        
+        batcher = MicroBatcher(window_ms=1, max_rows=8)
+        with pytest.raises(ValueError, match="bad features"):
+            batcher.submit(np.zeros((1, 2)), predict_matrix)
+    
+    def test_rows_are_scored_by_their_own_function(self):
+        """Rows submitted with different functions should not be mixed."""
+        def old_version(matrix):
+            return np.full(len(matrix), 0.25)
+        
+        def new_version(matrix):
+            return np.full(len(matrix), 0.75)
+        
+        batcher = MicroBatcher(window_ms=50, max_rows=64)
+        results = {}
+        
+        def worker(index):
+            predict_matrix = old_version if index % 2 else new_version
+            results[index] = batcher.submit(np.zeros((1, 2)), predict_matrix)
+        
+        threads = [threading.Thread(target=worker, args=(i,)) for i in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        
+        assert results == {i: 0.25 if i % 2 else 0.75 for i in range(8)}
+    
+    def test_rows_stuck_behind_a_slow_batch_are_scored_inline(self):
+        """A caller should stop waiting after the timeout and score its own row."""
+        release = threading.Event()
+        
+        def slow_version(matrix):
+            release.wait(timeout=5)
+            return np.full(len(matrix), 0.25)
+        
+        def fast_version(matrix):
+            return np.full(len(matrix), 0.75)
+        
+        batcher = MicroBatcher(window_ms=1, max_rows=1)
+        batcher.timeout = 0.05
+        slow = threading.Thread(
+            target=batcher.submit, args=(np.zeros((1, 2)), slow_version)
+        )
+        slow.start()
+        time.sleep(0.02)
+        
+        assert batcher.submit(np.zeros((1, 2)), fast_version) == 0.75
+        
+        release.set()
+        slow.join()
+        assert batcher.submit(np.zeros((1, 2)), fast_version) == 0.75
+        assert batcher._worker.is_alive()
+    
+    def test_close_stops_worker_after_queued_rows(self):
+        """Closing should end the worker thread; later rows are scored inline."""
+        def predict_matrix(matrix):
+            return np.full(len(matrix), 0.5)
+        
+        batcher = MicroBatcher(window_ms=1, max_rows=8)
+        assert batcher.submit(np.zeros((1, 2)), predict_matrix) == 0.5
+        worker = batcher._worker
+        
+        batcher.close()
+        worker.join(timeout=5)
+        
+        assert not worker.is_alive()
+        assert batcher.submit(np.zeros((1, 2)), predict_matrix) == 0.5
+        assert batcher._worker is worker
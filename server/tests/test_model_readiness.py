@@ -0,0 +1,118 @@
+"""
+Model Readiness Tests
+
+Tests for background model loading and the /ready endpoint.
+"""
+import json
+import threading
+
+import pytest
+
+from app.models.ml_model import DiabetesModel
+
+
+@pytest.fixture
+def cold_model(app, monkeypatch):
+    """
+    Start a background load that blocks until the test releases it.
+    
+    Yields (model, release, loader_thread); the model is restored afterwards.
+    """
+    gate = threading.Event()
+    read_artifact = DiabetesModel._read_artifact
+    
+    def gated_read_artifact(self):
+        gate.wait(10)
+        return read_artifact(self)
+    
+    monkeypatch.setattr(DiabetesModel, "_read_artifact", gated_read_artifact)
+    model = DiabetesModel.get_instance()
+    model._current = None
+    thread = model.start_background_load(app)
+    
+    yield model, gate.set, thread
+    
+    gate.set()
+    thread.join(10)
+    monkeypatch.undo()
+    with app.app_context():
+        model._load_model()
+
+
+class TestReadyEndpoint:
+    """Tests for GET /ready."""
+    
+    def test_ready_after_startup(self, client):
+        """A loaded model should report ready with per-phase timings."""
+        response = client.get("/ready")
+        data = json.loads(response.data)
+        
+        assert response.status_code == 200
+        assert data["status"] == "ready"
+        assert set(data["phases"]) == {"loading", "warming"}
+        assert data["model_version"] == DiabetesModel.get_instance().version
+    
+    def test_reports_loading_until_model_is_ready(self, client, cold_model):
+        """/ready should be 503 while loading and 200 once warmed."""
+        _, release, thread = cold_model
+        
+        response = client.get("/ready")
+        assert response.status_code == 503
+        assert json.loads(response.data)["status"] == "loading"
+        
+        release()
+        thread.join(10)
+        
+        response = client.get("/ready")
+        assert response.status_code == 200
+        assert json.loads(response.data)["status"] == "ready"
+    
+    def test_failed_load_is_reported(self, app, client, monkeypatch):
+        """An unusable artifact should report failed and keep serving mocks."""
+        def broken_read_artifact(self):
+            raise ValueError("corrupt artifact")
+        
+        monkeypatch.setattr(DiabetesModel, "_read_artifact", broken_read_artifact)
+        model = DiabetesModel.get_instance()
+        try:
+            with app.app_context():
+                model._load_model()
+            data = json.loads(client.get("/ready").data)
+            
+            assert data["status"] == "failed"
+            assert data["error"] == "corrupt artifact"
+            assert model.current().is_mock
+        finally:
+            monkeypatch.undo()
+            with app.app_context():
+                model._load_model()
+
+
+class TestPredictWhileLoading:
+    """Tests for prediction requests arriving before the model is ready."""
+    
+    def test_request_waits_for_model(self, client, cold_model, sample_prediction_request):
+        """A request should block until the load finishes, then succeed."""
+        _, release, _ = cold_model
+        threading.Timer(0.2, release).start()
+        
+        response = client.post(
+            "/predict",
+            data=json.dumps(sample_prediction_request),
+            content_type="application/json"
+        )
+        assert response.status_code == 200
+    
+    def test_request_times_out_with_503(
+        self, app, client, cold_model, sample_prediction_request
+    ):
+        """A request should fail with 503 once MODEL_READY_TIMEOUT passes."""
+        app.config["MODEL_READY_TIMEOUT"] = 0.05
+        
+        response = client.post(
+            "/predict",
+            data=json.dumps(sample_prediction_request),
+            content_type="application/json"
+        )
+        assert response.status_code == 503
+        assert response.headers["Retry-After"] == "5"
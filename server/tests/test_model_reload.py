@@ -0,0 +1,196 @@
+"""
+Model Reload Tests
+
+Tests for hot reloading the model artifact with an atomic swap.
+"""
+import json
+
+import joblib
+import numpy as np
+import pytest
+from sklearn.ensemble import RandomForestClassifier
+
+from app.config import TestingConfig
+from app.models.ml_model import DiabetesModel, probe_features
+from app.models.model_watcher import ModelWatcher
+
+
+def _write_model(path, X, seed):
+    """Train a small forest and save it in the train_model.py format."""
+    rng = np.random.default_rng(seed)
+    y = (X[:, 0] + X[:, 3] / 10 + rng.normal(0, 1, len(X)) > 5).astype(int)
+    model = RandomForestClassifier(n_estimators=5, max_depth=6, random_state=seed)
+    model.fit(X, y)
+    joblib.dump({"model": model, "trained_at": f"seed-{seed}"}, path)
+    return model
+
+
+@pytest.fixture
+def reloadable_model(app, synthetic_forest, tmp_path):
+    """Serve a model from a temporary MODEL_PATH, restoring config afterwards."""
+    _, X = synthetic_forest
+    model_path = tmp_path / "model.pkl"
+    _write_model(model_path, X, seed=1)
+    
+    diabetes_model = DiabetesModel.get_instance()
+    with app.app_context():
+        app.config["MODEL_PATH"] = str(model_path)
+        diabetes_model._load_model()
+        yield diabetes_model, model_path, X
+        
+        app.config.from_object(TestingConfig)
+        diabetes_model._load_model()
+
+
+class TestModelReload:
+    """Tests for DiabetesModel.reload."""
+    
+    def test_new_artifact_is_swapped_in(self, reloadable_model):
+        """A changed artifact should replace the served version."""
+        model, model_path, X = reloadable_model
+        old = model.current()
+        
+        new_estimator = _write_model(model_path, X, seed=2)
+        assert model.reload() is True
+        
+        current = model.current()
+        assert current.version != old.version
+        assert current.trained_at == "seed-2"
+        expected = new_estimator.predict_proba(X[:1])[0][1]
+        assert abs(model.predict_proba(X[:1]) - expected) < 1e-12
+    
+    def test_pinned_version_keeps_serving_after_swap(self, reloadable_model):
+        """A request holding the old version should still score with it."""
+        model, model_path, X = reloadable_model
+        pinned = model.current()
+        before = pinned.predict_proba_batch(X[:20])
+        
+        _write_model(model_path, X, seed=2)
+        model.reload()
+        
+        np.testing.assert_array_equal(pinned.predict_proba_batch(X[:20]), before)
+    
+    def test_unchanged_artifact_is_not_swapped(self, reloadable_model):
+        """Reloading identical content should keep the current version."""
+        model, _, _ = reloadable_model
+        current = model.current()
+        
+        assert model.reload() is False
+        assert model.current() is current
+        assert model.reload(force=True) is True
+        assert model.current().version == current.version
+    
+    def test_corrupt_artifact_keeps_current_version(self, reloadable_model):
+        """A file that fails to load should never replace the served model."""
+        model, model_path, X = reloadable_model
+        current = model.current()
+        
+        model_path.write_bytes(b"not a pickle")
+        
+        assert model.reload() is False
+        assert model.current() is current
+        assert 0.0 <= model.predict_proba(X[:1]) <= 1.0
+    
+    def test_changed_batch_settings_stop_old_batcher(self, app, reloadable_model):
+        """A reload with new micro-batch settings should stop the old worker."""
+        model, _, X = reloadable_model
+        app.config["MICRO_BATCH_ENABLED"] = True
+        app.config["PREDICTION_CACHE_SIZE"] = 0
+        app.config["BMI_CURVE_CACHE_SIZE"] = 0
+        model._load_model()
+        old = model.current().batcher
+        model.predict_proba(X[:1])
+        worker = old._worker
+        
+        app.config["MICRO_BATCH_MAX_ROWS"] = 8
+        model._load_model()
+        worker.join(timeout=5)
+        
+        assert model.current().batcher is not old
+        assert not worker.is_alive()
+    
+    def test_batcher_scores_bmi_cache_misses(self, app, reloadable_model):
+        """With the BMI curve cache on, step-function builds should be batched."""
+        model, _, X = reloadable_model
+        app.config["MICRO_BATCH_ENABLED"] = True
+        app.config["PREDICTION_CACHE_SIZE"] = 0
+        model._load_model()
+        loaded = model.current()
+        assert loaded.bmi_cache is not None
+        
+        probability = model.predict_proba(X[:1])
+        
+        assert loaded.batcher._worker is not None
+        assert probability == pytest.approx(loaded.predict_proba_batch(X[:1])[0])
+    
+    def test_probe_features_are_deterministic(self):
+        """The probe set should be identical across calls."""
+        np.testing.assert_array_equal(probe_features(), probe_features())
+        assert probe_features().shape == (64, 21)
+
+
+class TestModelWatcher:
+    """Tests for artifact change detection."""
+    
+    def test_check_reloads_only_on_change(self, app, reloadable_model):
+        """check() should reload once per new artifact."""
+        model, model_path, X = reloadable_model
+        watcher = ModelWatcher(app, interval=60)
+        
+        assert watcher.check() is False
+        
+        _write_model(model_path, X, seed=3)
+        assert watcher.check() is True
+        assert model.current().trained_at == "seed-3"
+        assert watcher.check() is False
+    
+    def test_failed_signature_is_not_retried(self, app, reloadable_model):
+        """A broken artifact should be attempted once, not on every poll."""
+        model, model_path, _ = reloadable_model
+        watcher = ModelWatcher(app, interval=60)
+        
+        model_path.write_bytes(b"not a pickle")
+        assert watcher.check() is False
+        
+        attempts = []
+        original_reload = model.reload
+        model.reload = lambda: attempts.append(1) or original_reload()
+        try:
+            assert watcher.check() is False
+        finally:
+            del model.reload
+        assert attempts == []
+
+
+class TestReloadEndpoint:
+    """Tests for POST /admin/reload and version reporting."""
+    
+    def test_disabled_without_token(self, client):
+        """Without ADMIN_TOKEN the endpoint should not exist."""
+        assert client.post("/admin/reload").status_code == 404
+    
+    def test_rejects_wrong_token(self, app, client):
+        """A wrong token should be refused."""
+        app.config["ADMIN_TOKEN"] = "secret"
+        response = client.post("/admin/reload", headers={"X-Admin-Token": "nope"})
+        assert response.status_code == 401
+    
+    def test_reports_served_version(self, app, client):
+        """An authorized reload should report the served version."""
+        app.config["ADMIN_TOKEN"] = "secret"
+        response = client.post("/admin/reload", headers={"X-Admin-Token": "secret"})
+        
+        assert response.status_code == 200
+        data = json.loads(response.data)
+        assert data["reloaded"] is False
+        assert data["model_version"] == DiabetesModel.get_instance().version
+    
+    def test_predict_reports_model_version(self, client, sample_prediction_request):
+        """Every prediction should say which model version scored it."""
+        response = client.post(
+            "/predict",
+            data=json.dumps(sample_prediction_request),
+            content_type="application/json"
+        )
+        data = json.loads(response.data)
+        assert data["model_version"] == DiabetesModel.get_instance().version
@@ -0,0 +1,41 @@
+"""
+NDJSON Tests
+
+Tests for bounded-memory line reading of streamed uploads.
+"""
+import io
+
+from app.api.ndjson import INVALID_JSON, LINE_TOO_LONG, iter_chunks, iter_lines
+
+
+class TestIterLines:
+    """Tests for line decoding."""
+    
+    def test_decodes_lines_and_reports_errors(self):
+        """Valid lines decode, malformed lines report errors, blanks are skipped."""
+        stream = io.BytesIO(b'{"a": 1}\n\nnot json\n[1, 2]\r\n{"b": 2}')
+        lines = list(iter_lines(stream, max_line_bytes=100))
+        
+        assert [line.number for line in lines] == [1, 3, 4, 5]
+        assert lines[0].value == {"a": 1}
+        assert lines[1].error == INVALID_JSON
+        assert lines[2].value == [1, 2]
+        assert lines[3].value == {"b": 2}
+    
+    def test_oversized_line_is_skipped(self):
+        """A line over the limit is reported without breaking later lines."""
+        long_line = b'{"x": "' + b"y" * 1000 + b'"}\n'
+        stream = io.BytesIO(b'{"a": 1}\n' + long_line + b'{"b": 2}\n')
+        lines = list(iter_lines(stream, max_line_bytes=64))
+        
+        assert [line.number for line in lines] == [1, 2, 3]
+        assert lines[1].error == LINE_TOO_LONG
+        assert lines[2].value == {"b": 2}
+    
+    def test_chunks_preserve_order(self):
+        """Chunks should hold at most chunk_size lines, in order."""
+        stream = io.BytesIO(b"".join(b'{"i": %d}\n' % i for i in range(7)))
+        chunks = list(iter_chunks(stream, chunk_size=3, max_line_bytes=100))
+        
+        assert [len(chunk) for chunk in chunks] == [3, 3, 1]
+        assert [line.value["i"] for chunk in chunks for line in chunk] == list(range(7))
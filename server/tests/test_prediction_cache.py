@@ -0,0 +1,89 @@
+"""
+Prediction Cache Tests
+
+Tests for the exact-input LRU prediction cache.
+"""
+import numpy as np
+import pytest
+
+from app.models.ml_model import DiabetesModel
+from app.models.prediction_cache import PredictionCache
+
+
+class TestPredictionCache:
+    """Tests for LRU behaviour and counters."""
+    
+    def test_miss_then_hit(self):
+        """A stored key should be a miss first and a hit afterwards."""
+        cache = PredictionCache(maxsize=4)
+        key = PredictionCache.make_key(np.array([[1.0, 2.0]]))
+        
+        assert cache.get(key) is None
+        cache.put(key, 0.42)
+        assert cache.get(key) == 0.42
+        
+        stats = cache.stats()
+        assert stats["hits"] == 1
+        assert stats["misses"] == 1
+    
+    def test_evicts_least_recently_used(self):
+        """The least recently used entry should be evicted when full."""
+        cache = PredictionCache(maxsize=2)
+        cache.put(b"a", 0.1)
+        cache.put(b"b", 0.2)
+        cache.get(b"a")
+        cache.put(b"c", 0.3)
+        
+        assert cache.get(b"b") is None
+        assert cache.get(b"a") == 0.1
+        assert cache.get(b"c") == 0.3
+        assert cache.stats()["evictions"] == 1
+    
+    def test_version_change_clears_entries(self):
+        """Binding a new model version should drop cached probabilities."""
+        cache = PredictionCache(maxsize=4)
+        cache.bind_version("v1")
+        cache.put(b"a", 0.1)
+        
+        cache.bind_version("v1")
+        assert cache.get(b"a") == 0.1
+        
+        cache.bind_version("v2")
+        assert cache.get(b"a") is None
+    
+    def test_rejects_non_positive_size(self):
+        """A cache must have room for at least one entry."""
+        with pytest.raises(ValueError):
+            PredictionCache(maxsize=0)
+
+
+class TestModelCaching:
+    """Tests for caching inside DiabetesModel.predict_proba."""
+    
+    def test_repeated_features_hit_cache(self, app, sample_prediction_request):
+        """Scoring the same features twice should be served from the cache."""
+        from app.services.preprocessing_service import PreprocessingService
+        
+        preprocessing = PreprocessingService()
+        bmi = preprocessing.calculate_bmi(85.0, 175.0)
+        features = preprocessing.prepare_features(sample_prediction_request, bmi)
+        
+        model = DiabetesModel.get_instance()
+        first = model.predict_proba(features)
+        hits_before = model.cache_stats()["exact"]["hits"]
+        second = model.predict_proba(features)
+        
+        assert first == second
+        assert model.cache_stats()["exact"]["hits"] == hits_before + 1
+    
+    def test_warm_up_leaves_caches_empty(self, app):
+        """Loading the model should not add probe rows to the caches."""
+        model = DiabetesModel.get_instance()
+        with app.app_context():
+            model._load_model()
+        
+        for stats in model.cache_stats().values():
+            if stats is None:
+                continue
+            assert stats["size"] == 0
+            assert stats["hits"] == stats["misses"] == 0
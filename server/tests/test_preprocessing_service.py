@@ -3,6 +3,7 @@ Preprocessing Service Tests
 
 Tests for BMI calculation and feature engineering.
 """
+import numpy as np
 import pytest
 
 from app.services.preprocessing_service import PreprocessingService
@@ -83,3 +84,39 @@ class TestAgeCategory:
     def test_elderly_category(self, service):
         """Age 80+ should be category 13."""
         assert service.get_age_category(85) == 13
+
+
+class TestBatchFeatures:
+    """Tests for the columnar batch feature path."""
+    
+    @pytest.fixture
+    def service(self):
+        """Create preprocessing service instance."""
+        return PreprocessingService()
+    
+    def test_age_category_batch_matches_scalar(self, service):
+        """Vectorized age bucketing should match get_age_category."""
+        ages = np.arange(18, 121)
+        expected = [service.get_age_category(age) for age in ages]
+        assert service.get_age_category_batch(ages).tolist() == expected
+    
+    def test_prepare_features_batch_matches_single_rows(
+        self, service, sample_prediction_request
+    ):
+        """Batch feature matrix should equal stacked single-row features."""
+        rows = [
+            sample_prediction_request,
+            {**sample_prediction_request, "age": 23, "sex": "female", "smoker": True},
+            {**sample_prediction_request, "age": 81, "weight": 120.0, "general_health": 5},
+        ]
+        bmis = np.array([
+            service.calculate_bmi(row["weight"], row["height"]) for row in rows
+        ])
+        
+        expected = np.vstack([
+            service.prepare_features(row, bmi) for row, bmi in zip(rows, bmis, strict=True)
+        ])
+        batch = service.prepare_features_batch(rows, bmis)
+        
+        assert batch.shape == (3, 21)
+        np.testing.assert_array_equal(batch, expected)
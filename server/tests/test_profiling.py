@@ -0,0 +1,151 @@
+"""
+Profiling Tests
+
+Tests for on-demand per-request profiling.
+"""
+import json
+import pstats
+
+import pytest
+
+from app import create_app
+from app.config import TestingConfig
+from app.utils.profiling import PROFILE_ID_HEADER, ProfilingMiddleware
+
+
+@pytest.fixture
+def profiled_app(tmp_path):
+    """App with profiling enabled and profiles saved to a temp directory."""
+    class ProfilingConfig(TestingConfig):
+        PROFILING_TOKEN = "profile-secret"
+        PROFILE_DIR = str(tmp_path)
+        PROFILE_KEEP = 3
+    
+    return create_app(ProfilingConfig)
+
+
+@pytest.fixture
+def profiled_client(profiled_app):
+    """Test client for the profiling-enabled app."""
+    return profiled_app.test_client()
+
+
+def _post_predict(client, payload, headers=None):
+    """POST a prediction request."""
+    return client.post(
+        "/predict",
+        data=json.dumps(payload),
+        content_type="application/json",
+        headers=headers or {}
+    )
+
+
+class TestProfilingMiddleware:
+    """Tests for profiling requests that carry the token."""
+    
+    def test_not_installed_without_token(self, app):
+        """Without a token the app should not be wrapped at all."""
+        assert not isinstance(app.wsgi_app, ProfilingMiddleware)
+    
+    def test_profiled_result_matches_unprofiled(
+        self, profiled_client, sample_prediction_request
+    ):
+        """Profiling should never change the prediction."""
+        plain = _post_predict(profiled_client, sample_prediction_request)
+        profiled = _post_predict(
+            profiled_client,
+            sample_prediction_request,
+            {"X-Profile-Token": "profile-secret"}
+        )
+        
+        assert profiled.status_code == 200
+        assert json.loads(profiled.data) == json.loads(plain.data)
+        assert PROFILE_ID_HEADER not in plain.headers
+        assert PROFILE_ID_HEADER in profiled.headers
+    
+    def test_report_lists_top_functions(self, profiled_client, sample_prediction_request):
+        """The text report should summarize the request and list functions."""
+        response = _post_predict(
+            profiled_client,
+            sample_prediction_request,
+            {"X-Profile-Token": "profile-secret"}
+        )
+        profile_id = response.headers[PROFILE_ID_HEADER]
+        
+        report = profiled_client.get(
+            f"/profiles/{profile_id}", headers={"X-Profile-Token": "profile-secret"}
+        )
+        text = report.get_data(as_text=True)
+        
+        assert report.status_code == 200
+        assert report.mimetype == "text/plain"
+        assert f"Profile {profile_id}" in text
+        assert "POST /predict -> 200 OK" in text
+        assert "cumtime" in text
+    
+    def test_raw_profile_covers_request_pipeline(
+        self, profiled_client, sample_prediction_request, tmp_path
+    ):
+        """The profile should cover validation, preprocessing, model and serialization."""
+        response = _post_predict(
+            profiled_client,
+            sample_prediction_request,
+            {"X-Profile-Token": "profile-secret"}
+        )
+        profile_id = response.headers[PROFILE_ID_HEADER]
+        
+        raw = profiled_client.get(
+            f"/profiles/{profile_id}?format=pstats",
+            headers={"X-Profile-Token": "profile-secret"}
+        )
+        download = tmp_path / "download.prof"
+        download.write_bytes(raw.data)
+        functions = {name for _, _, name in pstats.Stats(str(download)).stats}
+        
+        assert raw.status_code == 200
+        # Cached on the unprofiled path, but profiled requests run the model
+        for function in ("load", "prepare_features", "_predict_proba_uncached", "json_response"):
+            assert function in functions, function
+    
+    def test_wrong_token_rejected(self, profiled_client, sample_prediction_request):
+        """A request with the wrong token should not be served or profiled."""
+        response = _post_predict(
+            profiled_client, sample_prediction_request, {"X-Profile-Token": "wrong"}
+        )
+        
+        assert response.status_code == 401
+        assert PROFILE_ID_HEADER not in response.headers
+    
+    def test_old_profiles_are_pruned(
+        self, profiled_client, sample_prediction_request, tmp_path
+    ):
+        """Only the newest PROFILE_KEEP profiles should be kept."""
+        for _ in range(5):
+            _post_predict(
+                profiled_client,
+                sample_prediction_request,
+                {"X-Profile-Token": "profile-secret"}
+            )
+        
+        assert len(list(tmp_path.glob("*.txt"))) == 3
+        assert len(list(tmp_path.glob("*.prof"))) == 3
+
+
+class TestProfilesEndpoint:
+    """Tests for fetching saved profiles."""
+    
+    def test_requires_token(self, profiled_client):
+        """Fetching a profile without the token should be unauthorized."""
+        response = profiled_client.get(f"/profiles/{'0' * 32}")
+        assert response.status_code == 401
+    
+    def test_unknown_or_malformed_id(self, profiled_client):
+        """Unknown and malformed IDs should be 404."""
+        headers = {"X-Profile-Token": "profile-secret"}
+        
+        assert profiled_client.get(f"/profiles/{'0' * 32}", headers=headers).status_code == 404
+        assert profiled_client.get("/profiles/..%2Fsecret", headers=headers).status_code == 404
+    
+    def test_disabled_without_token(self, client):
+        """The endpoint should not exist when profiling is not configured."""
+        assert client.get(f"/profiles/{'0' * 32}").status_code == 404
@@ -5,6 +5,9 @@ Tests for the /predict and /health endpoints.
 """
 import json
 
+import numpy as np
+import pytest
+
 
 class TestHealthEndpoint:
     """Tests for the health check endpoint."""
@@ -93,3 +96,334 @@ class TestPredictEndpoint:
         
         expected_bmi = 85 / (1.75 ** 2)
         assert abs(data["bmi"] - expected_bmi) < 0.1
+
+
+class TestPredictBatchEndpoint:
+    """Tests for the batch prediction endpoint."""
+    
+    def test_batch_matches_single_predictions(
+        self, client, sample_prediction_request
+    ):
+        """Each batch result should equal the /predict result for that row."""
+        rows = [
+            sample_prediction_request,
+            {**sample_prediction_request, "age": 67, "weight": 110.0},
+        ]
+        response = client.post(
+            "/predict/batch",
+            data=json.dumps({"assessments": rows}),
+            content_type="application/json"
+        )
+        assert response.status_code == 200
+        data = json.loads(response.data)
+        
+        assert data["total"] == 2
+        assert data["succeeded"] == 2
+        for index, row in enumerate(rows):
+            single = json.loads(client.post(
+                "/predict",
+                data=json.dumps(row),
+                content_type="application/json"
+            ).data)
+            single.pop("disclaimer")
+            assert single.pop("model_version") == data["model_version"]
+            assert data["results"][index] == {"index": index, **single}
+    
+    def test_batch_reports_row_errors_in_order(
+        self, client, sample_prediction_request
+    ):
+        """Invalid rows should get per-row errors without failing the batch."""
+        rows = [
+            {**sample_prediction_request, "age": -5},
+            sample_prediction_request,
+            {"age": 45},
+        ]
+        response = client.post(
+            "/predict/batch",
+            data=json.dumps({"assessments": rows}),
+            content_type="application/json"
+        )
+        assert response.status_code == 200
+        data = json.loads(response.data)
+        
+        assert [result["index"] for result in data["results"]] == [0, 1, 2]
+        assert "age" in data["results"][0]["details"]
+        assert "risk_level" in data["results"][1]
+        assert "sex" in data["results"][2]["details"]
+        assert data["succeeded"] == 1
+        assert data["failed"] == 2
+    
+    def test_batch_returns_422_without_list(self, client):
+        """Batch endpoint should return 422 when assessments is not a list."""
+        response = client.post(
+            "/predict/batch",
+            data=json.dumps({"assessments": {"age": 45}}),
+            content_type="application/json"
+        )
+        assert response.status_code == 422
+
+
+class TestPredictScenariosEndpoint:
+    """Tests for the /predict/scenarios what-if endpoint."""
+    
+    def test_scenarios_match_single_predictions(self, client, sample_prediction_request):
+        """Each scenario should score like /predict and report its delta."""
+        response = client.post(
+            "/predict/scenarios",
+            data=json.dumps({
+                "assessment": sample_prediction_request,
+                "scenarios": [{"weight": 75.0}, {"phys_activity": False, "smoker": True}],
+            }),
+            content_type="application/json"
+        )
+        assert response.status_code == 200
+        data = json.loads(response.data)
+        
+        baseline = json.loads(client.post(
+            "/predict",
+            data=json.dumps(sample_prediction_request),
+            content_type="application/json"
+        ).data)
+        assert data["baseline"]["probability"] == baseline["probability"]
+        for scenario in data["scenarios"]:
+            single = json.loads(client.post(
+                "/predict",
+                data=json.dumps({**sample_prediction_request, **scenario["overrides"]}),
+                content_type="application/json"
+            ).data)
+            assert scenario["probability"] == single["probability"]
+            assert scenario["contributing_factors"] == single["contributing_factors"]
+            expected_delta = single["probability"] - baseline["probability"]
+            assert abs(scenario["delta"] - expected_delta) < 1e-4
+    
+    def test_axes_expand_to_grid(self, client, sample_prediction_request):
+        """Axes should add every combination after the explicit scenarios."""
+        response = client.post(
+            "/predict/scenarios",
+            data=json.dumps({
+                "assessment": sample_prediction_request,
+                "scenarios": [{"smoker": True}],
+                "axes": {"weight": [80.0, 70.0, 60.0], "phys_activity": [False, True]},
+            }),
+            content_type="application/json"
+        )
+        assert response.status_code == 200
+        data = json.loads(response.data)
+        
+        assert data["total"] == 7
+        assert [scenario["overrides"] for scenario in data["scenarios"][:3]] == [
+            {"smoker": True},
+            {"weight": 80.0, "phys_activity": False},
+            {"weight": 80.0, "phys_activity": True},
+        ]
+    
+    def test_invalid_scenarios_reported_individually(
+        self, client, sample_prediction_request
+    ):
+        """Invalid overrides should get per-scenario errors."""
+        response = client.post(
+            "/predict/scenarios",
+            data=json.dumps({
+                "assessment": sample_prediction_request,
+                "scenarios": [{"weight": 5.0}, {"shoe_size": 42}, {"weight": 70.0}],
+            }),
+            content_type="application/json"
+        )
+        assert response.status_code == 200
+        data = json.loads(response.data)
+        
+        assert "weight" in data["scenarios"][0]["details"]
+        assert "shoe_size" in data["scenarios"][1]["details"]
+        assert "delta" in data["scenarios"][2]
+        assert data["failed"] == 2
+    
+    def test_grid_over_cap_returns_422(self, app, client, sample_prediction_request):
+        """Grids larger than MAX_SCENARIOS should be rejected before expansion."""
+        app.config["MAX_SCENARIOS"] = 10
+        response = client.post(
+            "/predict/scenarios",
+            data=json.dumps({
+                "assessment": sample_prediction_request,
+                "axes": {"age": list(range(30, 40)), "smoker": [False, True]},
+            }),
+            content_type="application/json"
+        )
+        assert response.status_code == 422
+    
+    def test_invalid_baseline_returns_422(self, client):
+        """An invalid base assessment should fail the whole request."""
+        response = client.post(
+            "/predict/scenarios",
+            data=json.dumps({"assessment": {"age": 45}, "scenarios": [{"smoker": True}]}),
+            content_type="application/json"
+        )
+        assert response.status_code == 422
+        assert "assessment" in json.loads(response.data)["details"]
+
+
+class TestPredictRiskCurveEndpoint:
+    """Tests for the /predict/risk-curve endpoint."""
+    
+    def test_curve_matches_single_predictions(self, client, sample_prediction_request):
+        """Each curve value should hold, per /predict, until the next point."""
+        response = client.post(
+            "/predict/risk-curve",
+            data=json.dumps({
+                "assessment": sample_prediction_request,
+                "axis": "weight",
+                "min": 60.0,
+                "max": 110.0,
+            }),
+            content_type="application/json"
+        )
+        assert response.status_code == 200
+        data = json.loads(response.data)
+        
+        assert data["curve"][0]["weight"] == 60.0
+        assert data["curve"][-1]["weight"] == 110.0
+        for point, following in zip(data["curve"][:-1], data["curve"][1:], strict=True):
+            midpoint = round((point["weight"] + following["weight"]) / 2, 2)
+            if following["weight"] - point["weight"] < 0.05:
+                continue
+            single = json.loads(client.post(
+                "/predict",
+                data=json.dumps({**sample_prediction_request, "weight": midpoint}),
+                content_type="application/json"
+            ).data)
+            assert point["probability"] == single["probability"]
+    
+    def test_curve_keeps_only_changes(self, client, sample_prediction_request):
+        """Consecutive curve points (but the last) should differ in probability."""
+        response = client.post(
+            "/predict/risk-curve",
+            data=json.dumps({"assessment": sample_prediction_request}),
+            content_type="application/json"
+        )
+        data = json.loads(response.data)
+        
+        probabilities = [point["probability"] for point in data["curve"]]
+        assert all(a != b for a, b in zip(probabilities[:-2], probabilities[1:-1], strict=True))
+        assert data["curve"][0]["bmi"] == 15.0
+        assert data["curve"][-1]["bmi"] == 45.0
+    
+    def test_curve_has_every_change_of_a_dense_grid(self, client, sample_prediction_request):
+        """Steps narrower than any grid spacing should still appear in the curve."""
+        from app.models.ml_model import DiabetesModel
+        from app.services.preprocessing_service import PreprocessingService
+        
+        model = DiabetesModel.get_instance().current()
+        if model.bmi_breakpoints is None:
+            pytest.skip("Exact curves need a trained model")
+        response = client.post(
+            "/predict/risk-curve",
+            data=json.dumps({"assessment": sample_prediction_request}),
+            content_type="application/json"
+        )
+        curve = json.loads(response.data)["curve"]
+        
+        preprocessing = PreprocessingService()
+        bmis = np.linspace(15.0, 45.0, 100_001)
+        dense = model.predict_bmi_grid(
+            preprocessing.prepare_bmi_grid(sample_prediction_request, bmis)
+        ).round(4)
+        changes = bmis[np.flatnonzero(np.diff(dense)) + 1]
+        curve_bmis = np.array([point["bmi"] for point in curve])
+        for bmi in changes:
+            assert np.abs(curve_bmis - bmi).min() <= 0.01
+    
+    def test_repeated_profile_uses_cache(self, client, sample_prediction_request):
+        """Rendering the same profile again should hit the BMI curve cache."""
+        from app.models.ml_model import DiabetesModel
+        
+        body = json.dumps({"assessment": {**sample_prediction_request, "age": 33}})
+        client.post("/predict/risk-curve", data=body, content_type="application/json")
+        bmi_cache = DiabetesModel.get_instance().current().bmi_cache
+        if bmi_cache is None:
+            pytest.skip("BMI curve cache needs a trained model")
+        hits = bmi_cache.stats()["hits"]
+        
+        client.post("/predict/risk-curve", data=body, content_type="application/json")
+        
+        assert bmi_cache.stats()["hits"] > hits
+    
+    def test_invalid_options_return_422(self, client, sample_prediction_request):
+        """Reversed ranges, unknown axes and oversized grids should be rejected."""
+        for options in (
+            {"min": 30.0, "max": 20.0},
+            {"axis": "height"},
+            {"points": 10 ** 6},
+        ):
+            response = client.post(
+                "/predict/risk-curve",
+                data=json.dumps({"assessment": sample_prediction_request, **options}),
+                content_type="application/json"
+            )
+            assert response.status_code == 422
+    
+    @pytest.mark.parametrize("options,field", [
+        ({"min": 70.0}, "min"),
+        ({"axis": "weight", "max": 30.0}, "max"),
+    ])
+    def test_reversed_default_range_returns_422(
+        self, client, sample_prediction_request, options, field
+    ):
+        """A lone min or max past the default other end should be rejected."""
+        response = client.post(
+            "/predict/risk-curve",
+            data=json.dumps({"assessment": sample_prediction_request, **options}),
+            content_type="application/json"
+        )
+        
+        assert response.status_code == 422
+        assert field in json.loads(response.data)["details"]
+
+
+class TestPredictStreamEndpoint:
+    """Tests for the /predict/stream NDJSON endpoint."""
+    
+    def test_streams_results_in_order(self, app, client, sample_prediction_request):
+        """Each input line should get a result line, errors included."""
+        app.config["STREAM_CHUNK_SIZE"] = 2
+        lines = [
+            json.dumps(sample_prediction_request),
+            "{not json",
+            json.dumps({**sample_prediction_request, "age": 10}),
+            "",
+            json.dumps({**sample_prediction_request, "weight": 110.0}),
+        ]
+        response = client.post(
+            "/predict/stream",
+            data="\n".join(lines),
+            content_type="application/x-ndjson"
+        )
+        assert response.status_code == 200
+        assert response.mimetype == "application/x-ndjson"
+        
+        output = [json.loads(line) for line in response.data.decode().splitlines()]
+        results, summary = output[:-1], output[-1]["summary"]
+        
+        assert [row["line"] for row in results] == [1, 2, 3, 5]
+        assert "probability" in results[0]
+        assert results[1]["error"] == "Invalid JSON"
+        assert "age" in results[2]["details"]
+        assert "probability" in results[3]
+        assert summary["total"] == 4
+        assert summary["succeeded"] == 2
+        assert summary["failed"] == 2
+    
+    def test_stream_matches_single_predictions(self, client, sample_prediction_request):
+        """Streamed probabilities should equal /predict probabilities."""
+        response = client.post(
+            "/predict/stream",
+            data=json.dumps(sample_prediction_request) + "\n",
+            content_type="application/x-ndjson"
+        )
+        streamed = json.loads(response.data.decode().splitlines()[0])
+        single = json.loads(client.post(
+            "/predict",
+            data=json.dumps(sample_prediction_request),
+            content_type="application/json"
+        ).data)
+        
+        assert streamed["probability"] == single["probability"]
+        assert streamed["risk_level"] == single["risk_level"]
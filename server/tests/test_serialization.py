@@ -0,0 +1,95 @@
+"""
+Serialization Tests
+
+Tests that the fast JSON path produces the same JSON values as jsonify.
+"""
+import json
+from decimal import Decimal
+
+from app.api import serialization
+from app.api.schemas import PredictionResponseSchema
+from app.api.serialization import encode_payload, json_response
+from app.utils.constants import DISCLAIMER_TEXT
+
+SAMPLE_RESULT = {
+    "risk_level": "HIGH",
+    "probability": 0.6123,
+    "bmi": 31.02,
+    "bmi_category": "Obese",
+    "contributing_factors": ["Obesity (BMI ≥ 30)", "High blood pressure"],
+    "model_version": "abc123def456",
+    "disclaimer": DISCLAIMER_TEXT,
+}
+
+
+class TestEncodePayload:
+    """Tests for fragment splicing and encoder fallback."""
+
+    def test_spliced_disclaimer_round_trips(self):
+        """Splicing the pre-encoded disclaimer should give the same value."""
+        assert json.loads(encode_payload(SAMPLE_RESULT)) == SAMPLE_RESULT
+
+    def test_only_disclaimer_is_spliced(self):
+        """An object holding only a constant should still be valid JSON."""
+        payload = {"disclaimer": DISCLAIMER_TEXT}
+        assert json.loads(encode_payload(payload)) == payload
+
+    def test_equal_but_different_text_is_encoded(self):
+        """Only the constant object itself uses the pre-encoded fragment."""
+        payload = {"disclaimer": "custom text"}
+        assert json.loads(encode_payload(payload)) == payload
+
+    def test_stdlib_fallback_matches_orjson(self, monkeypatch):
+        """Without orjson the stdlib encoder should give the same value."""
+        fast = encode_payload(SAMPLE_RESULT)
+        monkeypatch.setattr(serialization, "orjson", None)
+
+        fallback = serialization.dumps(SAMPLE_RESULT)
+        assert json.loads(fallback) == json.loads(fast)
+
+    def test_unsupported_types_use_app_provider(self, app):
+        """Types the fast encoder rejects should fall back to Flask's provider."""
+        with app.app_context():
+            response = json_response({"value": Decimal("1.5")}, 201)
+
+        assert response.status_code == 201
+        assert json.loads(response.data) == {"value": "1.5"}
+
+    def test_every_path_keeps_insertion_order(self, app):
+        """The fast path, the provider fallback and jsonify should not sort keys."""
+        from flask import jsonify
+
+        with app.app_context():
+            fast = json_response({"b": 1, "a": 2})
+            fallback = json_response({"b": Decimal("1"), "a": 2})
+            plain = jsonify({"b": 1, "a": 2})
+
+        for response in (fast, fallback, plain):
+            assert list(json.loads(response.data)) == ["b", "a"]
+
+
+class TestFastResponses:
+    """Tests for API responses built on the fast path."""
+
+    def test_predict_matches_response_schema(self, client, sample_prediction_request):
+        """/predict should return what PredictionResponseSchema would dump."""
+        response = client.post(
+            "/predict",
+            data=json.dumps(sample_prediction_request),
+            content_type="application/json"
+        )
+        data = json.loads(response.data)
+
+        assert response.mimetype == "application/json"
+        assert data == PredictionResponseSchema().dump(data)
+        assert data["disclaimer"] == DISCLAIMER_TEXT
+
+    def test_not_found_body(self, client):
+        """Static error bodies should decode to the documented payload."""
+        response = client.get("/does-not-exist")
+
+        assert response.status_code == 404
+        assert json.loads(response.data) == {
+            "error": "Not Found",
+            "message": "The requested resource was not found"
+        }
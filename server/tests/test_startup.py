@@ -0,0 +1,114 @@
+"""
+Startup Tests
+
+Tests for deferred imports and the import-time budget of create_app.
+"""
+import json
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+from app import create_app
+from app.config import TestingConfig
+from app.models.ml_model import DiabetesModel
+
+BASE_DIR = Path(__file__).parent.parent
+
+# Budget for importing app and building it with MODEL_LAZY_LOAD, in a
+# fresh interpreter (Flask itself takes most of it)
+IMPORT_BUDGET_MS = float(os.environ.get("IMPORT_BUDGET_MS", "400"))
+
+# Modules a lazily built app must not import before the first prediction
+HEAVY_MODULES = ("numpy", "marshmallow", "sklearn", "joblib", "app.services", "app.models")
+
+_STARTUP_SNIPPET = """
+import json, sys, time
+started = time.perf_counter()
+from app import create_app
+from app.config import TestingConfig
+
+class LazyConfig(TestingConfig):
+    MODEL_LAZY_LOAD = True
+
+app = create_app(LazyConfig)
+elapsed_ms = (time.perf_counter() - started) * 1000
+health = app.test_client().get("/health").status_code
+print(json.dumps({
+    "elapsed_ms": elapsed_ms,
+    "health": health,
+    "imported": [name for name in json.loads(sys.argv[1]) if name in sys.modules],
+}))
+"""
+
+
+class LazyConfig(TestingConfig):
+    """Testing config that defers the prediction stack to first use."""
+    MODEL_LAZY_LOAD = True
+
+
+def _start_lazy_app() -> dict:
+    """Import and build a lazy app in a fresh interpreter."""
+    result = subprocess.run(
+        [sys.executable, "-c", _STARTUP_SNIPPET, json.dumps(HEAVY_MODULES)],
+        cwd=BASE_DIR, capture_output=True, text=True, check=True
+    )
+    return json.loads(result.stdout.splitlines()[-1])
+
+
+class TestLazyStartup:
+    """Tests for building the app without the prediction stack."""
+    
+    def test_health_needs_no_heavy_imports(self):
+        """/health should be served without NumPy, marshmallow or the model layer."""
+        startup = _start_lazy_app()
+        
+        assert startup["health"] == 200
+        assert startup["imported"] == []
+    
+    def test_import_and_construction_within_budget(self):
+        """Importing and building a lazy app should stay within IMPORT_BUDGET_MS."""
+        # Best of three runs, so one slow start on a busy machine doesn't fail
+        elapsed_ms = min(_start_lazy_app()["elapsed_ms"] for _ in range(3))
+        
+        assert elapsed_ms <= IMPORT_BUDGET_MS, (
+            f"create_app import and construction took {elapsed_ms:.0f} ms "
+            f"(budget {IMPORT_BUDGET_MS:.0f} ms); run scripts/import_time_report.py"
+        )
+    
+    def test_first_prediction_warms_up(self, sample_prediction_request):
+        """The first /predict on a lazy app should load the stack and predict."""
+        app = create_app(LazyConfig)
+        client = app.test_client()
+        
+        assert "warmed_up" not in app.extensions
+        response = client.post(
+            "/predict",
+            data=json.dumps(sample_prediction_request),
+            content_type="application/json"
+        )
+        
+        assert response.status_code == 200
+        assert "probability" in json.loads(response.data)
+        assert app.extensions["warmed_up"]
+        assert client.get("/ready").status_code == 200
+    
+    def test_ready_warms_up(self):
+        """A readiness probe should trigger the deferred warm-up."""
+        app = create_app(LazyConfig)
+        
+        response = app.test_client().get("/ready")
+        
+        assert response.status_code == 200
+        assert app.extensions["warmed_up"]
+        assert DiabetesModel.get_instance().readiness()["status"] == "ready"
+    
+    def test_validation_errors_before_warm_up(self):
+        """Invalid requests to a lazy app should still get a 422."""
+        app = create_app(LazyConfig)
+        
+        response = app.test_client().post(
+            "/predict", data=json.dumps({"age": "old"}), content_type="application/json"
+        )
+        
+        assert response.status_code == 422
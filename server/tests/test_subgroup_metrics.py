@@ -0,0 +1,106 @@
+"""
+Subgroup Metrics Tests
+
+Tests for the one-pass subgroup metrics cube and its roll-ups.
+"""
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.metrics import recall_score, roc_auc_score
+
+from scripts.lib.subgroup_metrics import ALL_LABEL, Dimension, SubgroupCube
+
+DIMENSIONS = [
+    Dimension("age", "Age", [4.5, 8.5], ["18-39", "40-59", "60+"]),
+    Dimension("sex", "Sex", [0.5], ["Female", "Male"]),
+    Dimension("bmi", "BMI", [25, 30], ["<25", "25-30", ">=30"]),
+]
+
+
+@pytest.fixture(scope="module")
+def scored_frame():
+    """Rows with subgroup columns, labels and coarse, tied scores."""
+    rng = np.random.default_rng(0)
+    n = 4000
+    df = pd.DataFrame({
+        "Age": rng.integers(1, 14, n),
+        "Sex": rng.integers(0, 2, n),
+        "BMI": rng.integers(15, 45, n).astype(float),
+        "label": rng.integers(0, 2, n),
+    })
+    df["score"] = np.round(np.clip(rng.normal(0.35 + 0.3 * df["label"], 0.2), 0, 1), 2)
+    return df
+
+
+def _mask(df, row):
+    """Rows of df belonging to a table row's subgroup."""
+    mask = np.ones(len(df), dtype=bool)
+    for dimension in DIMENSIONS:
+        if row[dimension.name] != ALL_LABEL:
+            code = dimension.labels.index(row[dimension.name])
+            mask &= dimension.codes(df[dimension.column]) == code
+    return mask
+
+
+class TestSubgroupCube:
+    """Tests for SubgroupCube metrics."""
+    
+    def test_every_row_matches_sklearn(self, scored_frame):
+        """Each cell and roll-up should match sklearn on its rows."""
+        df = scored_frame
+        cube = SubgroupCube.from_predictions(DIMENSIONS, df, df["label"], df["score"])
+        
+        rows = cube.table()
+        
+        # Full cells, then two, one and no dimensions kept
+        assert len(rows) == 18 + (6 + 9 + 6) + (3 + 2 + 3) + 1
+        for row in rows:
+            mask = _mask(df, row)
+            y_true, y_score = df["label"][mask], df["score"][mask]
+            assert row["n"] == mask.sum()
+            assert row["positives"] == y_true.sum()
+            assert row["accuracy"] == pytest.approx(((y_score > 0.5) == y_true).mean(), abs=1e-12)
+            assert row["recall"] == pytest.approx(recall_score(y_true, y_score > 0.5), abs=1e-12)
+            assert row["roc_auc"] == pytest.approx(roc_auc_score(y_true, y_score), abs=1e-12)
+    
+    def test_marginal_rollup(self, scored_frame):
+        """Rolling up to one dimension should label the others ALL_LABEL."""
+        df = scored_frame
+        cube = SubgroupCube.from_predictions(DIMENSIONS, df, df["label"], df["score"])
+        
+        rows = cube.rollup(["sex"])
+        
+        assert [row["sex"] for row in rows] == ["Female", "Male"]
+        assert all(row["age"] == row["bmi"] == ALL_LABEL for row in rows)
+        assert sum(row["n"] for row in rows) == len(df)
+    
+    def test_max_rolled_up_limits_groupings(self, scored_frame):
+        """Only groupings rolling up at most max_rolled_up dimensions are kept."""
+        df = scored_frame
+        cube = SubgroupCube.from_predictions(DIMENSIONS, df, df["label"], df["score"])
+        
+        rows = cube.table(max_rolled_up=1)
+        
+        assert all(sum(value == ALL_LABEL for value in row.values()) <= 1 for row in rows)
+        assert len(rows) == 18 + 6 + 9 + 6
+    
+    def test_undefined_metrics_are_none(self):
+        """Cells with a single class should have no ROC-AUC (and no recall without positives)."""
+        df = pd.DataFrame({"Sex": [0, 0, 1, 1]})
+        cube = SubgroupCube.from_predictions(
+            DIMENSIONS[1:2], df, [0, 0, 1, 0], [0.2, 0.7, 0.9, 0.1]
+        )
+        
+        female, male = cube.rollup(["sex"])
+        
+        assert female["recall"] is None and female["roc_auc"] is None
+        assert female["accuracy"] == 0.5
+        assert male["recall"] == 1.0 and male["roc_auc"] == 1.0
+    
+    def test_rejects_unknown_dimension(self, scored_frame):
+        """Rolling up to a dimension outside the cube should raise ValueError."""
+        df = scored_frame
+        cube = SubgroupCube.from_predictions(DIMENSIONS, df, df["label"], df["score"])
+        
+        with pytest.raises(ValueError, match="Unknown dimensions"):
+            cube.rollup(["smoker"])
@@ -0,0 +1,125 @@
+"""
+Threshold Sweep Tests
+
+Tests for single-sort ROC, precision-recall and threshold metrics.
+"""
+import numpy as np
+import pytest
+from sklearn.metrics import (
+    average_precision_score,
+    f1_score,
+    precision_score,
+    recall_score,
+    roc_auc_score,
+)
+
+from scripts.lib.threshold_sweep import SWEEP_FORMAT_VERSION, ThresholdSweep
+
+
+@pytest.fixture(scope="module")
+def scored_rows():
+    """Labels and coarse scores with many ties, like forest probabilities."""
+    rng = np.random.default_rng(0)
+    y_true = rng.integers(0, 2, size=5000)
+    y_score = np.round(np.clip(rng.normal(0.3 + 0.3 * y_true, 0.2), 0, 1), 2)
+    return y_true, y_score
+
+
+class TestThresholdSweep:
+    """Tests for ThresholdSweep metrics."""
+    
+    def test_areas_match_sklearn(self, scored_rows):
+        """ROC-AUC and average precision should equal sklearn's."""
+        y_true, y_score = scored_rows
+        sweep = ThresholdSweep.from_scores(y_true, y_score)
+        
+        assert sweep.roc_auc() == pytest.approx(roc_auc_score(y_true, y_score), abs=1e-12)
+        assert sweep.average_precision() == pytest.approx(
+            average_precision_score(y_true, y_score), abs=1e-12
+        )
+    
+    @pytest.mark.parametrize("threshold", [0.0, 0.3, 0.305, 0.5, 0.9, 1.5])
+    def test_metrics_at_threshold_match_sklearn(self, scored_rows, threshold):
+        """Metrics at a threshold should equal sklearn's on the thresholded labels."""
+        y_true, y_score = scored_rows
+        sweep = ThresholdSweep.from_scores(y_true, y_score)
+        y_pred = y_score >= threshold
+        
+        point = sweep.at(threshold)
+        
+        assert point["tp"] + point["fp"] == y_pred.sum()
+        assert point["precision"] == pytest.approx(
+            precision_score(y_true, y_pred, zero_division=0), abs=1e-12
+        )
+        assert point["recall"] == pytest.approx(recall_score(y_true, y_pred), abs=1e-12)
+        assert point["f1"] == pytest.approx(f1_score(y_true, y_pred), abs=1e-12)
+        assert point["accuracy"] == pytest.approx((y_pred == y_true).mean(), abs=1e-12)
+    
+    def test_strict_threshold_excludes_ties(self, scored_rows):
+        """Strict mode should predict positive only above the threshold."""
+        y_true, y_score = scored_rows
+        sweep = ThresholdSweep.from_scores(y_true, y_score)
+        
+        point = sweep.at(0.5, strict=True)
+        
+        assert point["tp"] == int(((y_score > 0.5) & (y_true == 1)).sum())
+        assert point["fp"] == int(((y_score > 0.5) & (y_true == 0)).sum())
+        assert point["tp"] + point["fp"] < sweep.at(0.5)["tp"] + sweep.at(0.5)["fp"]
+    
+    def test_best_f1_is_highest_over_thresholds(self, scored_rows):
+        """best_f1 should pick the threshold with the highest F1 score."""
+        y_true, y_score = scored_rows
+        sweep = ThresholdSweep.from_scores(y_true, y_score)
+        
+        best = sweep.best_f1()
+        
+        assert best["f1"] == pytest.approx(
+            max(f1_score(y_true, y_score >= t) for t in np.unique(y_score)), abs=1e-12
+        )
+    
+    def test_threshold_for_recall(self, scored_rows):
+        """The chosen threshold should reach the recall target most precisely."""
+        y_true, y_score = scored_rows
+        sweep = ThresholdSweep.from_scores(y_true, y_score)
+        
+        point = sweep.threshold_for_recall(0.9)
+        
+        assert point["recall"] >= 0.9
+        for t in np.unique(y_score):
+            if recall_score(y_true, y_score >= t) >= 0.9:
+                assert precision_score(y_true, y_score >= t) <= point["precision"] + 1e-12
+        assert sweep.threshold_for_recall(1.1) is None
+    
+    def test_rejects_mismatched_inputs(self):
+        """Empty or unequal inputs should raise ValueError."""
+        with pytest.raises(ValueError):
+            ThresholdSweep.from_scores([], [])
+        with pytest.raises(ValueError):
+            ThresholdSweep.from_scores([0, 1], [0.5])
+
+
+class TestThresholdSweepPersistence:
+    """Tests for saving and loading sweeps."""
+    
+    def test_round_trip(self, scored_rows, tmp_path):
+        """A loaded sweep should give the same metrics and metadata."""
+        y_true, y_score = scored_rows
+        sweep = ThresholdSweep.from_scores(y_true, y_score)
+        sweep.save(tmp_path / "sweep.npz", metadata={"split": "test"})
+        
+        loaded, metadata = ThresholdSweep.load(tmp_path / "sweep.npz")
+        
+        assert metadata == {"split": "test"}
+        assert loaded.summary([0.3, 0.5], [0.8]) == sweep.summary([0.3, 0.5], [0.8])
+    
+    def test_rejects_other_format_version(self, scored_rows, tmp_path, monkeypatch):
+        """Files written by another format version should not load."""
+        y_true, y_score = scored_rows
+        monkeypatch.setattr(
+            "scripts.lib.threshold_sweep.SWEEP_FORMAT_VERSION", SWEEP_FORMAT_VERSION + 1
+        )
+        ThresholdSweep.from_scores(y_true, y_score).save(tmp_path / "sweep.npz")
+        monkeypatch.undo()
+        
+        with pytest.raises(ValueError, match="format version"):
+            ThresholdSweep.load(tmp_path / "sweep.npz")
@@ -0,0 +1,232 @@
+"""
+Tree Explainer Tests
+
+Tests for path-dependent TreeSHAP contributions and the explain option
+of the prediction endpoints.
+"""
+import json
+from itertools import combinations
+from math import factorial
+
+import numpy as np
+import pytest
+from sklearn.ensemble import RandomForestClassifier
+
+from app import create_app
+from app.config import TestingConfig
+from app.models.compiled_forest import CompiledForest
+from app.models.ml_model import DiabetesModel
+from app.models.tree_explainer import TreeExplainer
+from app.utils.constants import FEATURE_ORDER
+
+
+def _expected_value(tree, x, known: set[int]) -> float:
+    """Cover-weighted tree output when only the features in known are set."""
+    def recurse(node):
+        if tree.children_left[node] == -1:
+            counts = tree.value[node, 0]
+            return counts[1] / counts.sum()
+        left, right = tree.children_left[node], tree.children_right[node]
+        if tree.feature[node] in known:
+            goes_left = np.float32(x[tree.feature[node]]) <= tree.threshold[node]
+            return recurse(left if goes_left else right)
+        cover = tree.weighted_n_node_samples
+        return (cover[left] * recurse(left) + cover[right] * recurse(right)) / cover[node]
+    
+    return recurse(0)
+
+
+def _brute_force_shap(model, x) -> np.ndarray:
+    """Shapley values of the forest probability, summed over every coalition."""
+    n_features = len(x)
+    shap = np.zeros(n_features)
+    for feature in range(n_features):
+        others = [other for other in range(n_features) if other != feature]
+        for size in range(n_features):
+            weight = factorial(size) * factorial(n_features - size - 1) / factorial(n_features)
+            for coalition in combinations(others, size):
+                known = set(coalition)
+                shap[feature] += weight * np.mean([
+                    _expected_value(tree.tree_, x, known | {feature})
+                    - _expected_value(tree.tree_, x, known)
+                    for tree in model.estimators_
+                ])
+    return shap
+
+
+@pytest.fixture(scope="module")
+def small_forest():
+    """Forest over six features, small enough for brute-force Shapley values."""
+    rng = np.random.default_rng(0)
+    X = rng.integers(0, 4, size=(500, 6)).astype(float)
+    X[:, 2] = rng.uniform(15, 50, size=500)
+    y = (X[:, 0] + X[:, 2] / 10 + rng.normal(0, 1, 500) > 4).astype(int)
+    model = RandomForestClassifier(n_estimators=5, max_depth=8, random_state=0)
+    model.fit(X, y)
+    return model, X
+
+
+class TestTreeExplainer:
+    """Tests for TreeExplainer contributions."""
+    
+    def test_matches_brute_force_shapley_values(self, small_forest):
+        """Contributions should equal Shapley values over all coalitions."""
+        model, X = small_forest
+        explainer = TreeExplainer.from_forest(CompiledForest.from_estimator(model))
+        
+        contributions = explainer.explain(X[:3])
+        
+        for row, x in zip(contributions, X[:3], strict=True):
+            np.testing.assert_allclose(row, _brute_force_shap(model, x), rtol=0, atol=1e-12)
+    
+    def test_contributions_add_up_to_probability(self, synthetic_forest):
+        """Base value plus a row's contributions should equal its probability."""
+        model, X = synthetic_forest
+        explainer = TreeExplainer.from_forest(CompiledForest.from_estimator(model))
+        
+        contributions = explainer.explain(X[:200])
+        
+        np.testing.assert_allclose(
+            explainer.base_value + contributions.sum(axis=1),
+            model.predict_proba(X[:200])[:, 1],
+            rtol=0, atol=1e-12
+        )
+    
+    def test_batch_matches_single_rows(self, synthetic_forest):
+        """Explaining rows together, with duplicates, should match one at a time."""
+        model, X = synthetic_forest
+        explainer = TreeExplainer.from_forest(CompiledForest.from_estimator(model))
+        rows = np.vstack([X[:20], X[5:10]])
+        
+        batch = explainer.explain(rows)
+        
+        for row, expected in zip(rows, batch, strict=True):
+            np.testing.assert_allclose(
+                explainer.explain(row[np.newaxis])[0], expected, rtol=0, atol=1e-12
+            )
+    
+    def test_compact_forest_keeps_covers(self, synthetic_forest, tmp_path):
+        """A compact export should carry the covers the explainer needs."""
+        model, X = synthetic_forest
+        forest = CompiledForest.from_estimator(model)
+        forest.save_compact(tmp_path / "model.compact")
+        
+        loaded = CompiledForest.load_compact(tmp_path / "model.compact")
+        
+        np.testing.assert_allclose(
+            TreeExplainer.from_forest(loaded).explain(X[:10]),
+            TreeExplainer.from_forest(forest).explain(X[:10]),
+            rtol=0, atol=1e-6
+        )
+    
+    def test_forest_without_covers_is_rejected(self, synthetic_forest):
+        """Forests exported before covers were kept cannot be explained."""
+        model, _ = synthetic_forest
+        forest = CompiledForest.from_estimator(model)
+        forest.cover = None
+        
+        with pytest.raises(ValueError, match="covers"):
+            TreeExplainer.from_forest(forest)
+
+
+@pytest.fixture(scope="class")
+def explaining_model():
+    """Reload the trained model with explanations enabled, for a test class."""
+    app = create_app(TestingConfig)
+    model = DiabetesModel.get_instance()
+    with app.app_context():
+        app.config["EXPLANATIONS_ENABLED"] = True
+        model._load_model()
+        yield model
+        
+        app.config["EXPLANATIONS_ENABLED"] = False
+        model._load_model()
+
+
+@pytest.mark.usefixtures("explaining_model")
+class TestExplainOption:
+    """Tests for ?explain=true on the prediction endpoints."""
+    
+    def test_paths_are_built_at_load(self, explaining_model):
+        """The explainer should be ready before the first explain request."""
+        assert explaining_model.current().explainer is not None
+    
+    def test_predict_adds_contributions(self, client, sample_prediction_request):
+        """Contributions should cover every feature and add up to the probability."""
+        response = client.post(
+            "/predict?explain=true",
+            data=json.dumps(sample_prediction_request),
+            content_type="application/json"
+        )
+        
+        assert response.status_code == 200
+        data = json.loads(response.data)
+        assert list(data["feature_contributions"]) == FEATURE_ORDER
+        total = data["base_probability"] + sum(data["feature_contributions"].values())
+        assert abs(total - data["probability"]) < 1e-4
+        assert data["contributing_factors"]
+    
+    def test_contributions_are_opt_in(self, client, sample_prediction_request):
+        """Without explain, responses should not carry contributions."""
+        response = client.post(
+            "/predict",
+            data=json.dumps(sample_prediction_request),
+            content_type="application/json"
+        )
+        
+        data = json.loads(response.data)
+        assert "feature_contributions" not in data
+        assert "base_probability" not in data
+    
+    def test_batch_matches_single_predictions(self, client, sample_prediction_request):
+        """Batch contributions should match the single-row endpoint."""
+        other = {**sample_prediction_request, "age": 70, "high_bp": False}
+        single = [
+            json.loads(client.post(
+                "/predict?explain=true",
+                data=json.dumps(assessment),
+                content_type="application/json"
+            ).data)
+            for assessment in (sample_prediction_request, other)
+        ]
+        
+        response = client.post(
+            "/predict/batch?explain=true",
+            data=json.dumps({"assessments": [sample_prediction_request, other, {"age": 1}]}),
+            content_type="application/json"
+        )
+        
+        assert response.status_code == 200
+        results = json.loads(response.data)["results"]
+        for result, expected in zip(results, single, strict=False):
+            assert result["feature_contributions"] == expected["feature_contributions"]
+        assert "feature_contributions" not in results[2]
+    
+    def test_batch_rejects_too_many_explained_rows(self, app, client, sample_prediction_request):
+        """Explained batches above MAX_EXPLAIN_ROWS should be rejected with 422."""
+        app.config["MAX_EXPLAIN_ROWS"] = 2
+        payload = json.dumps({"assessments": [sample_prediction_request] * 3})
+        
+        explained = client.post(
+            "/predict/batch?explain=true", data=payload, content_type="application/json"
+        )
+        plain = client.post("/predict/batch", data=payload, content_type="application/json")
+        
+        assert explained.status_code == 422
+        assert "explain=true" in json.loads(explained.data)["details"]["assessments"][0]
+        assert plain.status_code == 200
+
+
+class TestExplainUnavailable:
+    """Tests for ?explain=true when no explainer was built."""
+    
+    def test_unavailable_without_explainer(self, client, sample_prediction_request):
+        """A model loaded without EXPLANATIONS_ENABLED should answer with 503."""
+        response = client.post(
+            "/predict?explain=true",
+            data=json.dumps(sample_prediction_request),
+            content_type="application/json"
+        )
+        
+        assert response.status_code == 503
+        assert "not available" in json.loads(response.data)["message"]